@@ -0,0 +1,146 @@
+"""
+A bootstrap running a Python program with `tracemalloc` to find what
+uses its memory (see `profiler`). It is called as
+
+    python3 allocations.py <report file> <memory limit> <top> <program> [arguments]
+
+The memory used by the objects of the program is checked every
+millisecond of CPU time; once the program uses `memory limit` bytes (as
+it would when judged, counting the memory of the interpreter itself),
+or fails to allocate memory, the line it is running and the `top`
+largest allocation sites still in use are written to the report file
+as JSON, and the program is stopped.
+"""
+
+import collections
+import json
+import linecache
+import os
+import resource
+import runpy
+import signal
+import sys
+import tracemalloc
+
+# `runpy` imports this module on first use; it is imported beforehand so
+# that its allocations (and those of its imports) are not reported.
+import pkgutil  # noqa: F401
+
+# The time (in seconds of CPU time) between checks of the memory usage.
+_INTERVAL = 0.001
+
+# The address space of the program may grow by this multiple of the
+# memory limit, leaving room for the records of `tracemalloc`; a larger
+# allocation fails with a `MemoryError`.
+_ADDRESS_SPACE_FACTOR = 2
+
+# Grouping the allocations of a program with many objects by site is
+# slow, so the sites are estimated from at most this many allocations.
+_SAMPLED_TRACES = 20000
+
+# The longest line of source code kept in the report.
+_SOURCE_LIMIT = 200
+
+# The allocations of the bootstrap and of the import machinery are left
+# out of the report.
+_HIDDEN_FILES = {
+    os.path.abspath(__file__),
+    tracemalloc.__file__,
+    runpy.__file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<frozen runpy>",
+    "<unknown>",
+}
+
+_report_path = ""
+_top = 0
+_threshold = 0
+_address_space_limits = resource.getrlimit(resource.RLIMIT_AS)
+
+
+def _statm(field):
+    # The sizes of the process (in bytes) from `/proc/self/statm`: the
+    # field 0 is the address space and 1 the resident set.
+    try:
+        with open("/proc/self/statm") as fp:
+            return int(fp.read().split()[field]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _source(filename, line):
+    return linecache.getline(filename, line).strip()[:_SOURCE_LIMIT]
+
+
+def _check(signum, frame):
+    if tracemalloc.get_traced_memory()[0] >= _threshold:
+        _report(frame, frame.f_lineno or frame.f_code.co_firstlineno)
+        sys.stdout.flush()
+        os._exit(1)
+
+
+def _report(frame, line):
+    signal.setitimer(signal.ITIMER_PROF, 0)
+    resource.setrlimit(resource.RLIMIT_AS, _address_space_limits)
+    size, peak = tracemalloc.get_traced_memory()
+
+    traces = tracemalloc.take_snapshot().traces
+    step = max(len(traces) // _SAMPLED_TRACES, 1)
+
+    sizes = collections.Counter()
+    counts = collections.Counter()
+    for trace in traces[::step]:
+        site = trace.traceback[0]
+        if site.filename not in _HIDDEN_FILES:
+            sizes[(site.filename, site.lineno)] += step * trace.size
+            counts[(site.filename, site.lineno)] += step
+
+    sites = [
+        [site_filename, site_line, size, counts[(site_filename, site_line)],
+         _source(site_filename, site_line)]
+        for (site_filename, site_line), size in sizes.most_common(_top)
+    ]
+
+    filename = frame.f_code.co_filename
+    with open(_report_path, "w") as fp:
+        json.dump({
+            "size": size,
+            "peak": peak,
+            "line": [filename, line, _source(filename, line)],
+            "sites": sites,
+        }, fp)
+
+
+if __name__ == "__main__":
+    _report_path = sys.argv[1]
+    memory_limit = int(sys.argv[2])
+    _top = int(sys.argv[3])
+
+    program = sys.argv[4]
+    sys.argv = sys.argv[4:]
+    sys.path[0] = os.path.dirname(os.path.abspath(program))
+
+    _threshold = memory_limit - _statm(1)
+
+    hard_limit = _address_space_limits[1]
+    limit = _statm(0) + _ADDRESS_SPACE_FACTOR * memory_limit
+    if hard_limit != resource.RLIM_INFINITY:
+        limit = min(limit, hard_limit)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard_limit))
+
+    tracemalloc.start()
+    signal.signal(signal.SIGPROF, _check)
+    signal.setitimer(signal.ITIMER_PROF, _INTERVAL, _INTERVAL)
+
+    try:
+        runpy.run_path(program, run_name="__main__")
+    except (MemoryError, SystemError) as err:
+        # A single allocation may exceed the address space at once.
+        # `tracemalloc` fails with a `SystemError` if there is no memory
+        # left for its own records.
+        traceback = err.__traceback__
+        while traceback.tb_next is not None:
+            traceback = traceback.tb_next
+        _report(traceback.tb_frame, traceback.tb_lineno)
+        sys.exit(1)
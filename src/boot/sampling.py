@@ -0,0 +1,136 @@
+"""
+A bootstrap running a Python program under a sampling profiler (see
+`profiler`). It is called as
+
+    python3 sampling.py <report file> <time budget> <interval> <program> [arguments]
+
+The stack of the program is sampled every `interval` seconds of CPU
+time, and the counts of the sampled functions and lines are written to
+the report file as JSON once the program stops or has used its time
+budget (in seconds of CPU or real time).
+
+This directory only holds bootstraps, so that the programs they run can
+not import the judge's modules by mistake.
+"""
+
+import collections
+import dis
+import json
+import linecache
+import os
+import runpy
+import signal
+import sys
+import time
+
+_JUMPS = set(dis.hasjrel + dis.hasjabs)
+
+# The frames of the bootstrap and of `runpy` are left out of the samples.
+_HIDDEN_MODULES = {id(globals()), id(vars(runpy))}
+
+_lines = collections.Counter()
+_functions = collections.Counter()
+_samples = 0
+_budget = 0.0
+_start = 0.0
+_jump_lines = {}
+
+
+def _sample(signum, frame):
+    global _samples
+
+    if time.process_time() >= _budget or time.monotonic() - _start >= _budget:
+        _stop(signum, frame)
+
+    seen = set()
+    top = True
+    while frame is not None and id(frame.f_globals) not in _HIDDEN_MODULES:
+        code = frame.f_code
+
+        if top:
+            line = _line(frame)
+            if line is not None:
+                _lines[(code.co_filename, line)] += 1
+            top = False
+
+        # Recursive functions are only counted once per sample.
+        function = (code.co_filename, code.co_firstlineno, code.co_name)
+        if function not in seen:
+            seen.add(function)
+            _functions[function] += 1
+
+        frame = frame.f_back
+
+    if not top:
+        _samples += 1
+
+
+def _line(frame):
+    if frame.f_lineno is not None:
+        return frame.f_lineno
+
+    # Some instructions added by the compiler (ex: the jump back to the
+    # start of a loop) have no line; they are counted on the line they
+    # jump to.
+    code = frame.f_code
+    if code not in _jump_lines:
+        starts = [(offset, line) for offset, line in dis.findlinestarts(code) if line is not None]
+        _jump_lines[code] = {
+            i.offset: _line_at(starts, i.argval)
+            for i in dis.get_instructions(code) if i.opcode in _JUMPS
+        }
+
+    return _jump_lines[code].get(frame.f_lasti)
+
+
+def _line_at(starts, offset):
+    line = None
+    for start, start_line in starts:
+        if start > offset:
+            break
+        line = start_line
+    return line
+
+
+def _stop(signum=None, frame=None):
+    signal.setitimer(signal.ITIMER_PROF, 0)
+    signal.setitimer(signal.ITIMER_REAL, 0)
+
+    with open(_report_path, "w") as fp:
+        json.dump({
+            "samples": _samples,
+            "stopped": signum is not None,
+            "functions": [
+                [name, filename, line, count]
+                for (filename, line, name), count in _functions.most_common()
+            ],
+            "lines": [
+                [filename, line, count, linecache.getline(filename, line).strip()]
+                for (filename, line), count in _lines.most_common()
+            ],
+        }, fp)
+
+    if signum is not None:
+        sys.stdout.flush()
+        os._exit(0)
+
+
+if __name__ == "__main__":
+    _report_path = sys.argv[1]
+    _budget = float(sys.argv[2])
+    interval = float(sys.argv[3])
+
+    program = sys.argv[4]
+    sys.argv = sys.argv[4:]
+    sys.path[0] = os.path.dirname(os.path.abspath(program))
+
+    _start = time.monotonic()
+    signal.signal(signal.SIGPROF, _sample)
+    signal.signal(signal.SIGALRM, _stop)
+    signal.setitimer(signal.ITIMER_PROF, interval, interval)
+    signal.setitimer(signal.ITIMER_REAL, _budget)
+
+    try:
+        runpy.run_path(program, run_name="__main__")
+    finally:
+        _stop()
@@ -0,0 +1,322 @@
+"""
+This module manages the calibration of time limits. Instead of using a
+fixed time limit, an exercise can name a reference solution which is
+benchmarked on the current host; the time limit of each test case is
+then derived from the time the reference solution took.
+
+The time limits are calibrated whenever an exercise is judged on a host
+which has its reference solution (see `calibrate_specs()`); the timings
+are benchmarked once per host and cached. The limits calibrated when the
+exercise is built (see `generator`) are stored in the exercise as
+"time_limits", and used on the hosts without the reference solution
+(ex: the computers of the students).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import threading
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import command
+import exercise
+import judge as sjudge
+import pack
+import reference
+
+# The default directory in which benchmarked timings are cached, one
+# file per reference solution and host so that concurrent calibrations
+# never overwrite each other's timings and the directory can be safely
+# shared (ex: a home directory on a network drive).
+CACHE_DIRECTORY: str = os.path.join(
+    os.path.expanduser("~"), ".cache", "sjudge", "calibration"
+)
+
+# The multiplier to use if the exercise does not specify one.
+DEFAULT_MULTIPLIER: float = 3.0
+
+# The smallest time limit (in seconds) that calibration can produce.
+# Very fast reference solutions would otherwise yield limits that are
+# smaller than the startup time of an interpreter.
+MINIMUM_TIME_LIMIT: float = 0.5
+
+# The number of times each test case is run when benchmarking; the
+# fastest run is kept since it is the least affected by noise.
+BENCHMARK_REPEATS: int = 3
+
+# The reference solution is allowed this many times the exercise's
+# time limit when it is being benchmarked.
+BENCHMARK_LEEWAY: float = 10.0
+
+
+def benchmark(
+        reference_command: str,
+        testcases: Sequence[sjudge.TESTCASE_TYPE],
+        time_limit: float = 1.0,
+        memory_limit: int = 256,
+        judge: sjudge.ANY_JUDGE = "default",
+        repeats: int = BENCHMARK_REPEATS
+) -> List[float]:
+    """
+    Run the reference solution on every test case and get the time (in
+    seconds) it took on each of them.
+
+    :param str reference_command:
+        The command to run the reference solution.
+
+    :param Sequence[TESTCASE_TYPE] testcases:
+        The test cases to benchmark the reference solution on.
+
+    :param float time_limit:
+        The time limit of the exercise (in seconds).
+
+    :param int memory_limit:
+        The memory limit of the exercise (in mebibytes).
+
+    :param ANY_JUDGE judge:
+        The judge used to make sure the reference solution is correct.
+
+    :param int repeats:
+        The number of times to run each test case.
+
+    :return List[float]:
+        The fastest time (in seconds) of each test case.
+    """
+
+    timings: List[float] = []
+
+    for test_number, (test_input, test_output) in enumerate(testcases):
+        fastest = float("inf")
+
+        for _ in range(repeats):
+            tc = sjudge.judge_one(
+                reference_command,
+                test_input,
+                test_output,
+                BENCHMARK_LEEWAY * time_limit,
+                memory_limit,
+                judge,
+            )
+
+            if not tc.passed:
+                raise AssertionError(
+                    f"the reference solution failed case #{test_number + 1} "
+                    f"({tc.verdict.lower()})"
+                )
+
+            fastest = min(fastest, tc.program_time / sjudge.MILLISECOND)
+
+        timings.append(fastest)
+
+    return timings
+
+
+def time_limits(
+        reference_path: str,
+        testcases: Sequence[sjudge.TESTCASE_TYPE],
+        time_limit: float = 1.0,
+        memory_limit: int = 256,
+        judge: sjudge.ANY_JUDGE = "default",
+        multiplier: float = DEFAULT_MULTIPLIER,
+        cache_directory: str = CACHE_DIRECTORY
+) -> List[float]:
+    """
+    Get the calibrated time limit of each test case. The reference
+    solution is only benchmarked if there are no cached timings for it
+    on this host.
+
+    :param str reference_path:
+        The path to the reference solution.
+
+    :param Sequence[TESTCASE_TYPE] testcases:
+        The test cases of the exercise.
+
+    :param float time_limit:
+        The time limit of the exercise (in seconds).
+
+    :param int memory_limit:
+        The memory limit of the exercise (in mebibytes).
+
+    :param ANY_JUDGE judge:
+        The judge of the exercise.
+
+    :param float multiplier:
+        The number of times slower than the reference solution that a
+        program is allowed to be.
+
+    :param str cache_directory:
+        The directory in which timings are cached.
+
+    :return List[float]:
+        The time limit (in seconds) of each test case.
+    """
+
+    if not os.path.isfile(reference_path):
+        raise AssertionError(
+            f"the reference solution `{reference_path}` does not exist"
+        )
+
+    cache_path = os.path.join(cache_directory, f"{_cache_key(reference_path, testcases)}.json")
+    timings = _load_timings(cache_path)
+
+    if timings is None:
+        timings = benchmark(
+            command.get_command(reference_path),
+            testcases,
+            time_limit,
+            memory_limit,
+            judge,
+        )
+        _save_timings(cache_path, timings)
+
+    return _limits(timings, multiplier)
+
+
+def calibrate_specs(specifications: Dict[str, Any], solutions_location: str,
+                    cache_directory: str = CACHE_DIRECTORY) -> None:
+    """
+    Set the "time_limits" of the exercise specifications
+    `specifications` from its reference solution (located in the
+    directory `solutions_location`) on this host. The stored time limits
+    are kept if the exercise has no reference solution, or if it is not
+    available on this host.
+    """
+
+    if "reference" not in specifications:
+        return
+
+    reference_path = os.path.join(solutions_location, specifications["reference"])
+    if not os.path.isfile(reference_path):
+        return
+
+    specifications["time_limits"] = time_limits(
+        reference_path,
+        specifications["testcases"],
+        specifications["time_limit"],
+        specifications["memory_limit"],
+        specifications["judge"],
+        specifications.get("time_multiplier", DEFAULT_MULTIPLIER),
+        cache_directory
+    )
+
+
+def calibrate_exercise(path: str, ex_name: str, reference_path: str,
+                       cache_directory: str = CACHE_DIRECTORY) -> None:
+    """
+    Benchmark the reference solution `reference_path` of the exercise
+    `ex_name` located in the directory `path` and store the time limits
+    derived from it in the exercise as "time_limits".
+
+    If the time used by the reference solution was recorded when its
+    outputs were filled in (see `reference.USAGE_SPEC`), it is used (and
+    cached for this host) instead of benchmarking the reference solution
+    again.
+    """
+
+    specifications = exercise.stream_specs(path, ex_name)
+    testcases: Sequence[sjudge.TESTCASE_TYPE] = specifications["testcases"]
+    multiplier = specifications.get("time_multiplier", DEFAULT_MULTIPLIER)
+
+    usage = specifications.get(reference.USAGE_SPEC)
+    if usage is not None and len(usage) == len(testcases):
+        timings = [time_usage for time_usage, _ in usage]
+        _save_timings(
+            os.path.join(cache_directory, f"{_cache_key(reference_path, testcases)}.json"),
+            timings
+        )
+        specifications["time_limits"] = _limits(timings, multiplier)
+    else:
+        specifications["time_limits"] = time_limits(
+            reference_path,
+            testcases,
+            specifications["time_limit"],
+            specifications["memory_limit"],
+            specifications["judge"],
+            multiplier,
+            cache_directory
+        )
+
+    compression = None
+    if isinstance(testcases, pack.PackedTestcases):
+        compression = testcases.compression
+
+    spec_path = os.path.join(path, f"{ex_name}.json")
+    with exercise.get_writer(spec_path, specifications, compression) as writer:
+        for testcase in testcases:
+            writer.write(testcase)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Calibrate the time limits of an exercise on this computer.")
+    parser.add_argument(
+        "exercise_name", action="store", type=str,
+        help="the name of the exercise to calibrate.")
+    parser.add_argument(
+        "reference_path", action="store", nargs="?", type=str,
+        help="the path to the reference solution; defaults to the exercise's reference.")
+    parser.add_argument(
+        "-e", "--exercises_location", action="store", default="exercises/",
+        help="set the base directory of the exercises.", dest="exercises_location")
+    parser.add_argument(
+        "-r", "--solutions_location", action="store", default="solutions/",
+        help="set the base directory of the reference solutions.", dest="solutions_location")
+    arguments = parser.parse_args()
+
+    reference_path = arguments.reference_path
+    if reference_path is None:
+        specifications = exercise.get_specs(
+            arguments.exercises_location, arguments.exercise_name
+        )
+        if "reference" not in specifications:
+            raise AssertionError(
+                f"the exercise `{arguments.exercise_name}` does not name a reference solution"
+            )
+        reference_path = os.path.join(
+            arguments.solutions_location, specifications["reference"]
+        )
+
+    calibrate_exercise(arguments.exercises_location, arguments.exercise_name, reference_path)
+
+
+def _limits(timings: Sequence[float], multiplier: float) -> List[float]:
+    return [round(max(MINIMUM_TIME_LIMIT, multiplier * t), 3) for t in timings]
+
+
+def _cache_key(reference_path: str, testcases: Sequence[sjudge.TESTCASE_TYPE]) -> str:
+    h = hashlib.sha256()
+    with open(reference_path, "rb") as fd:
+        h.update(fd.read())
+    for test_input, _ in testcases:
+        h.update(json.dumps(list(test_input)).encode("utf-8"))
+
+    return f"{platform.node()}-{h.hexdigest()}"
+
+
+def _load_timings(cache_path: str) -> Optional[List[float]]:
+    try:
+        with open(cache_path, "r") as fd:
+            return json.load(fd)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _save_timings(cache_path: str, timings: List[float]) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+
+    # Write to a temporary file first so that a concurrent reader never
+    # sees partially written timings.
+    temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w") as fd:
+        json.dump(timings, fd)
+    os.replace(temp_path, cache_path)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except AssertionError as err:
+        print(f"error: {err.args[0]}.")
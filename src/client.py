@@ -0,0 +1,85 @@
+"""
+This module is a thin client for the judge server (see `daemon`). It
+has the same interface as `main.py` for judging a program, but leaves
+all the work to the server.
+"""
+
+import argparse
+import os
+
+import display
+import judge
+import progress
+import protocol
+
+# The address of the server if none is given; see `daemon`.
+DEFAULT_ADDRESS: str = os.environ.get("SJUDGE_DAEMON", protocol.DAEMON_ADDRESS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test your programs using the judge server.")
+    parser.add_argument(
+        "exercise_name", action="store", type=str,
+        help="the name of the exercise to test your program for.")
+    parser.add_argument(
+        "program_path", action="store", type=str,
+        help="the path to the program to test.")
+    parser.add_argument(
+        "-a", "--address", action="store", default=DEFAULT_ADDRESS,
+        help="set the address of the judge server.", dest="address")
+    parser.add_argument(
+        "-m", "--manual_command", action="store_true",
+        help="enable this flag if you are entering the full command to run your program under "
+             "`program_path` (instead of just the file name).", dest="manual_command")
+    arguments = parser.parse_args()
+
+    address = arguments.address
+    program = arguments.program_path
+    if not arguments.manual_command:
+        program = os.path.abspath(program)
+
+    try:
+        sock = protocol.connect(address, protocol.DAEMON_PORT)
+    except OSError:
+        raise AssertionError(f"could not connect to the judge server at `{address}`")
+
+    result = judge.JudgeResult()
+    renderer = None
+    with sock, sock.makefile("rwb") as fd:
+        protocol.send_message(fd, {
+            "type": "judge",
+            "exercise": arguments.exercise_name,
+            "program": program,
+            "manual_command": arguments.manual_command,
+        })
+
+        while True:
+            message = protocol.receive_message(fd)
+            if message is None:
+                raise AssertionError("the judge server closed the connection")
+
+            if message["type"] == "error":
+                raise AssertionError(message["message"])
+            elif message["type"] == "specs":
+                display.d_exercise_specs(**message["specs"])
+                renderer = progress.ProgressRenderer(message.get("total", 0))
+            elif message["type"] == "result":
+                result += judge.TestCaseResult.from_dict(message["result"])
+                renderer(result[-1])
+            elif message["type"] == "done":
+                result.verdict = message.get("verdict", result.verdict)
+                result.complexity = message.get("complexity")
+                break
+
+    if renderer is not None:
+        renderer.close()
+    display.d_judging_summary(result)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except AssertionError as err:
+        print(f"error: {err.args[0]}.")
+    except KeyboardInterrupt:
+        print("stopping judging due to user interrupt.")
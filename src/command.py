@@ -3,11 +3,15 @@ This module contains a function for getting the command to run a file
 based on the its extension.
 """
 
+import functools
+import os
 import platform
 import shlex
 import subprocess
 
-from typing import Dict
+from typing import Dict, Optional, Sequence
+
+import plugins
 
 # The result of `platform.system()` on Windows 10.
 WINDOWS: str = "Windows"
@@ -22,6 +26,16 @@ LANGUAGES: Dict[frozenset, tuple] = {
     frozenset({"py", "pyc"}): ("python3 {}", "python {}"),
 }
 
+# Languages defined by installed packages (see `plugins`): the entry
+# point's name is the extension and its value is the tuple of commands
+# (as in `LANGUAGES`).
+LANGUAGE_PLUGINS: plugins.Registry = plugins.Registry("sjudge.languages", {})
+
+# The extensions of files which are run directly, like the files without
+# an extension (ex: compiled programs); the plugins are not looked up
+# for them.
+NATIVE_EXTENSIONS: frozenset = frozenset({"exe", "out", "bin"})
+
 # The default command to run a file (if no language-specific command
 # was found).
 DEFAULT_COMMAND: str = "./{}"
@@ -30,11 +44,13 @@ DEFAULT_COMMAND: str = "./{}"
 _CHECK_TIMEOUT: int = 1
 
 
+@functools.lru_cache(maxsize=None)
 def _exists(c: str) -> bool:
     """
     Check whether the command `c` exists by running it with the
     "--version" argument in the command line and seeing whether the
-    exit code is zero.
+    exit code is zero. The result is remembered for the lifetime of
+    the process.
     """
 
     try:
@@ -55,21 +71,35 @@ def get_command(f: str) -> str:
     Get the command to run the file `f` based on its file extension.
     """
 
-    ext = f.split(".")[-1]
+    ext = os.path.splitext(f)[1][1:]
+    commands = _language_commands(ext)
+    if commands is None:
+        return DEFAULT_COMMAND.replace("{}", f)
+
+    # Gets the last value of `commands` if we are on Windows, otherwise
+    # get the first value. If there is only one command for both
+    # systems (`commands` contains only one value), the last value will
+    # be the first value.
+    full_c = commands[-(platform.system() == WINDOWS)].format(f)
+
+    # Note: convert next two lines to use walrus operator when Python
+    # 3.7 support is dropped (just to be annoying).
+    c = full_c.split()[0]
+    if not _exists(c):
+        raise AssertionError(f"the command `{c}` does not exist")
+
+    return full_c
+
+
+def _language_commands(ext: str) -> Optional[Sequence[str]]:
     for extensions, commands in LANGUAGES.items():
         if ext in extensions:
-            # Gets the last value of `commands` if we are on Windows,
-            # otherwise get the first value. If there is only one
-            # command for both systems (`commands` contains only one
-            # value), the last value will be the first value.
-            full_c = commands[-(platform.system() == WINDOWS)].format(f)
-
-            # Note: convert next two lines to use walrus operator when
-            # Python 3.7 support is dropped (just to be annoying).
-            c = full_c.split()[0]
-            if not _exists(c):
-                raise AssertionError(f"the command `{c}` does not exist")
+            return commands
 
-            return full_c
+    # The plugins are only looked up for unknown extensions, as looking
+    # them up is slow.
+    if ext and ext not in NATIVE_EXTENSIONS and ext in LANGUAGE_PLUGINS:
+        commands = LANGUAGE_PLUGINS[ext]
+        return (commands,) if isinstance(commands, str) else commands
 
-    return DEFAULT_COMMAND.replace("{}", f)
+    return None
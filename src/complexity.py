@@ -0,0 +1,173 @@
+"""
+This module estimates the growth class (ex: linear, quadratic) of the
+time and memory used by a program from its results on test cases of
+different sizes. An exercise tags each of its test cases with its size
+(ex: the number of inputs) in its specifications, and may require a
+growth class which programs must not exceed:
+
+    "sizes": [10, 10, 100, 100, 1000, ...],
+    "complexity": "n log n",
+
+The growth class is the one (of `CLASSES`) which best fits the usage
+`a + b * f(size)`, the constant `a` accounting for the startup of the
+program.
+"""
+
+import math
+import statistics
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# The growth classes, from the slowest growing to the fastest growing;
+# each function is given the size and the largest size, and returns the
+# growth relative to the largest size (so that the values stay small).
+CLASSES: Dict[str, Callable[[float, float], float]] = {
+    "1": lambda n, m: 1.0,
+    "log n": lambda n, m: math.log(n) / math.log(m),
+    "sqrt n": lambda n, m: math.sqrt(n / m),
+    "n": lambda n, m: n / m,
+    "n log n": lambda n, m: n * math.log(n) / (m * math.log(m)),
+    "n^2": lambda n, m: (n / m) ** 2,
+    "n^3": lambda n, m: (n / m) ** 3,
+    "2^n": lambda n, m: 2.0 ** (n - m),
+}
+
+# The fewest distinct sizes from which a growth class is estimated.
+MINIMUM_SIZES: int = 3
+
+# Usages which vary by at most this fraction of the smallest one are
+# deemed constant (ex: the time of a program dominated by its startup).
+FLAT_TOLERANCE: float = 0.1
+
+# Usages which vary by at most this much are also deemed constant,
+# whatever the smallest one (ex: times of 0 ms and 3 ms only differ by
+# the granularity of the timer): the time in milliseconds and the memory
+# in bytes (a few pages).
+TIME_NOISE: float = 5.0
+MEMORY_NOISE: float = 16 * 4096
+
+# A slower growing class is preferred to the best fitting one if its
+# error is at most this fraction larger, so that noise is not mistaken
+# for growth.
+FIT_TOLERANCE: float = 0.25
+
+# The analysis of a program is represented by a dictionary (so that it
+# can be sent as JSON) with the following keys:
+#   - "time"/"memory": the estimated growth class of the time and the
+#     memory used by the program, or `None` if it could not be
+#     estimated,
+#   - "sizes": the number of distinct sizes it was estimated from,
+#   - "required": the growth class required by the exercise, if any.
+COMPLEXITY_TYPE = Dict[str, Any]
+
+
+def estimate(sizes: Sequence[float], usages: Sequence[float],
+             noise: float = 0.0) -> Optional[str]:
+    """
+    Estimate the growth class of the usage `usages[i]` (ex: the time)
+    at size `sizes[i]`. The usages at the same size are combined by
+    their median, and sizes smaller than 1 are left out. The usages are
+    deemed constant if they vary by at most `noise`.
+
+    :return Optional[str]:
+        The growth class (a key of `CLASSES`), or `None` if there are
+        less than `MINIMUM_SIZES` distinct sizes.
+    """
+
+    points = _median_points(sizes, usages)
+    if len(points) < MINIMUM_SIZES:
+        return None
+
+    largest = points[-1][0]
+    ys = [y for _, y in points]
+    if max(ys) - min(ys) <= max(FLAT_TOLERANCE * min(ys), noise):
+        return next(iter(CLASSES))
+
+    errors: Dict[str, float] = {}
+    for name, growth in CLASSES.items():
+        try:
+            xs = [growth(n, largest) for n, _ in points]
+        except (OverflowError, ZeroDivisionError, ValueError):
+            continue
+
+        error = _fit_error(xs, ys)
+        if error is not None:
+            errors[name] = error
+
+    best = min(errors.values())
+    for name, error in errors.items():
+        if error <= best * (1.0 + FIT_TOLERANCE):
+            return name
+
+    return None
+
+
+def exceeds(estimated: Optional[str], required: str) -> bool:
+    """
+    Check whether the growth class `estimated` grows faster than the
+    growth class `required`.
+    """
+
+    order = list(CLASSES)
+    if required not in order:
+        raise AssertionError(f"the complexity `{required}` does not exist")
+    if estimated is None:
+        return False
+
+    return order.index(estimated) > order.index(required)
+
+
+def analyze(
+        sizes: Sequence[float],
+        results: Iterable[Any],
+        required: Optional[str] = None
+) -> COMPLEXITY_TYPE:
+    """
+    Estimate the growth classes of the time and memory used by a program
+    from its test case results `results` (see `judge.TestCaseResult`),
+    the test case `i` having the size `sizes[i]`. The test cases on
+    which the program was stopped (at a time or memory limit) are left
+    out, as their usage is not known.
+    """
+
+    finished = [
+        (size, tc) for size, tc in zip(sizes, results)
+        if not tc.program_tle and not tc.program_mle
+    ]
+
+    finished_sizes = [size for size, _ in finished]
+    return {
+        "time": estimate(finished_sizes, [tc.program_time for _, tc in finished], TIME_NOISE),
+        "memory": estimate(
+            finished_sizes, [tc.program_memory for _, tc in finished], MEMORY_NOISE
+        ),
+        "sizes": len({size for size in finished_sizes if size >= 1}),
+        "required": required,
+    }
+
+
+def _median_points(sizes: Sequence[float], usages: Sequence[float]) -> List[Tuple[float, float]]:
+    grouped: Dict[float, List[float]] = {}
+    for size, usage in zip(sizes, usages):
+        if size >= 1:
+            grouped.setdefault(float(size), []).append(usage)
+
+    return [(size, statistics.median(grouped[size])) for size in sorted(grouped)]
+
+
+def _fit_error(xs: Sequence[float], ys: Sequence[float]) -> Optional[float]:
+    # The least squares fit of `ys = a + b * xs`; a shrinking usage
+    # (`b < 0`) does not fit any growth class.
+    mean_x = statistics.mean(xs)
+    mean_y = statistics.mean(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+
+    if spread == 0:
+        slope = 0.0
+    else:
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread
+        if slope < 0:
+            return None
+
+    intercept = mean_y - slope * mean_x
+    return sum((y - intercept - slope * x) ** 2 for x, y in zip(xs, ys))
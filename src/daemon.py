@@ -0,0 +1,240 @@
+"""
+This module contains a long-running judge server. It keeps everything
+that does not depend on the submission in memory between submissions:
+the imported modules, the parsed (and calibrated) exercises, the
+resolved interpreter commands and a warm pool of judging threads.
+Submissions are sent with `client.py`, which receives the result of
+each test case as soon as it is available.
+
+The server listens on a Unix socket if the address is a path, and on a
+TCP socket if it is "host:port" (only use a local host; the server runs
+whatever it is sent).
+"""
+
+import argparse
+import concurrent.futures
+import os
+import socketserver
+import threading
+
+from typing import Dict, Tuple
+
+import calibrate
+import command
+import exercise
+import interactive
+import judge as sjudge
+import metrics
+import protocol
+import sandbox
+import schedule
+from protocol import receive_message, send_message
+
+
+class _ExerciseCache:
+    def __init__(self, exercises_location: str, solutions_location: str) -> None:
+        self.exercises_location: str = exercises_location
+        self.solutions_location: str = solutions_location
+
+        self._specs: Dict[str, Tuple[int, exercise.SPEC_TYPE]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, ex_name: str) -> exercise.SPEC_TYPE:
+        # The exercise is parsed again only if its file has changed.
+        spec_path = os.path.join(self.exercises_location, f"{ex_name}.json")
+        try:
+            modified = os.stat(spec_path).st_mtime_ns
+        except OSError:
+            raise AssertionError(f"the exercise `{ex_name}` does not exist")
+
+        with self._lock:
+            if ex_name in self._specs and self._specs[ex_name][0] == modified:
+                return self._specs[ex_name][1]
+
+        specifications = exercise.get_specs(self.exercises_location, ex_name)
+        calibrate.calibrate_specs(specifications, self.solutions_location)
+        interactive.prepare_specs(specifications, self.solutions_location)
+
+        with self._lock:
+            self._specs[ex_name] = (modified, specifications)
+        return specifications
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        message = receive_message(self.rfile)
+        if message is None:
+            return
+
+        try:
+            if message["type"] == "judge":
+                self._judge(message)
+            else:
+                raise AssertionError(f"unknown request `{message['type']}`")
+        except AssertionError as err:
+            send_message(self.wfile, {"type": "error", "message": err.args[0]})
+
+    def _judge(self, message: protocol.MESSAGE_TYPE) -> None:
+        specifications = self.server.exercises.get(message["exercise"])
+
+        program_command = message["program"]
+        if not message.get("manual_command", False):
+            if not os.path.isfile(program_command):
+                raise AssertionError(f"the file `{program_command}` does not exist")
+            program_command = command.get_command(program_command)
+
+        send_message(self.wfile, {"type": "specs", "specs": {
+            k: v for k, v in specifications.items() if k not in exercise.HIDDEN_SPECS
+        }, "total": len(specifications["testcases"])})
+
+        def progress_hook(tc: sjudge.TestCaseResult) -> None:
+            send_message(self.wfile, {"type": "result", "result": tc.to_dict()})
+
+        # The longest test cases are started first, so that they do not
+        # make up the tail of the judging.
+        history = self.server.history(message["exercise"])
+        result = sjudge.judge_program(
+            program_command,
+            **specifications,
+            progress_hook=progress_hook,
+            executor=self.server.executor,
+            sandboxes=self.server.sandboxes,
+            dispatch=schedule.longest_first(
+                len(specifications["testcases"]), history, specifications
+            )
+        )
+        history.update(result)
+        history.save()
+        send_message(self.wfile, {
+            "type": "done", "verdict": result.verdict, "complexity": result.complexity
+        })
+
+
+class _DaemonMixin:
+    daemon_threads = True
+
+    def setup_daemon(self, exercises_location: str, solutions_location: str,
+                     workers: int, isolate: bool, history_directory: str) -> None:
+        self.exercises = _ExerciseCache(exercises_location, solutions_location)
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers)
+        self.sandboxes = sandbox.SandboxPool(workers) if isolate else None
+
+        self.history_directory: str = history_directory
+        self._histories: Dict[str, schedule.TimingHistory] = {}
+        self._histories_lock = threading.Lock()
+
+    def history(self, ex_name: str) -> schedule.TimingHistory:
+        # The histories are shared by the requests, so that concurrent
+        # judgings of an exercise do not overwrite each other's timings.
+        with self._histories_lock:
+            if ex_name not in self._histories:
+                self._histories[ex_name] = schedule.TimingHistory.for_exercise(
+                    ex_name, self.history_directory
+                )
+            return self._histories[ex_name]
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.executor.shutdown(wait=False)
+        if self.sandboxes is not None:
+            self.sandboxes.close()
+
+
+class _TCPDaemonServer(_DaemonMixin, socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixDaemonServer(_DaemonMixin, socketserver.ThreadingUnixStreamServer):
+        pass
+
+
+def make_server(
+        address: str,
+        exercises_location: str,
+        solutions_location: str,
+        workers: int = 0,
+        isolate: bool = False,
+        history_directory: str = schedule.HISTORY_DIRECTORY
+) -> socketserver.BaseServer:
+    """
+    Create the judge server; call `serve_forever()` on it to start it.
+
+    :param str address:
+        The path of a Unix socket, or "host:port" for a TCP socket.
+
+    :param str exercises_location:
+        The base directory of the exercises.
+
+    :param str solutions_location:
+        The base directory of the reference solutions.
+
+    :param int workers:
+        The number of test cases to judge at once; defaults to the
+        number of CPUs.
+
+    :param bool isolate:
+        Whether to run the programs in sandboxes without network
+        access (see `sandbox`); the sandboxes are created up front.
+
+    :param str history_directory:
+        The directory of the timings of the exercises, which order the
+        test cases and are updated by every judging (see `schedule`).
+
+    :return socketserver.BaseServer:
+        ...
+    """
+
+    workers = workers or os.cpu_count() or 1
+
+    if protocol.is_unix_address(address):
+        if os.path.exists(address):
+            os.remove(address)
+        server = _UnixDaemonServer(address, _DaemonHandler)
+    else:
+        server = _TCPDaemonServer(protocol.parse_address(address, protocol.DAEMON_PORT),
+                                  _DaemonHandler)
+
+    server.setup_daemon(exercises_location, solutions_location, workers, isolate,
+                        history_directory)
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the sjudge judge server.")
+    parser.add_argument(
+        "address", action="store", nargs="?", default=protocol.DAEMON_ADDRESS,
+        help="the Unix socket path or `host:port` to listen on.")
+    parser.add_argument(
+        "-e", "--exercises_location", action="store", default="exercises/",
+        help="set the base directory of the exercises.", dest="exercises_location")
+    parser.add_argument(
+        "-r", "--solutions_location", action="store", default="solutions/",
+        help="set the base directory of the reference solutions.", dest="solutions_location")
+    parser.add_argument(
+        "-j", "--jobs", action="store", default=0, type=int,
+        help="set the number of test cases to judge at once.", dest="jobs")
+    parser.add_argument(
+        "-i", "--isolate", action="store_true",
+        help="run the programs in sandboxes without network access.", dest="isolate")
+    parser.add_argument(
+        "-M", "--metrics", action="store", default=None,
+        help="serve the metrics of the judge in the Prometheus text format on this local "
+             "`host:port`.", dest="metrics")
+    arguments = parser.parse_args()
+
+    if arguments.metrics:
+        metrics.serve(arguments.metrics)
+
+    with make_server(arguments.address, arguments.exercises_location,
+                     arguments.solutions_location, arguments.jobs, arguments.isolate) as server:
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except AssertionError as err:
+        print(f"error: {err.args[0]}.")
+    except KeyboardInterrupt:
+        print("stopping server due to user interrupt.")
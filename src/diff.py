@@ -0,0 +1,138 @@
+"""
+This module locates the first difference between a program's output and
+the reference output, for the reports of wrong answers. The outputs are
+compared line by line in a single pass, and only a small window around
+the difference is kept, so it can be shown however long the outputs are.
+
+The built-in judges compare the outputs with `first_difference()` and
+their own comparison of lines (see `LINE_COMPARISON_TYPE`), so judging
+an output also locates its first difference, and a difference which the
+judge tolerates (ex: the `float` judge's rounding) is never reported.
+"""
+
+import collections
+import itertools
+
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# The number of equal lines kept before the first differing line.
+CONTEXT_LINES: int = 2
+
+# The number of tokens kept on each side of the first differing token.
+CONTEXT_TOKENS: int = 4
+
+# The maximum length of a context line.
+LINE_LIMIT: int = 200
+
+# The marker of the parts of a line which were left out.
+ELLIPSIS: str = "..."
+
+# A difference is represented by a dictionary (so that it can be sent
+# as JSON) with the following keys:
+#   - "line": the number of the first differing line (from 1),
+#   - "token": the number of the first differing token on it (from 1),
+#   - "context": the equal lines before it, as [line number, line],
+#   - "expected"/"received": the window of the line around the token,
+#     or `None` if the output ended before it.
+DIFFERENCE_TYPE = Dict[str, Any]
+
+# A 'line comparison' takes in a line of the program's output and the
+# line of the reference output, and returns `None` if the lines are equal
+# to the judge, or otherwise the index (from 0) of the first differing
+# token, the tokens being the line's `split()`.
+LINE_COMPARISON_TYPE = Callable[[str, str], Optional[int]]
+
+
+def compare_tokens(received_line: str, expected_line: str) -> Optional[int]:
+    """
+    Compare two lines token by token, ignoring the whitespace around the
+    tokens (see `LINE_COMPARISON_TYPE`).
+    """
+
+    received_tokens = received_line.split()
+    expected_tokens = expected_line.split()
+    if received_tokens == expected_tokens:
+        return None
+
+    for i, (received_token, expected_token) in enumerate(zip(received_tokens, expected_tokens)):
+        if received_token != expected_token:
+            return i
+    return min(len(received_tokens), len(expected_tokens))
+
+
+def differing_token(received_line: str, expected_line: str) -> int:
+    """
+    Get the index of the token of `received_line` which holds (or, for
+    whitespace, follows) the first character which differs from
+    `expected_line`; for judges which compare lines character by
+    character.
+    """
+
+    position = 0
+    for position, (a, b) in enumerate(itertools.zip_longest(received_line, expected_line)):
+        if a != b:
+            break
+
+    before = received_line[:position].split()
+    if before and not received_line[position - 1].isspace():
+        return len(before) - 1
+    return len(before)
+
+
+def first_difference(
+        received: Iterable[str],
+        expected: Iterable[str],
+        compare_lines: LINE_COMPARISON_TYPE = compare_tokens,
+        context_lines: int = CONTEXT_LINES
+) -> Optional[DIFFERENCE_TYPE]:
+    """
+    Locate the first difference between the program's output `received`
+    and the reference output `expected`, the lines being compared with
+    `compare_lines` (by default, ignoring the whitespace around tokens).
+    Both outputs are only iterated once.
+
+    :return Optional[DIFFERENCE_TYPE]:
+        The difference, or `None` if the outputs are equal.
+    """
+
+    context: "collections.deque[List[Any]]" = collections.deque(maxlen=context_lines)
+
+    pairs = itertools.zip_longest(received, expected)
+    for line_number, (received_line, expected_line) in enumerate(pairs, 1):
+        if received_line is None or expected_line is None:
+            token = 0
+        else:
+            token = compare_lines(received_line, expected_line)
+            if token is None:
+                context.append([line_number, _clip(received_line)])
+                continue
+
+        return {
+            "line": line_number,
+            "token": token + 1,
+            "context": list(context),
+            "expected": _window(expected_line, token),
+            "received": _window(received_line, token),
+        }
+
+    return None
+
+
+def _window(line: Optional[str], index: int) -> Optional[str]:
+    if line is None:
+        return None
+
+    tokens = line.split()
+    start = max(index - CONTEXT_TOKENS, 0)
+    end = index + CONTEXT_TOKENS + 1
+
+    window = " ".join(tokens[start:end])
+    if start > 0:
+        window = f"{ELLIPSIS} {window}"
+    if end < len(tokens):
+        window = f"{window} {ELLIPSIS}"
+    return _clip(window)
+
+
+def _clip(line: str) -> str:
+    return line if len(line) <= LINE_LIMIT else line[:LINE_LIMIT] + ELLIPSIS
@@ -2,7 +2,7 @@
 This module manages the logging/displaying of information.
 """
 
-from typing import Dict
+from typing import Dict, Optional, Sequence, TextIO
 
 import judge as sjudge
 import truncate
@@ -15,6 +15,9 @@ SIMPLE_CHARACTERS: Dict[str, str] = {
     "⯈": ">",
 }
 
+# the background load above which the time of a test case is flagged
+NOISY_LOAD: float = 0.25
+
 
 def _truncator(s):
     """
@@ -24,6 +27,15 @@ def _truncator(s):
     return truncate.truncate(s, 200, 4)
 
 
+def _head_tail_truncator(s):
+    """
+    Configuration of the truncator for error messages, whose end
+    usually holds the most useful line.
+    """
+
+    return truncate.head_tail(s, 4, 4, 200)
+
+
 def display(s: str = "", **kwargs) -> None:
     """
     Write `s` to standard output. Simplifies Unicode characters if they
@@ -39,20 +51,28 @@ def display(s: str = "", **kwargs) -> None:
 
 
 def d_exercise_specs(exercise: str, time_limit: float, memory_limit: int,
-                     judge: str, **kwargs) -> None:
+                     judge: str, time_limits: Optional[Sequence[float]] = None,
+                     **kwargs) -> None:
     """
     Display the specifications of an exercise.
     """
 
     display(f"Running tests for exercise: {exercise}")
-    display(f"  ⮡ Time limit: {sjudge.MILLISECOND * time_limit:.0f} ms")
+    if time_limits:
+        display("  ⮡ Time limit: {:.0f} ms to {:.0f} ms (calibrated)".format(
+            sjudge.MILLISECOND * min(time_limits),
+            sjudge.MILLISECOND * max(time_limits)
+        ))
+    else:
+        display(f"  ⮡ Time limit: {sjudge.MILLISECOND * time_limit:.0f} ms")
     display(f"  ⮡ Memory limit: {memory_limit} MiB")
     display(f"  ⮡ Judge: {judge}", flush=True)
 
 
-def d_progress_hook(tc) -> None:
+def d_progress_hook(tc, file: Optional[TextIO] = None) -> None:
     """
-    Progress hook to display the result of each test case.
+    Progress hook to display the result of each test case (to `file`,
+    standard output by default).
     """
 
     display("Case #{} → {}  [{:.0f} ms, {:.2f} MiB]".format(
@@ -60,21 +80,101 @@ def d_progress_hook(tc) -> None:
         tc.verdict,
         tc.program_time,
         tc.program_memory / sjudge.MEBIBYTE
-    ))
+    ), file=file)
+
+    if tc.program_noise >= NOISY_LOAD:
+        display(f"  ⮡ Note: the computer was {tc.program_noise:.0%} busy during this test case; "
+                f"its time may be inaccurate.", file=file)
+
+    if tc.program_attempts:
+        display("  ⮡ Borderline time, re-verified by the median of {} runs: {}".format(
+            len(tc.program_attempts),
+            ", ".join(f"{t:.0f} ms" for t, _ in tc.program_attempts)
+        ), file=file)
 
-    if tc.verdict == sjudge.RUNTIME_ERROR:
-        display("  Error Message:")
-        display("\n".join(f"  ⮡ {s}" for s in _truncator(tc.program_stderr)))
-        display("  Exit code:")
+    if tc.verdict == sjudge.TIME_LIMIT_EXCEEDED and tc.program_profile is not None:
+        d_profile(tc.program_profile, file)
+
+    elif tc.verdict == sjudge.MEM_LIMIT_EXCEEDED and tc.program_allocations is not None:
+        d_allocations(tc.program_allocations, file)
+
+    elif tc.verdict == sjudge.RUNTIME_ERROR:
+        display("  Error Message:", file=file)
+        display("\n".join(f"  ⮡ {s}" for s in _head_tail_truncator(tc.program_stderr)), file=file)
+        display("  Exit code:", file=file)
         display("  ⮡ Process finished with exit code {}".format(
             tc.program_exitcode
-        ))
+        ), file=file)
+
+    elif tc.verdict == sjudge.PROTOCOL_VIOLATION or (
+            tc.verdict == sjudge.WRONG_ANSWER and any(tc.judge_message)):
+        display("  Interactor message:", file=file)
+        display("\n".join(f"  ⮡ {s}" for s in _truncator(tc.judge_message)), file=file)
+        if any(tc.program_stderr):
+            display("  Error Message:", file=file)
+            display("\n".join(f"  ⮡ {s}" for s in _head_tail_truncator(tc.program_stderr)),
+                    file=file)
+
+    elif tc.verdict == sjudge.WRONG_ANSWER and tc.program_difference is not None:
+        d_difference(tc.program_difference, file)
 
     elif tc.verdict == sjudge.WRONG_ANSWER:
-        display("  Expected output:")
-        display("\n".join(f"  ⮡ {s}" for s in _truncator(tc.exercise_output)))
-        display("  Received output:")
-        display("\n".join(f"  ⮡ {s}" for s in _truncator(tc.program_stdout)))
+        display("  Expected output:", file=file)
+        display("\n".join(f"  ⮡ {s}" for s in _truncator(tc.exercise_output)), file=file)
+        display("  Received output:", file=file)
+        display("\n".join(f"  ⮡ {s}" for s in _truncator(tc.program_stdout)), file=file)
+
+
+def d_difference(difference, file: Optional[TextIO] = None) -> None:
+    """
+    Display the first difference between a program's output and the
+    reference output (see `diff.first_difference()`).
+    """
+
+    line = difference["line"]
+    display(f"  First difference on line {line}, token {difference['token']}:", file=file)
+    for number, context_line in difference["context"]:
+        display(f"  ⮡ {number}: {context_line}", file=file)
+
+    for name in ("expected", "received"):
+        window = difference[name]
+        display(f"  {name.capitalize()}:", file=file)
+        display(f"  ⮡ {line}: {window}" if window is not None else "  ⮡ (end of output)",
+                file=file)
+
+
+def d_profile(profile, file: Optional[TextIO] = None) -> None:
+    """
+    Display where a program spent its time (see `profiler`).
+    """
+
+    samples = profile["samples"]
+    display(f"  Hottest functions ({samples} samples):", file=file)
+    for name, filename, line, count in profile["functions"]:
+        display(f"  ⮡ {count / samples:4.0%}  {name} ({filename}:{line})", file=file)
+
+    display("  Hottest lines:", file=file)
+    for filename, line, count, source in profile["lines"]:
+        display(f"  ⮡ {count / samples:4.0%}  {filename}:{line}: {_truncator([source])[0]}",
+                file=file)
+
+
+def d_allocations(allocations, file: Optional[TextIO] = None) -> None:
+    """
+    Display what used a program's memory (see `profiler`).
+    """
+
+    filename, line, source = allocations["line"]
+    display(f"  Reached the memory limit on line {line} of {filename}:", file=file)
+    display(f"  ⮡ {_truncator([source])[0]}", file=file)
+
+    display("  Largest allocations in use ({:.2f} MiB in total):".format(
+        allocations["size"] / sjudge.MEBIBYTE
+    ), file=file)
+    for filename, line, size, count, source in allocations["sites"]:
+        display("  ⮡ {:.2f} MiB in {} objects  {}:{}: {}".format(
+            size / sjudge.MEBIBYTE, count, filename, line, _truncator([source])[0]
+        ), file=file)
 
 
 def d_judging_summary(jr) -> None:
@@ -92,3 +192,24 @@ def d_judging_summary(jr) -> None:
     display("Final score: {}/{}  [{}]".format(
         jr.passed, jr.total, details
     ))
+    if jr.skipped:
+        display(f"  ⮡ Stopped at the first failed test case; {jr.skipped} were not judged.")
+
+    if jr.complexity is not None:
+        d_complexity(jr.complexity)
+
+
+def d_complexity(analysis) -> None:
+    """
+    Display the estimated growth of a program's usage (see
+    `complexity`).
+    """
+
+    def growth(name):
+        return "unknown" if name is None else f"O({name})"
+
+    display("Estimated complexity (from {} sizes): time {}, memory {}".format(
+        analysis["sizes"], growth(analysis["time"]), growth(analysis["memory"])
+    ))
+    if analysis["required"] is not None:
+        display(f"  ⮡ Required time complexity: {growth(analysis['required'])}")
@@ -0,0 +1,426 @@
+"""
+This module manages distributed judging. Worker nodes run a small
+server (see `WorkerServer`) which judges chunks of test cases with
+`judge.judge_program()`, and a coordinator (see `judge_distributed()`)
+hands out the test cases of a program to the workers and collects the
+results in order.
+
+Messages are sent with `protocol`. The workers cache exercises by
+the hash of their test cases, so the test cases of an exercise are only
+sent to each worker once.
+
+Workers run whatever program they are sent; only start them on a
+trusted network.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import queue
+import shlex
+import socket
+import socketserver
+import tempfile
+import threading
+
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence, Set
+
+import command
+import inputs
+import judge as sjudge
+import protocol
+from protocol import receive_message, send_message
+
+ADDRESS_TYPE = protocol.ADDRESS_TYPE
+MESSAGE_TYPE = protocol.MESSAGE_TYPE
+
+# The port workers listen on if none is given.
+DEFAULT_PORT: int = 8737
+
+# The directory in which workers cache exercises; it is private to the
+# user so that the cached test cases can not be tampered with.
+CACHE_DIRECTORY: str = os.path.join(os.path.expanduser("~"), ".cache", "sjudge", "exercises")
+
+# The number of test cases the coordinator hands to a worker at a time.
+# Small chunks keep the workers evenly loaded.
+CHUNK_SIZE: int = 2
+
+# The name of the threads handing out test cases to the workers.
+_DRIVER_NAME: str = "sjudge-driver"
+
+# The time (in seconds) an idle worker connection waits for test cases
+# that other workers failed to judge.
+_POLL_INTERVAL: float = 0.1
+
+
+def exercise_hash(testcases: Sequence[sjudge.TESTCASE_TYPE]) -> str:
+    """
+    Get the hash identifying the test cases `testcases`.
+    """
+
+    data = json.dumps([[list(i), list(o)] for i, o in testcases])
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def parse_address(s: str) -> ADDRESS_TYPE:
+    """
+    Get the address represented by `s` ("host:port" or "host").
+    """
+
+    return protocol.parse_address(s, DEFAULT_PORT)
+
+
+class WorkerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: ADDRESS_TYPE, cache_directory: str = CACHE_DIRECTORY) -> None:
+        """
+        A server judging the test cases it is sent by a coordinator.
+
+        :param ADDRESS_TYPE address:
+            The address to listen on.
+
+        :param str cache_directory:
+            The directory in which to cache exercises.
+        """
+
+        super().__init__(address, _WorkerHandler)
+
+        self.cache_directory: str = cache_directory
+        self.exercises: Dict[str, List[sjudge.TESTCASE_TYPE]] = {}
+        self._lock = threading.Lock()
+
+    def add_exercise(self, h: str, testcases: List[sjudge.TESTCASE_TYPE]) -> None:
+        """
+        Cache the test cases `testcases` of the exercise with hash `h`.
+        """
+
+        if exercise_hash(testcases) != h:
+            raise AssertionError("the test cases do not match their hash")
+
+        try:
+            inputs.private_directory(self.cache_directory)
+        except PermissionError as err:
+            raise AssertionError(err.args[0])
+
+        temp_path = os.path.join(self.cache_directory, f"{h}.{threading.get_ident()}.tmp")
+        with open(temp_path, "w") as fd:
+            json.dump(testcases, fd)
+        os.replace(temp_path, os.path.join(self.cache_directory, f"{h}.json"))
+
+        with self._lock:
+            self.exercises[h] = testcases
+
+    def get_exercise(self, h: str) -> Optional[List[sjudge.TESTCASE_TYPE]]:
+        """
+        Get the test cases of the exercise with hash `h`, or `None` if
+        they are not cached.
+        """
+
+        with self._lock:
+            if h in self.exercises:
+                return self.exercises[h]
+
+        try:
+            inputs.private_directory(self.cache_directory)
+            with open(os.path.join(self.cache_directory, f"{h}.json"), "r") as fd:
+                testcases = json.load(fd)
+
+            # The cached file is only trusted if it still matches its hash.
+            if exercise_hash(testcases) != h:
+                return None
+        except (OSError, TypeError, ValueError):
+            return None
+
+        with self._lock:
+            self.exercises[h] = testcases
+        return testcases
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            while True:
+                message = receive_message(self.rfile)
+                if message is None:
+                    return
+
+                try:
+                    if message["type"] == "exercise":
+                        self.server.add_exercise(message["hash"], message["testcases"])
+                    elif message["type"] == "judge":
+                        self._judge(directory, message)
+                except AssertionError as err:
+                    send_message(self.wfile, {"type": "error", "message": err.args[0]})
+                except (BrokenPipeError, ConnectionResetError):
+                    # The coordinator does not need the results any more.
+                    return
+
+    def _judge(self, directory: str, message: MESSAGE_TYPE) -> None:
+        testcases = self.server.get_exercise(message["exercise"])
+        if testcases is None:
+            send_message(self.wfile, {"type": "missing"})
+            return
+
+        cases = message["cases"]
+
+        def progress_hook(tc: sjudge.TestCaseResult) -> None:
+            tc.testcase_no = cases[tc.testcase_no]
+            send_message(self.wfile, {"type": "result", "result": tc.to_dict()})
+
+        # The test cases are judged as on the coordinator (ex: the
+        # borderline times are verified again); if the coordinator stops
+        # listening, sending a result fails and the judging stops.
+        sjudge.judge_program(
+            _program_command(directory, message["program"]),
+            [testcases[case] for case in cases],
+            memory_limit=message["memory_limit"],
+            judge=message["judge"],
+            progress_hook=progress_hook,
+            time_limits=message["time_limits"],
+            reverify_band=message.get("reverify_band", sjudge.REVERIFY_BAND),
+            reverify_runs=message.get("reverify_runs", sjudge.REVERIFY_RUNS)
+        )
+
+        send_message(self.wfile, {"type": "done"})
+
+
+def _program_command(directory: str, program: MESSAGE_TYPE) -> str:
+    source = base64.b64decode(program["source"])
+
+    program_directory = os.path.join(directory, hashlib.sha256(source).hexdigest())
+    program_path = os.path.join(program_directory, os.path.basename(program["name"]))
+
+    if not os.path.isfile(program_path):
+        os.makedirs(program_directory, exist_ok=True)
+        with open(program_path, "wb") as fd:
+            fd.write(source)
+        os.chmod(program_path, 0o755)
+
+    c = command.get_command(program_path)
+    if c == command.DEFAULT_COMMAND.replace("{}", program_path):
+        c = shlex.quote(program_path)
+    return c
+
+
+def judge_distributed(
+        workers: Sequence[ADDRESS_TYPE],
+        program_path: str,
+        testcases: Sequence[sjudge.TESTCASE_TYPE],
+        time_limit: float = 1.0,
+        memory_limit: int = 256,
+        judge: str = "default",
+        progress_hook: Callable[[sjudge.TestCaseResult], None] = lambda tc: None,
+        time_limits: Optional[Sequence[float]] = None,
+        reverify_band: float = sjudge.REVERIFY_BAND,
+        reverify_runs: int = sjudge.REVERIFY_RUNS,
+        **kwargs
+) -> sjudge.JudgeResult:
+    """
+    Judge a program on a set of test cases using worker nodes. This has
+    the same interface as `judge.judge_program()`, except that it takes
+    the path of the program (which is sent to the workers) instead of
+    the command to run it, and only accepts built-in judges.
+
+    :param Sequence[ADDRESS_TYPE] workers:
+        The addresses of the worker nodes.
+
+    :param str program_path:
+        The path to the program.
+
+    :return JudgeResult:
+        ...
+    """
+
+    if not isinstance(judge, str):
+        raise AssertionError("only built-in judges can be used for distributed judging")
+    if kwargs.get("interactor") is not None:
+        raise AssertionError("interactive exercises can not be judged on worker nodes")
+
+    with open(program_path, "rb") as fd:
+        source = fd.read()
+
+    testcases = [[list(i), list(o)] for i, o in testcases]
+    if time_limits is None:
+        time_limits = [time_limit for _ in testcases]
+
+    job = _Job(
+        exercise=exercise_hash(testcases),
+        testcases=testcases,
+        request={
+            "type": "judge",
+            "program": {
+                "name": os.path.basename(program_path),
+                "source": base64.b64encode(source).decode("ascii"),
+            },
+            "memory_limit": memory_limit,
+            "judge": judge,
+            "reverify_band": reverify_band,
+            "reverify_runs": reverify_runs,
+        },
+        time_limits=list(time_limits),
+        workers=len(workers),
+    )
+
+    for start in range(0, len(testcases), CHUNK_SIZE):
+        job.chunks.put(list(range(start, min(start + CHUNK_SIZE, len(testcases)))))
+
+    for address in workers:
+        threading.Thread(target=_drive_worker, args=(job, address), daemon=True,
+                         name=f"{_DRIVER_NAME}-{address[0]}:{address[1]}").start()
+
+    result_tracker = sjudge.JudgeResult()
+    try:
+        for test_number in range(len(testcases)):
+            result_tracker += job.result(test_number)
+            progress_hook(result_tracker[-1])
+    finally:
+        # The workers stop judging once the results are not needed any
+        # more (ex: a worker failed or the judging was interrupted).
+        job.stop()
+
+    if kwargs.get("sizes") is not None:
+        result_tracker.analyze_complexity(kwargs["sizes"], kwargs.get("complexity"))
+
+    return result_tracker
+
+
+class _Job:
+    def __init__(self, exercise: str, testcases: List[sjudge.TESTCASE_TYPE],
+                 request: MESSAGE_TYPE, time_limits: List[float], workers: int) -> None:
+        self.exercise: str = exercise
+        self.testcases: List[sjudge.TESTCASE_TYPE] = testcases
+        self.request: MESSAGE_TYPE = request
+        self.time_limits: List[float] = time_limits
+
+        self.chunks: "queue.Queue[List[int]]" = queue.Queue()
+
+        self._results: Dict[int, sjudge.TestCaseResult] = {}
+        self._delivered: Set[int] = set()
+        self._error: Optional[str] = None
+        self._stopped: bool = False
+        self._workers: int = workers
+        self._condition = threading.Condition()
+
+    def deliver(self, tc: sjudge.TestCaseResult) -> None:
+        with self._condition:
+            if tc.testcase_no not in self._delivered:
+                self._delivered.add(tc.testcase_no)
+                self._results[tc.testcase_no] = tc
+                self._condition.notify_all()
+
+    def fail(self, message: str) -> None:
+        with self._condition:
+            self._error = message
+            self._condition.notify_all()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def finished(self) -> bool:
+        with self._condition:
+            return (self._stopped or self._error is not None
+                    or len(self._delivered) == len(self.testcases))
+
+    def result(self, test_number: int) -> sjudge.TestCaseResult:
+        with self._condition:
+            while test_number not in self._results:
+                if self._error is not None:
+                    raise AssertionError(self._error)
+                if not self._workers:
+                    raise AssertionError("all the workers have disconnected")
+                self._condition.wait()
+
+            return self._results.pop(test_number)
+
+    def undelivered(self, cases: List[int]) -> List[int]:
+        with self._condition:
+            return [case for case in cases if case not in self._delivered]
+
+    def worker_stopped(self) -> None:
+        with self._condition:
+            self._workers -= 1
+            self._condition.notify_all()
+
+
+def _drive_worker(job: _Job, address: ADDRESS_TYPE) -> None:
+    cases: List[int] = []
+
+    try:
+        with socket.create_connection(address) as sock:
+            fd = sock.makefile("rwb")
+
+            while not job.finished():
+                try:
+                    cases = job.chunks.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+
+                _judge_chunk(job, fd, cases)
+                cases = []
+
+    except (OSError, ValueError, KeyError):
+        # Hand the unfinished test cases to the other workers.
+        cases = job.undelivered(cases)
+        if cases:
+            job.chunks.put(cases)
+
+    finally:
+        job.worker_stopped()
+
+
+def _judge_chunk(job: _Job, fd: BinaryIO, cases: List[int]) -> None:
+    request = dict(job.request)
+    request["exercise"] = job.exercise
+    request["cases"] = cases
+    request["time_limits"] = [job.time_limits[case] for case in cases]
+
+    send_message(fd, request)
+
+    while not job.finished():
+        message = receive_message(fd)
+        if message is None:
+            raise OSError("the worker closed the connection")
+
+        if message["type"] == "missing":
+            send_message(fd, {"type": "exercise", "hash": job.exercise,
+                              "testcases": job.testcases})
+            send_message(fd, request)
+
+        elif message["type"] == "result":
+            job.deliver(sjudge.TestCaseResult.from_dict(message["result"]))
+
+        elif message["type"] == "error":
+            job.fail(message["message"])
+            return
+
+        elif message["type"] == "done":
+            return
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run an sjudge worker node.")
+    parser.add_argument(
+        "address", action="store", nargs="?", default=f"127.0.0.1:{DEFAULT_PORT}",
+        help="the address to listen on (host:port).")
+    parser.add_argument(
+        "-c", "--cache_location", action="store", default=CACHE_DIRECTORY,
+        help="set the directory in which to cache exercises.", dest="cache_location")
+    arguments = parser.parse_args()
+
+    with WorkerServer(parse_address(arguments.address), arguments.cache_location) as server:
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except AssertionError as err:
+        print(f"error: {err.args[0]}.")
+    except KeyboardInterrupt:
+        print("stopping worker due to user interrupt.")
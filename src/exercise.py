@@ -3,10 +3,13 @@ This module manages the loading and management of exercise related
 information.
 """
 
+import collections.abc
 import json
 import os
 
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+import pack
 
 SPEC_TYPE = Dict[str, Any]
 
@@ -23,9 +26,26 @@ REQUIRED_SPECS: List[str] = [
     "testcases",
 ]
 
+# Specifications which are not shown in the description of an exercise.
+HIDDEN_SPECS: List[str] = [
+    "testcases",
+    "reference_usage",
+    "interactor",
+    "sizes",
+]
+
+# The number of characters of an exercise read at a time when its test
+# cases are streamed (see `stream_specs()`).
+_STREAM_SIZE: int = 64 * 1024
+
+# The characters which can be part of a JSON number.
+_NUMBER_CHARACTERS: str = "0123456789+-.eE"
+
 SPEC_FORMATTING: Dict[str, str] = {
     "time_limit": "{key}: {value} s",
     "memory_limit": "{key}: {value} MiB",
+    "time_multiplier": "{key}: {value}x",
+    "complexity": "{key}: O({value})",
 }
 
 
@@ -54,7 +74,7 @@ def get_description(path: str, ex_name: str) -> str:
     return_str = ""
 
     for key, value in get_specs(path, ex_name).items():
-        if key == "testcases":
+        if key in HIDDEN_SPECS:
             continue
 
         formatted_key = key.replace("_", " ").capitalize()
@@ -100,14 +120,71 @@ def get_specs(path: str, ex_name: str) -> SPEC_TYPE:
             if spec_name not in specs:
                 raise AssertionError
 
+        if isinstance(specs["testcases"], dict):
+            specs["testcases"] = pack.PackedTestcases(path, specs["testcases"])
+
         return specs
 
-    except (json.JSONDecodeError, AssertionError):
+    except (json.JSONDecodeError, KeyError, AssertionError):
         raise AssertionError(
             f"the file `{spec_path}` is corrupt."
         )
 
 
+def stream_specs(path: str, ex_name: str) -> SPEC_TYPE:
+    """
+    Get the exercise specifications of the exercise `ex_name` located
+    in the directory `path` like `get_specs()`, except that the test
+    cases are never all held in memory: they are read from the file
+    every time they are iterated over (see `StreamedTestcases`).
+    """
+
+    if not exists(path, ex_name):
+        raise AssertionError(f"the exercise `{ex_name}` does not exist")
+
+    spec_path: str = os.path.join(path, f"{ex_name}.json")
+
+    try:
+        specs: SPEC_TYPE = {}
+        total = 0
+        with open(spec_path, "r") as fd:
+            for key, value in _stream(fd):
+                if key is None:
+                    total += 1
+                else:
+                    specs[key] = value
+
+        for spec_name in REQUIRED_SPECS:
+            if spec_name not in specs:
+                raise AssertionError
+
+        if isinstance(specs["testcases"], dict):
+            specs["testcases"] = pack.PackedTestcases(path, specs["testcases"])
+        else:
+            specs["testcases"] = StreamedTestcases(spec_path, total)
+
+        return specs
+
+    except (ValueError, KeyError, AssertionError):
+        raise AssertionError(
+            f"the file `{spec_path}` is corrupt."
+        )
+
+
+def get_writer(path: str, specifications: SPEC_TYPE, compression: Optional[str] = None):
+    """
+    Get a writer for the exercise specifications file `path`; the test
+    cases are compressed into a pack if `compression` is given.
+
+    :return ExerciseWriter | pack.PackWriter:
+        ...
+    """
+
+    if compression is None:
+        return ExerciseWriter(path, specifications)
+    return pack.PackWriter(path, specifications, compression)
+
+
 def list_exercises(path: str) -> List[str]:
     """
     Get the names of all the exercises found in the directory `path`.
@@ -121,3 +198,182 @@ def list_exercises(path: str) -> List[str]:
     all_names = frozenset(f.split(".")[0] for f in os.listdir(path))
 
     return [ex_name for ex_name in all_names if exists(path, ex_name)]
+
+
+class StreamedTestcases(collections.abc.Iterable):
+    def __init__(self, spec_path: str, total: int) -> None:
+        """
+        A class representing the `total` test cases of the exercise
+        specifications file `spec_path` as an iterable of (input,
+        reference output) pairs, which are read from the file one at a
+        time.
+        """
+
+        self.spec_path: str = spec_path
+        self.total: int = total
+
+    def __iter__(self) -> Iterator[Sequence[Sequence[str]]]:
+        with open(self.spec_path, "r") as fd:
+            for key, value in _stream(fd):
+                if key is None:
+                    yield value
+
+    def __len__(self) -> int:
+        return self.total
+
+
+class ExerciseWriter:
+    def __init__(self, path: str, specifications: SPEC_TYPE) -> None:
+        """
+        A class to write the specifications of an exercise to `path`
+        one test case at a time, so that the test cases never need to
+        be held in memory all at once.
+
+        The specifications are written to a temporary file which only
+        replaces `path` once the writer is closed; an interrupted write
+        never leaves a corrupt exercise behind.
+
+        :param str path:
+            The path of the exercise specifications file.
+
+        :param SPEC_TYPE specifications:
+            The specifications of the exercise; the "testcases" value
+            is ignored.
+        """
+
+        self.path: str = path
+        self.testcases: int = 0
+
+        # Specifications which are only known once all the test cases
+        # have been written (ex: statistics about the test cases); they
+        # are written after the test cases.
+        self.trailer: SPEC_TYPE = {}
+
+        self._temp_path: str = f"{path}.{os.getpid()}.tmp"
+        self._fd = open(self._temp_path, "w")
+
+        header = {k: v for k, v in specifications.items() if k != "testcases"}
+        self._fd.write(json.dumps(header)[:-1])
+        self._fd.write(', "testcases": [' if header else '"testcases": [')
+
+    def __enter__(self) -> "ExerciseWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, testcase: Sequence[Sequence[str]]) -> None:
+        """
+        Append the test case `testcase` (an input and output pair) to
+        the exercise.
+        """
+
+        if self.testcases:
+            self._fd.write(", ")
+        self._fd.write(json.dumps(testcase))
+        self.testcases += 1
+
+    def close(self) -> None:
+        """
+        Finish writing the exercise and move it to its final location.
+        """
+
+        self._fd.write("]")
+        for key, value in self.trailer.items():
+            self._fd.write(f", {json.dumps(key)}: {json.dumps(value)}")
+        self._fd.write("}")
+        self._fd.close()
+        os.replace(self._temp_path, self.path)
+
+    def abort(self) -> None:
+        """
+        Discard everything written so far.
+        """
+
+        self._fd.close()
+        os.remove(self._temp_path)
+
+
+def _stream(fd: TextIO) -> Iterator[Tuple[Optional[str], Any]]:
+    # Parse the exercise specifications in `fd` one value at a time:
+    # each test case is given as `(None, testcase)` and every other
+    # specification as `(name, value)`.
+    reader = _JSONReader(fd)
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "testcases" and reader.peek() == "[":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.expect("]")
+            else:
+                while True:
+                    yield None, reader.value()
+                    if reader.expect(",]") == "]":
+                        break
+            yield key, []
+        else:
+            yield key, reader.value()
+
+        if reader.expect(",}") == "}":
+            return
+
+
+class _JSONReader:
+    def __init__(self, fd: TextIO) -> None:
+        self._fd = fd
+        self._buffer: str = ""
+        self._position: int = 0
+        self._decoder = json.JSONDecoder()
+
+    def _read(self) -> bool:
+        # Drop what was parsed and read more of the file; the read size
+        # grows with the value being parsed so that a large value is
+        # not parsed again too many times.
+        chunk = self._fd.read(max(_STREAM_SIZE, len(self._buffer) - self._position))
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        return bool(chunk)
+
+    def peek(self) -> str:
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position].isspace():
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read():
+                raise ValueError("unexpected end of the file")
+
+    def expect(self, characters: str) -> str:
+        character = self.peek()
+        if character not in characters:
+            raise ValueError(f"expected one of `{characters}`")
+        self._position += 1
+        return character
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+
+            # A number which was cut off by the end of the buffer (ex:
+            # "1." of "1.5") may go on in the rest of the file.
+            cut_off = end == len(self._buffer) or self._buffer[end] in _NUMBER_CHARACTERS
+            if cut_off and self._read():
+                continue
+
+            self._position = end
+            return value
@@ -1,7 +1,14 @@
-import json
 import os
+import random
+import sys
 import typing
 
+# Make the `sjudge` modules importable when this script is run from the
+# exercises directory.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generator
+
 # The "input/output format" for the testing data is a list of strings.
 # Each string in the list represents a line of characters that is to be
 # passed to the tested program.
@@ -22,6 +29,15 @@ EXERCISE_SPECIFICATIONS: typing.Dict[str, typing.Any] = {
     "judge": "default",
     "time_limit": 1.0,
     "memory_limit": 256,
+    # optionally, name a reference solution (located in `solutions/`)
+    # to derive the time limits from; `time_limit` is then only used
+    # while benchmarking the reference solution.
+    # "reference": f"{EXERCISE_NAME}.py",
+    # "time_multiplier": 3.0,
+    # optionally, require the time of programs to grow no faster than
+    # a growth class of `complexity.CLASSES` with the test case size
+    # (see `testcase_size()`).
+    # "complexity": "n log n",
 }
 
 # set the number of testcases for the exercise to have.
@@ -33,16 +49,23 @@ N_RANGE: iter = range(1, int(10 ** 5))
 # `X` is each input in the test case.
 X_RANGE: iter = range(-(10 ** 9), 10 ** 9)
 
-if __name__ == "__main__":
-    tests: typing.List[TEST_TYPE] = []
 
-    for _ in range(TESTCASES):
-        # Generate the exercise testcases here and store them in
-        # `tests`. `tests` is a list of tests which represents the test
-        # cases to test the tested program on.
-        pass
+def make_testcase(rng: random.Random, case_number: int) -> TEST_TYPE:
+    # Generate the test case number `case_number` here and return it.
+    # Only use `rng` for randomness so that the test cases can be
+    # reproduced from the seed given on the command line.
+    return [], []
 
-    EXERCISE_SPECIFICATIONS["testcases"] = tests
 
-    # save the exercise information.
-    json.dump(EXERCISE_SPECIFICATIONS, open(f"{EXERCISE_NAME}.json", "w+"))
+def testcase_size(testcase: TEST_TYPE) -> float:
+    # Optionally, return the size of the test case `testcase` (ex: `N`);
+    # the growth of the time and memory used by programs with the size
+    # is then estimated when they are judged.
+    return len(testcase[0])
+
+
+if __name__ == "__main__":
+    # generate the test cases (in parallel) and save the exercise
+    # information; run with `--help` to see the available options.
+    # Leave out `testcase_size` if the test cases have no sizes.
+    generator.main(EXERCISE_SPECIFICATIONS, make_testcase, TESTCASES, testcase_size)
@@ -1,8 +1,14 @@
-import json
 import os
 import random
+import sys
 import typing
 
+# Make the `sjudge` modules importable when this script is run from the
+# exercises directory.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generator
+
 # The "input/output format" for the testing data is a list of strings.
 # Each string in the list represents a line of characters that is to be
 # passed to the tested program.
@@ -34,31 +40,33 @@ N_RANGE: iter = range(1, 16)
 # `X` is each input in the test case.
 X_RANGE: iter = range(-(1 << 7), 1 << 7)
 
-if __name__ == "__main__":
-    tests: typing.List[TEST_TYPE] = []
 
-    for N in N_RANGE:
-        for _ in range(TESTCASES_PER_N):
-            solutions = random.sample(X_RANGE, N)
-            coefficients = [random.sample(X_RANGE, N) for _ in range(N)]
+def make_testcase(rng: random.Random, case_number: int) -> TEST_TYPE:
+    N = N_RANGE[case_number // TESTCASES_PER_N]
+
+    solutions = rng.sample(X_RANGE, N)
+    coefficients = [rng.sample(X_RANGE, N) for _ in range(N)]
 
-            if 0 not in solutions and random.random() < (1 / TESTCASES_PER_N):
-                solutions[random.randrange(N)] = 0
+    if 0 not in solutions and rng.random() < (1 / TESTCASES_PER_N):
+        solutions[rng.randrange(N)] = 0
 
-            answers = [0 for _ in range(N)]
-            for eq_i, eq_c in enumerate(coefficients):
-                for c_i, c in enumerate(eq_c):
-                    answers[eq_i] += c * solutions[c_i]
+    answers = [0 for _ in range(N)]
+    for eq_i, eq_c in enumerate(coefficients):
+        for c_i, c in enumerate(eq_c):
+            answers[eq_i] += c * solutions[c_i]
 
-            tests.append((
-                [
-                    str(N),
-                    " ".join(" ".join(map(str, c)) for c in coefficients),
-                    " ".join(map(str, answers))
-                ], [str(s) for s in solutions]
-            ))
+    return [
+        str(N),
+        " ".join(" ".join(map(str, c)) for c in coefficients),
+        " ".join(map(str, answers))
+    ], [str(s) for s in solutions]
 
-    EXERCISE_SPECIFICATIONS["testcases"] = tests
 
-    # save the exercise information.
-    json.dump(EXERCISE_SPECIFICATIONS, open(f"{EXERCISE_NAME}.json", "w+"))
+def testcase_size(testcase: TEST_TYPE) -> float:
+    # the size of a test case is its number of equations, `N`.
+    return int(testcase[0][0])
+
+
+if __name__ == "__main__":
+    generator.main(EXERCISE_SPECIFICATIONS, make_testcase, len(N_RANGE) * TESTCASES_PER_N,
+                   testcase_size)
@@ -1,9 +1,13 @@
-import json
 import os
+import random
+import sys
 import typing
 
-from random import choice
-from math import floor, sqrt
+# Make the `sjudge` modules importable when this script is run from the
+# exercises directory.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generator
 
 # The "input/output format" for the testing data is a list of strings.
 # Each string in the list represents a line of characters that is to be
@@ -25,6 +29,8 @@ EXERCISE_SPECIFICATIONS: typing.Dict[str, typing.Any] = {
     "judge": "default",
     "time_limit": 1.0,
     "memory_limit": 32,
+    "reference": "num_factors.py",
+    "time_multiplier": 3.0,
 }
 
 # set the number of testcases for the exercise to have.
@@ -39,41 +45,29 @@ X_RANGES: iter = [
     range(10 ** 9, 10 ** 12)
 ]
 
+# the test cases are laid out as: the random test cases of each range
+# in `X_RANGES`, then zero, then the perfect squares.
+RANDOM_TESTCASES: int = len(X_RANGES) * TESTCASES_PER_X_RANGE
+TESTCASES: int = RANDOM_TESTCASES + 1 + SQUARE_TESTCASES
 
-# define solution function
-def num_factors(x):
-    if x == 0:
-        return "inf"
-
-    factors = 0
-    for f in range(1, floor(sqrt(x)) + 1):
-        q, r = divmod(x, f)
-        if r == 0:
-            factors += 1 + (q != f)
-    return str(factors)
 
+def make_testcase(rng: random.Random, case_number: int) -> TEST_TYPE:
+    if case_number < RANDOM_TESTCASES:
+        x_value = rng.choice(X_RANGES[case_number // TESTCASES_PER_X_RANGE])
+    elif case_number == RANDOM_TESTCASES:
+        x_value = 0
+    else:
+        x_value = rng.choice(range(1, 10 ** 6)) ** 2
 
-if __name__ == "__main__":
-    tests: typing.List[TEST_TYPE] = []
+    # the reference output is filled in by running the reference
+    # solution (`solutions/num_factors.py`).
+    return [str(x_value)], []
 
-    for x_range in X_RANGES:
-        for _ in range(TESTCASES_PER_X_RANGE):
-            x_value = choice(x_range)
-            tests.append((
-                [str(x_value)], [num_factors(x_value)]
-            ))
 
-    tests.append((
-        ["0"], ["inf"]
-    ))
+def testcase_size(testcase: TEST_TYPE) -> float:
+    # the size of a test case is its input, `X`.
+    return int(testcase[0][0])
 
-    for _ in range(SQUARE_TESTCASES):
-        x_value = choice(range(1, 10 ** 6)) ** 2
-        tests.append((
-            [str(x_value)], [num_factors(x_value)]
-        ))
 
-    EXERCISE_SPECIFICATIONS["testcases"] = tests
-
-    # save the exercise information.
-    json.dump(EXERCISE_SPECIFICATIONS, open(f"{EXERCISE_NAME}.json", "w+"))
+if __name__ == "__main__":
+    generator.main(EXERCISE_SPECIFICATIONS, make_testcase, TESTCASES, testcase_size)
@@ -0,0 +1,194 @@
+"""
+This module contains a framework for generating the test cases of an
+exercise. Each test case is generated by a separate call to a "case
+function" with its own deterministically seeded random number
+generator, so the test cases can be generated in parallel and the same
+seed always reproduces the same exercise.
+"""
+
+import argparse
+import functools
+import multiprocessing
+import os
+import random
+
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+import calibrate
+import command
+import exercise
+import pack
+import reference
+
+# The "input/output" format for the testing data is a list of strings.
+# Each string in the list represents a line of characters.
+IO_TYPE = Sequence[str]
+
+# A test case is represented by two IO_TYPE objects: the input and its
+# reference output.
+TESTCASE_TYPE = Tuple[IO_TYPE, IO_TYPE]
+
+# A 'case function' takes in a random number generator and the index
+# of the test case to generate (starting from zero) and returns the
+# test case. It must only use the given random number generator for
+# randomness and, for multiprocessing, be defined at the top level of
+# its module.
+CASE_FUNCTION = Callable[[random.Random, int], TESTCASE_TYPE]
+
+# A 'size function' takes in a generated test case and returns its size
+# (ex: the number of inputs), from which the growth of the time and
+# memory used by programs is estimated (see `complexity`).
+SIZE_FUNCTION = Callable[[TESTCASE_TYPE], float]
+
+# The seed to use if none is given.
+DEFAULT_SEED: int = 0
+
+# The number of test cases sent to a worker process at a time.
+_CHUNK_SIZE: int = 16
+
+
+def case_random(seed: int, case_number: int) -> random.Random:
+    """
+    Get the random number generator for the test case `case_number` of
+    an exercise generated with the seed `seed`. The generator does not
+    depend on the generation of any other test case.
+    """
+
+    return random.Random(f"{seed}:{case_number}")
+
+
+def generate(
+        path: str,
+        specifications: exercise.SPEC_TYPE,
+        case_function: CASE_FUNCTION,
+        testcases: int,
+        seed: int = DEFAULT_SEED,
+        processes: Optional[int] = None,
+        compression: Optional[str] = None,
+        size_function: Optional[SIZE_FUNCTION] = None
+) -> None:
+    """
+    Generate the test cases of an exercise and write its specifications
+    to `path`. The test cases are written as they are generated so the
+    memory usage does not depend on the number of test cases.
+
+    :param str path:
+        The path of the exercise specifications file.
+
+    :param SPEC_TYPE specifications:
+        The specifications of the exercise (without the test cases).
+
+    :param CASE_FUNCTION case_function:
+        The function generating each test case.
+
+    :param int testcases:
+        The number of test cases to generate.
+
+    :param int seed:
+        The seed from which the seed of each test case is derived.
+
+    :param Optional[int] processes:
+        The number of worker processes to use; defaults to the number
+        of CPUs. If this is 1, the test cases are generated in this
+        process.
+
+    :param Optional[str] compression:
+        If given, the test cases are compressed into a pack with this
+        compression algorithm (see `pack`).
+
+    :param Optional[SIZE_FUNCTION] size_function:
+        If given, the size of each test case is written to the
+        specifications as "sizes" (see `complexity`).
+    """
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    make_case = functools.partial(_make_case, case_function, seed)
+
+    with exercise.get_writer(path, specifications, compression) as writer:
+        sizes: List[float] = []
+
+        if processes == 1:
+            _write_cases(writer, map(make_case, range(testcases)), size_function, sizes)
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                cases = pool.imap(make_case, range(testcases), _CHUNK_SIZE)
+                _write_cases(writer, cases, size_function, sizes)
+
+        if size_function is not None:
+            writer.trailer["sizes"] = sizes
+
+
+def main(
+        specifications: exercise.SPEC_TYPE,
+        case_function: CASE_FUNCTION,
+        testcases: int,
+        size_function: Optional[SIZE_FUNCTION] = None
+) -> None:
+    """
+    The command line interface of a test case generation script; see
+    `exercises/_template.py` for an example.
+
+    If the exercise names a reference solution, the reference outputs
+    returned by `case_function` are ignored and replaced by the outputs
+    of the reference solution (see `reference.fill_outputs()`), and the
+    time limits are calibrated from it (see `calibrate`).
+    """
+
+    parser = argparse.ArgumentParser(
+        description=f"Generate the test cases of `{specifications['exercise']}`.")
+    parser.add_argument(
+        "-s", "--seed", action="store", default=DEFAULT_SEED, type=int,
+        help="set the seed of the generated test cases.", dest="seed")
+    parser.add_argument(
+        "-p", "--processes", action="store", default=None, type=int,
+        help="set the number of worker processes.", dest="processes")
+    parser.add_argument(
+        "-o", "--output", action="store", default=f"{specifications['exercise']}.json",
+        help="set the path of the generated exercise.", dest="output")
+    parser.add_argument(
+        "-r", "--solutions_location", action="store", default="../solutions/",
+        help="set the base directory of the reference solutions.", dest="solutions_location")
+    parser.add_argument(
+        "-c", "--compression", action="store", default=None, choices=pack.COMPRESSIONS,
+        help="compress the test cases into a pack.", dest="compression")
+    arguments = parser.parse_args()
+
+    generate(
+        arguments.output,
+        specifications,
+        case_function,
+        testcases,
+        seed=arguments.seed,
+        processes=arguments.processes,
+        compression=arguments.compression,
+        size_function=size_function
+    )
+
+    if "reference" in specifications:
+        reference_path = os.path.join(
+            arguments.solutions_location, specifications["reference"]
+        )
+        if not os.path.isfile(reference_path):
+            raise AssertionError(f"the file `{reference_path}` does not exist")
+
+        path, ex_name = os.path.split(os.path.abspath(arguments.output))
+        reference.fill_outputs(
+            path,
+            ex_name[:-len(".json")],
+            command.get_command(reference_path),
+            arguments.processes
+        )
+        calibrate.calibrate_exercise(path, ex_name[:-len(".json")], reference_path)
+
+
+def _write_cases(writer, cases: Iterable[TESTCASE_TYPE],
+                 size_function: Optional[SIZE_FUNCTION], sizes: List[float]) -> None:
+    for testcase in cases:
+        writer.write(testcase)
+        if size_function is not None:
+            sizes.append(size_function(testcase))
+
+
+def _make_case(case_function: CASE_FUNCTION, seed: int, case_number: int) -> TESTCASE_TYPE:
+    return case_function(case_random(seed, case_number), case_number)
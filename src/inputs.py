@@ -0,0 +1,200 @@
+"""
+This module manages a content-addressed cache of materialized test case
+inputs. Every program judged on an exercise is given the same inputs;
+once an input has been written to the cache, later runs (in this
+process or any other) pass the cached file to the program directly
+instead of writing the input out again.
+
+The path of the file of each test case is also remembered by the
+process, so that after the first run of a test case, passing its input
+to a program only takes an `open()` (see `open_input()`).
+"""
+
+import collections
+import hashlib
+import os
+import stat
+import threading
+
+from typing import Dict, Sequence, Set, Tuple
+
+# The default directory of the cache; it is private to the user so that
+# the inputs can not be tampered with by other users.
+CACHE_DIRECTORY: str = os.path.join(os.path.expanduser("~"), ".cache", "sjudge", "inputs")
+
+# The size (in bytes) of the inputs kept in a cache directory; the least
+# recently used inputs are removed when it grows larger (see `evict()`).
+CACHE_SIZE: int = 1024 ** 3
+
+# The number of test cases whose file is remembered by the process.
+MEMO_SIZE: int = 4096
+
+# Inputs are read as bytes on every platform.
+_O_BINARY: int = getattr(os, "O_BINARY", 0)
+
+# The paths of the files of the latest materialized test cases, by the
+# identity of their input and the cache directory; the input is kept so
+# that its identity is not reused by another input.
+_materialized: "collections.OrderedDict[Tuple[int, str], Tuple[Sequence[str], str]]" = (
+    collections.OrderedDict()
+)
+
+# The cache directories which were checked to be private, and the bytes
+# written to each of them since it was last evicted.
+_checked: Set[str] = set()
+_written: Dict[str, int] = {}
+
+_lock = threading.Lock()
+
+
+def encode(test_input: Sequence[str]) -> bytes:
+    """
+    Get the bytes that are passed to a program for the input
+    `test_input` (each line is terminated by a newline).
+    """
+
+    return "".join(f"{line}\n" for line in test_input).encode("utf-8")
+
+
+def materialize(test_input: Sequence[str], directory: str = CACHE_DIRECTORY) -> str:
+    """
+    Get the path of a file containing the input `test_input`, writing
+    it to the cache in `directory` if it is not already there.
+
+    :param Sequence[str] test_input:
+        The input (each string represents a line).
+
+    :param str directory:
+        The directory of the cache; it is created if needed, and must be
+        owned by the current user and only accessible to them.
+
+    :return str:
+        The path of the file, which must not be modified.
+    """
+
+    key = (id(test_input), directory)
+    with _lock:
+        entry = _materialized.get(key)
+        if entry is not None and entry[0] is test_input:
+            _materialized.move_to_end(key)
+            return entry[1]
+
+    private_directory(directory)
+
+    data = encode(test_input)
+    digest = hashlib.sha256(data).hexdigest()
+    path = os.path.join(directory, digest[:2], digest)
+
+    try:
+        # The modification time of an input is the last time it was
+        # materialized, from which the eviction finds the least recently
+        # used inputs.
+        os.utime(path)
+    except FileNotFoundError:
+        _write(path, data)
+
+    with _lock:
+        _materialized[key] = (test_input, path)
+        if len(_materialized) > MEMO_SIZE:
+            _materialized.popitem(last=False)
+
+    return path
+
+
+def open_input(test_input: Sequence[str], directory: str = CACHE_DIRECTORY) -> int:
+    """
+    Get a file descriptor (opened for reading) of a file containing the
+    input `test_input`, from the cache in `directory` (see
+    `materialize()`); the caller must close it.
+    """
+
+    try:
+        return os.open(materialize(test_input, directory), os.O_RDONLY | _O_BINARY)
+    except FileNotFoundError:
+        # The input was evicted since it was materialized (ex: by
+        # another process); it is written again.
+        with _lock:
+            _materialized.pop((id(test_input), directory), None)
+        return os.open(materialize(test_input, directory), os.O_RDONLY | _O_BINARY)
+
+
+def evict(directory: str = CACHE_DIRECTORY, size: int = CACHE_SIZE) -> None:
+    """
+    Remove the least recently used inputs from the cache in `directory`
+    until their total size is at most `size` bytes.
+    """
+
+    files = []
+    for subdirectory in os.scandir(directory):
+        if not subdirectory.is_dir(follow_symlinks=False):
+            continue
+        for entry in os.scandir(subdirectory.path):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                file_stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            files.append((file_stat.st_mtime_ns, file_stat.st_size, entry.path))
+
+    total = sum(file_size for _, file_size, _ in files)
+    for _, file_size, path in sorted(files):
+        if total <= size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= file_size
+
+
+def private_directory(directory: str) -> None:
+    """
+    Create the directory `directory` (only accessible to the current
+    user) if it does not exist, and make sure that it can not be written
+    to by other users: a cache in a directory which another user created
+    first (or could write into) would let them choose its content.
+    """
+
+    if directory in _checked:
+        return
+
+    os.makedirs(os.path.dirname(os.path.abspath(directory)), exist_ok=True)
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+
+    if hasattr(os, "getuid"):
+        directory_stat = os.lstat(directory)
+        if (not stat.S_ISDIR(directory_stat.st_mode)
+                or directory_stat.st_uid != os.getuid()
+                or stat.S_IMODE(directory_stat.st_mode) != 0o700):
+            raise PermissionError(
+                f"the cache `{directory}` must be a directory owned by the current user "
+                f"with the mode 0700"
+            )
+
+    with _lock:
+        _checked.add(directory)
+
+
+def _write(path: str, data: bytes) -> None:
+    directory = os.path.dirname(os.path.dirname(path))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Write to a temporary file first so that a concurrent run never
+    # sees a partially written input.
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as fd:
+        fd.write(data)
+    os.replace(temp_path, path)
+
+    # The cache is evicted on the first write of the process, then every
+    # time an eighth of its size has been written.
+    with _lock:
+        written = _written.get(directory)
+        due = written is None or written + len(data) >= CACHE_SIZE // 8
+        _written[directory] = 0 if due else written + len(data)
+    if due:
+        evict(directory)
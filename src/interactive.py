@@ -0,0 +1,44 @@
+"""
+This module manages interactive exercises, in which the program talks
+with an interactor (ex: a guessing game) instead of reading a fixed
+input. An interactive exercise names its interactor, located with the
+reference solutions, in its specifications:
+
+    "interactor": "guess_interactor.py"
+
+The interactor is run for each test case as
+
+    <interactor> <input file> <reference output file>
+
+with its standard input and output connected to the program's. It may
+write an explanation of its verdict to its standard error, and must
+exit with one of the exit codes below.
+"""
+
+import os
+
+from typing import Any, Dict
+
+import command
+
+# The exit codes of an interactor.
+INTERACTOR_ACCEPTED: int = 0
+INTERACTOR_WRONG_ANSWER: int = 1
+INTERACTOR_PROTOCOL_VIOLATION: int = 2
+
+
+def prepare_specs(specifications: Dict[str, Any], solutions_location: str) -> None:
+    """
+    Replace the "interactor" of the exercise specifications
+    `specifications` (if any) by the command to run it, the interactor
+    being located in the directory `solutions_location`.
+    """
+
+    if "interactor" not in specifications:
+        return
+
+    interactor_path = os.path.join(solutions_location, specifications["interactor"])
+    if not os.path.isfile(interactor_path):
+        raise AssertionError(f"the interactor `{interactor_path}` does not exist")
+
+    specifications["interactor"] = command.get_command(interactor_path)
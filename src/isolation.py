@@ -0,0 +1,153 @@
+"""
+This module reduces the timing noise of test runs on busy computers (see
+`Isolation`). Programs are pinned to a set of reserved cores, the judge
+itself (the "supervisor") is pinned to the other cores, and the load the
+reserved cores were under before each run is measured so that results
+can carry an estimate of how noisy their timing is.
+
+CPU affinity is only supported on Linux.
+"""
+
+import os
+import threading
+
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+
+def _require_affinity() -> None:
+    if not hasattr(os, "sched_setaffinity"):
+        raise AssertionError("CPU isolation is not supported on this computer")
+
+
+class Isolation:
+    def __init__(
+            self,
+            cores: Sequence[int],
+            priority: Optional[int] = None,
+            supervisor_cores: Optional[Sequence[int]] = None
+    ) -> None:
+        """
+        The settings to isolate test runs with.
+
+        :param Sequence[int] cores:
+            The cores on which the programs are run.
+
+        :param Optional[int] priority:
+            The niceness to run the programs with (ex: -10 to raise
+            their priority; this usually requires extra privileges and
+            is skipped if they are missing).
+
+        :param Optional[Sequence[int]] supervisor_cores:
+            The cores to pin the judge itself to (see `pin_supervisor()`).
+        """
+
+        _require_affinity()
+
+        self.cores: List[int] = sorted(cores)
+        self.priority: Optional[int] = priority
+        self.supervisor_cores: Optional[List[int]] = (
+            None if supervisor_cores is None else sorted(supervisor_cores)
+        )
+
+        self._lock = threading.Lock()
+        self._load: float = 0.0
+        self._program_time: float = 0.0
+        self._times = self._busy_times()
+
+    def pin_supervisor(self) -> None:
+        """
+        Pin the calling thread (and the threads and processes it starts
+        afterwards) to the supervisor cores; call it before starting
+        any judging threads.
+        """
+
+        if self.supervisor_cores is not None:
+            os.sched_setaffinity(0, self.supervisor_cores)
+
+    @contextmanager
+    def pinned(self) -> Iterator[None]:
+        """
+        Temporarily pin the calling thread to the reserved cores, so
+        that the processes it starts inherit the affinity from the very
+        start.
+        """
+
+        previous = os.sched_getaffinity(0)
+        os.sched_setaffinity(0, self.cores)
+        try:
+            yield
+        finally:
+            os.sched_setaffinity(0, previous)
+
+    def prioritize(self, pid: int) -> None:
+        """
+        Set the priority of the process `pid`, if one was given.
+        """
+
+        if self.priority is not None:
+            try:
+                os.setpriority(os.PRIO_PROCESS, pid, self.priority)
+            except OSError:
+                pass
+
+    def background_load(self) -> float:
+        """
+        Get the fraction (from 0 to 1) of the reserved cores that was
+        used by other processes than the judged programs since the
+        previous measurement; this is the noise estimate of the next
+        run. Test cases judged in parallel are not counted as
+        background load for each other.
+
+        The CPU times are only updated every few milliseconds, so the
+        previous estimate is kept if too little time has passed.
+        """
+
+        times = self._busy_times()
+
+        with self._lock:
+            busy = sum(b - pb for (b, _), (pb, _) in zip(times, self._times))
+            total = sum(t - pt for (_, t), (_, pt) in zip(times, self._times))
+
+            if total > 0:
+                self._load = min(max((busy - self._program_time) / total, 0.0), 1.0)
+                self._times = times
+                self._program_time = 0.0
+            return self._load
+
+    def account(self, program_time: float) -> None:
+        """
+        Exclude the CPU time `program_time` (in seconds) used by a
+        judged program from the background load.
+        """
+
+        with self._lock:
+            self._program_time += program_time
+
+    def _busy_times(self) -> List[Tuple[float, float]]:
+        import psutil
+
+        busy_times = []
+        for core, t in enumerate(psutil.cpu_times(percpu=True)):
+            if core in self.cores:
+                # The guest times are already included in the user times.
+                total = sum(t) - getattr(t, "guest", 0.0) - getattr(t, "guest_nice", 0.0)
+                busy_times.append((total - t.idle - getattr(t, "iowait", 0.0), total))
+        return busy_times
+
+
+def reserve(count: int, priority: Optional[int] = None) -> Isolation:
+    """
+    Reserve the last `count` cores available to the judge for the
+    programs and keep the others for the supervisor.
+    """
+
+    _require_affinity()
+
+    available = sorted(os.sched_getaffinity(0))
+    if not 0 < count < len(available):
+        raise AssertionError(
+            f"between 1 and {len(available) - 1} cores can be reserved on this computer"
+        )
+
+    return Isolation(available[-count:], priority, available[:-count])
@@ -0,0 +1,212 @@
+"""
+This module keeps a journal of the test cases judged so far (see
+`judge.judge_program()`), so that a long judging which was interrupted
+(ex: by the user or a reboot of the grader) can be resumed without
+judging the completed test cases again.
+
+A journal is a file of JSON lines: the first line holds the hashes of
+the program and of the exercise it was judged on, and each other line
+the result of a test case, written as soon as the test case is judged
+(so that it survives the judge being stopped) and synced to disk at
+most every `SYNC_INTERVAL` seconds (so that a reboot only loses the
+latest test cases). A journal is only resumed if both hashes still
+match.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from typing import Any, Dict, Optional, Tuple
+
+import exercise
+import judge as sjudge
+import pack
+import results
+
+# The default directory of the journals; it is not a temporary directory
+# so that the journals survive a reboot.
+JOURNAL_DIRECTORY: str = os.path.join(os.path.expanduser("~"), ".cache", "sjudge", "journals")
+
+# The longest time (in seconds) between two syncs of a journal to disk;
+# syncing after every test case would slow down the short ones.
+SYNC_INTERVAL: float = 1.0
+
+# The specifications which change the verdicts; they are hashed as they
+# are judged with, in case they differ from the exercise's file.
+_JUDGING_SPECS = ("judge", "time_limit", "time_limits", "memory_limit", "complexity")
+
+
+def exercise_hash(spec_path: str, specifications: exercise.SPEC_TYPE) -> str:
+    """
+    Get the hash identifying the exercise whose specifications file is
+    `spec_path`, as judged with the (possibly calibrated) specifications
+    `specifications`.
+    """
+
+    judging = {name: specifications.get(name) for name in _JUDGING_SPECS}
+
+    # The test cases of a packed exercise are in its pack, which is
+    # identified by its size and modification time rather than hashed,
+    # as it may be large.
+    testcases = specifications.get("testcases")
+    if isinstance(testcases, pack.PackedTestcases):
+        pack_stat = os.stat(testcases.pack_path)
+        judging["pack"] = [pack_stat.st_size, pack_stat.st_mtime_ns]
+
+    digest = hashlib.sha256(results.submission_hash(spec_path).encode("utf-8"))
+    digest.update(json.dumps(judging, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def default_path(ex_name: str, program: str) -> str:
+    """
+    Get the default path of the journal of the program `program` (see
+    `results.submission_hash()`) on the exercise `ex_name`.
+    """
+
+    digest = results.submission_hash(program)[:16]
+    return os.path.join(JOURNAL_DIRECTORY, f"{ex_name}-{digest}.jsonl")
+
+
+def resumable(path: str, program: str, exercise_hash: str) -> int:
+    """
+    Get the number of test cases the journal at `path` holds for the
+    program `program` on the exercise `exercise_hash` (see `Journal`),
+    which would be lost if it was started over.
+    """
+
+    return len(_read(path, {"program": program, "exercise": exercise_hash})[0])
+
+
+class Journal:
+    def __init__(self, path: str, program: str, exercise_hash: str, resume: bool = True) -> None:
+        """
+        The journal of a program on an exercise; call `close()` once the
+        judging is done (or `remove()` if the journal is not needed any
+        more).
+
+        :param str path:
+            The path of the journal.
+
+        :param str program:
+            The hash of the program (see `results.submission_hash()`).
+
+        :param str exercise_hash:
+            The hash of the exercise (see `exercise_hash()`).
+
+        :param bool resume:
+            Whether to keep the test cases of an existing journal at
+            `path` (if its hashes match); otherwise it is started over.
+        """
+
+        self.path: str = path
+        self.header: Dict[str, str] = {"program": program, "exercise": exercise_hash}
+
+        # The journaled results by test case number (without the test
+        # case's input and reference output, which are not journaled).
+        self.completed: Dict[int, Dict[str, Any]] = {}
+
+        self._lock = threading.Lock()
+        self._synced: float = time.monotonic()
+
+        end = None
+        if resume:
+            self.completed, end = _read(path, self.header)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if end is None:
+            self._fd = open(path, "w", encoding="utf-8")
+            self._append(self.header)
+        else:
+            # A line which was cut off (ex: by a crash) is dropped.
+            self._fd = open(path, "r+", encoding="utf-8")
+            self._fd.seek(end)
+            self._fd.truncate()
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        self._fd.write(json.dumps(record) + "\n")
+        self._fd.flush()
+
+        now = time.monotonic()
+        if now - self._synced >= SYNC_INTERVAL:
+            os.fsync(self._fd.fileno())
+            self._synced = now
+
+    def get(self, test_number: int,
+            testcase: sjudge.TESTCASE_TYPE) -> Optional[sjudge.TestCaseResult]:
+        """
+        Get the journaled result of the test case `test_number` (which
+        is `testcase`), or `None` if it was not journaled.
+        """
+
+        record = self.completed.get(test_number)
+        if record is None:
+            return None
+
+        return sjudge.TestCaseResult.from_dict(
+            dict(record, exercise_input=testcase[0], exercise_output=testcase[1])
+        )
+
+    def record(self, test_number: int, tc: sjudge.TestCaseResult) -> None:
+        """
+        Add the result `tc` of the test case `test_number` to the journal.
+        """
+
+        record = tc.to_dict()
+        del record["exercise_input"], record["exercise_output"]
+        record["testcase_no"] = test_number
+
+        with self._lock:
+            self.completed[test_number] = record
+            self._append(record)
+
+    def close(self) -> None:
+        with self._lock:
+            self._fd.flush()
+            os.fsync(self._fd.fileno())
+            self._fd.close()
+
+    def remove(self) -> None:
+        """
+        Close and delete the journal.
+        """
+
+        # The journal is not synced, as it is deleted anyway.
+        self._fd.close()
+        os.remove(self.path)
+
+
+def _read(path: str, header: Dict[str, str]) -> Tuple[Dict[int, Dict[str, Any]], Optional[int]]:
+    # Read the journaled results of the journal at `path` if its header
+    # is `header`, and get the offset of the end of its last complete
+    # line (`None` if it does not match).
+    try:
+        fd = open(path, "rb")
+    except OSError:
+        return {}, None
+
+    completed: Dict[int, Dict[str, Any]] = {}
+    with fd:
+        header_line = fd.readline()
+        try:
+            if json.loads(header_line) != header:
+                return {}, None
+        except ValueError:
+            return {}, None
+
+        end = fd.tell()
+        for line in fd:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b"\n"):
+                break
+
+            completed[record["testcase_no"]] = record
+            end += len(line)
+
+    return completed, end
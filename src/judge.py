@@ -3,16 +3,31 @@ This module manages the judging of a program. The normal usage is with
 the `judge()` and `judge_one()` functions.
 """
 
+import contextlib
+import itertools
+import os
 import shlex
+import tempfile
+import time
 
 from typing import (
-    Callable, Dict, Iterable, List, Sequence, Tuple, Union
+    TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 )
 
-from judges import float_judge
-from judges import identical_judge
-from judges import default_judge
-import run
+import complexity as sjcomplexity
+import diff
+import metrics
+import pack
+import plugins
+import profiler
+
+# These are only needed to run programs and are slow to import, so they
+# are imported on first use (see `judge_one()`).
+if TYPE_CHECKING:
+    import concurrent.futures
+    import isolation as sjisolation
+    import journal as sjjournal
+    import sandbox
 
 # The "input/output" format for the testing data is a list of strings.
 # Each string in the list represents a line of characters that is to be
@@ -25,7 +40,9 @@ TESTCASE_TYPE = Tuple[IO_TYPE, IO_TYPE]
 
 # A 'judge' is a function which takes in two IO_TYPE objects (the
 # program's output and the reference output) and returns `True` if the
-# program's output is deemed correct.
+# program's output is deemed correct. A judge may also have its line
+# comparison as a `compare_lines` attribute (see `diff`); the outputs
+# are then judged and their first difference located in a single pass.
 JUDGE_TYPE = Callable[[IO_TYPE, IO_TYPE], bool]
 
 # ANY_JUDGE represents anything that could be a judge: either a
@@ -38,18 +55,29 @@ RUNTIME_ERROR: str = "Runtime Error"
 TIME_LIMIT_EXCEEDED: str = "Time Limit Exceeded"
 MEM_LIMIT_EXCEEDED: str = "Memory Limit Exceeded"
 WRONG_ANSWER: str = "Wrong Answer"
+PROTOCOL_VIOLATION: str = "Protocol Violation"
+COMPLEXITY_EXCEEDED: str = "Complexity Exceeded"
 
-# Define the built-in judging functions.
-JUDGES: Dict[str, JUDGE_TYPE] = {
-    "float": float_judge.float_judge,
-    "identical": identical_judge.identical_judge,
-    "default": default_judge.default_judge
-}
+# Define the judging functions: the built-in ones and those of installed
+# packages (see `plugins`). They are only imported when first used.
+JUDGES: plugins.Registry = plugins.Registry("sjudge.judges", {
+    "float": "judges.float_judge:float_judge",
+    "identical": "judges.identical_judge:identical_judge",
+    "default": "judges.default_judge:default_judge",
+})
 
 # Define the other utility constants.
 MEBIBYTE: int = 1024 * 1024
 MILLISECOND: float = 1000
 
+# Programs are stopped at this fraction over their time limit; the test
+# cases which finish within this fraction of their time limit (under or
+# over it) are run again up to `REVERIFY_RUNS` times in total, and their
+# verdict is settled by the median time (see `judge_program()`). Being
+# stopped is decisive.
+REVERIFY_BAND: float = 0.05
+REVERIFY_RUNS: int = 3
+
 
 class TestCaseResult:
     def __init__(
@@ -63,7 +91,13 @@ class TestCaseResult:
             program_time: float = 0,
             program_tle: bool = False,
             program_memory: int = 0,
-            program_mle: bool = False
+            program_mle: bool = False,
+            program_noise: float = 0.0,
+            program_attempts: Sequence[Tuple[float, str]] = (),
+            program_difference: Optional[diff.DIFFERENCE_TYPE] = None,
+            judge_message: IO_TYPE = (),
+            program_profile: Optional[profiler.PROFILE_TYPE] = None,
+            program_allocations: Optional[profiler.ALLOCATIONS_TYPE] = None
     ):
         """
         A class to keep track of a test case result.
@@ -100,6 +134,33 @@ class TestCaseResult:
         :param bool program_mle:
             Whether the program exceeded the memory limit: `True` if it
             did, otherwise `False`.
+
+        :param float program_noise:
+            The estimated timing noise of the run: the fraction (from 0
+            to 1) of the program's cores which were busy with other
+            processes (see `isolation.Isolation.background_load()`).
+
+        :param Sequence[Tuple[float, str]] program_attempts:
+            The time (in milliseconds) and verdict of every run of the
+            program if the test case was re-verified, otherwise empty.
+
+        :param Optional[diff.DIFFERENCE_TYPE] program_difference:
+            The first difference between the program's output and the
+            reference output on a wrong answer (see `diff`); the outputs
+            are then not kept (`exercise_output` and `program_stdout`
+            are empty).
+
+        :param IO_TYPE judge_message:
+            The explanation of the verdict given by the interactor of
+            an interactive exercise (see `interactive`).
+
+        :param Optional[profiler.PROFILE_TYPE] program_profile:
+            Where the program spent its time when it exceeded the time
+            limit, if it was profiled (see `profiler`).
+
+        :param Optional[profiler.ALLOCATIONS_TYPE] program_allocations:
+            What used the program's memory when it exceeded the memory
+            limit, if it was profiled (see `profiler`).
         """
 
         self.exercise_input: IO_TYPE = exercise_input
@@ -111,6 +172,12 @@ class TestCaseResult:
         self.program_tle: bool = program_tle
         self.program_memory: int = program_memory
         self.program_mle: bool = program_mle
+        self.program_noise: float = program_noise
+        self.program_attempts: List[Tuple[float, str]] = list(program_attempts)
+        self.program_difference: Optional[diff.DIFFERENCE_TYPE] = program_difference
+        self.judge_message: IO_TYPE = list(judge_message)
+        self.program_profile: Optional[profiler.PROFILE_TYPE] = program_profile
+        self.program_allocations: Optional[profiler.ALLOCATIONS_TYPE] = program_allocations
 
         self.verdict: str = verdict
         self.passed: bool = self.verdict == ANSWER_CORRECT
@@ -119,6 +186,30 @@ class TestCaseResult:
         # belongs in a set of test cases.
         self.testcase_no: int = 0
 
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "TestCaseResult":
+        """
+        Get a test case result from a dictionary made by `to_dict()`.
+        """
+
+        tc = cls(
+            d["exercise_input"], d["exercise_output"],
+            d["program_stdout"], d["program_stderr"], d["program_exitcode"]
+        )
+        vars(tc).update(d)
+        return tc
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get this test case result as a dictionary of JSON serializable
+        values (ex: to send it to another process).
+        """
+
+        d = dict(vars(self))
+        for name in ("exercise_input", "exercise_output", "program_stdout", "program_stderr"):
+            d[name] = list(d[name])
+        return d
+
 
 class JudgeResult:
     def __init__(self, test_results: Sequence[TestCaseResult] = ()) -> None:
@@ -134,6 +225,14 @@ class JudgeResult:
 
         self.verdict: str = ANSWER_CORRECT
 
+        # The number of test cases which were not judged, as the judging
+        # stopped at the first failed one (see `judge_program()`).
+        self.skipped: int = 0
+
+        # The estimated growth of the program's usage, if the test cases
+        # have sizes (see `analyze_complexity()`).
+        self.complexity: Optional[sjcomplexity.COMPLEXITY_TYPE] = None
+
         self.testcases: List[TestCaseResult] = []
         for tc in test_results:
             self.add_result(tc)
@@ -164,6 +263,21 @@ class JudgeResult:
         if self.verdict == ANSWER_CORRECT and tc.verdict != ANSWER_CORRECT:
             self.verdict = tc.verdict
 
+    def analyze_complexity(self, sizes: Sequence[float], required: Optional[str] = None) -> None:
+        """
+        Estimate the growth of the time and memory used by the program
+        from the results of the test cases, the test case `i` having the
+        size `sizes[i]` (see `complexity`). If the time grows faster
+        than the growth class `required`, the verdict of an otherwise
+        correct program becomes `COMPLEXITY_EXCEEDED`.
+        """
+
+        self.complexity = sjcomplexity.analyze(sizes, self.testcases, required)
+
+        if required is not None and sjcomplexity.exceeds(self.complexity["time"], required):
+            if self.verdict == ANSWER_CORRECT:
+                self.verdict = COMPLEXITY_EXCEEDED
+
 
 def judge_program(
         program_command: str,
@@ -172,6 +286,20 @@ def judge_program(
         memory_limit: int = 256,
         judge: ANY_JUDGE = "default",
         progress_hook: Callable[[TestCaseResult], None] = lambda tc: None,
+        time_limits: Optional[Sequence[float]] = None,
+        executor: Optional["concurrent.futures.Executor"] = None,
+        sandboxes: Optional["sandbox.SandboxPool"] = None,
+        isolation: Optional["sjisolation.Isolation"] = None,
+        reverify_band: float = REVERIFY_BAND,
+        reverify_runs: int = REVERIFY_RUNS,
+        interactor: Optional[str] = None,
+        profile: bool = False,
+        sizes: Optional[Sequence[float]] = None,
+        complexity: Optional[str] = None,
+        journal: Optional["sjjournal.Journal"] = None,
+        order: Optional[Sequence[int]] = None,
+        fail_fast: bool = False,
+        dispatch: Optional[Sequence[int]] = None,
         **kwargs
 ) -> JudgeResult:
     """
@@ -200,6 +328,75 @@ def judge_program(
         completes. This function should accept an argument of
         `TestCaseResult`, the result of the test case.
 
+    :param Optional[Sequence[float]] time_limits:
+        The time limit (in seconds) of each test case; overrides
+        `time_limit` if given. See `calibrate.time_limits()`.
+
+    :param Optional[concurrent.futures.Executor] executor:
+        If given, the test cases are judged in parallel by this
+        executor (ex: a `ThreadPoolExecutor`); the results are still
+        reported in order.
+
+    :param Optional[sandbox.SandboxPool] sandboxes:
+        If given, each test case is run in a sandbox from this pool
+        (which should hold as many sandboxes as the executor has
+        workers).
+
+    :param Optional[isolation.Isolation] isolation:
+        If given, the test cases are run on the reserved cores of these
+        settings (see `isolation`).
+
+    :param float reverify_band:
+        The fraction of the time limit around it in which a result is
+        deemed borderline. Programs are stopped at the time limit raised
+        by this fraction; a program which finished in the band is run
+        again and its verdict is settled by the run with the median
+        time. Set to 0 to disable.
+
+    :param int reverify_runs:
+        The number of runs (including the first one) of a borderline
+        test case; re-verification stops early if a run exceeds the
+        raised time limit.
+
+    :param Optional[str] interactor:
+        The command to run the interactor of an interactive exercise
+        (see `interactive`).
+
+    :param bool profile:
+        Whether to run the test cases which exceeded their time or
+        memory limit again under a profiler (for Python programs only;
+        see `profiler`) to report where the program spent its time or
+        what used its memory.
+
+    :param Optional[Sequence[float]] sizes:
+        The size of each test case (ex: the number of inputs); if
+        given, the growth of the program's time and memory is estimated
+        (see `JudgeResult.analyze_complexity()`).
+
+    :param Optional[str] complexity:
+        The growth class (see `complexity.CLASSES`) which the time of
+        the program must not exceed; only checked if `sizes` is given.
+
+    :param Optional[journal.Journal] journal:
+        If given, each test case is added to this journal once judged,
+        and the test cases already in it are not judged again (see
+        `journal`).
+
+    :param Optional[Sequence[int]] order:
+        The numbers of the test cases in the order in which to judge
+        (and report) them; defaults to the order of `testcases`. The
+        test cases of the result are in the order of `testcases`.
+
+    :param bool fail_fast:
+        Whether to stop at the first test case which is not correct;
+        the result then only holds the test cases judged up to that
+        one (see `JudgeResult.skipped`).
+
+    :param Optional[Sequence[int]] dispatch:
+        The numbers of all the test cases in the order in which to
+        start them if they are judged by `executor` (ex: the longest
+        first, see `schedule`); they are still reported in order.
+
     :param dict kwargs:
         These keyword arguments will be ignored.
 
@@ -208,19 +405,97 @@ def judge_program(
     """
 
     result_tracker = JudgeResult()
+    exercise_name = kwargs.get("exercise", "")
+    started = time.monotonic()
+
+    def judge_case(test_number: int, testcase: TESTCASE_TYPE,
+                   queued: Optional[float] = None) -> TestCaseResult:
+        if queued is not None and metrics.REGISTRY is not None:
+            metrics.REGISTRY.queue_wait.observe(time.monotonic() - queued, "testcase")
+
+        if journal is not None:
+            journaled = journal.get(test_number, testcase)
+            if journaled is not None:
+                return journaled
+
+        case_time_limit = time_limit if time_limits is None else time_limits[test_number]
+
+        def attempt(
+                limit: float,
+                command: str = program_command,
+                memory: int = memory_limit
+        ) -> TestCaseResult:
+            return judge_one(
+                command,
+                testcase[0],
+                testcase[1],
+                limit,
+                memory,
+                judge,
+                sandboxes=sandboxes,
+                isolation=isolation,
+                interactor=interactor,
+            )
+
+        tc = attempt(case_time_limit * (1.0 + max(reverify_band, 0.0)))
+        if _borderline(tc, case_time_limit, reverify_band):
+            tc = _reverify(tc, attempt, case_time_limit, reverify_band, reverify_runs)
+        else:
+            _enforce_time_limit(tc, case_time_limit)
+        if profile and tc.verdict in (TIME_LIMIT_EXCEEDED, MEM_LIMIT_EXCEEDED):
+            _profile(tc, program_command, attempt, case_time_limit, memory_limit)
 
-    for test_number, (test_input, test_output) in enumerate(testcases):
-        result_tracker += judge_one(
-            program_command,
-            test_input,
-            test_output,
-            time_limit,
-            memory_limit,
-            judge,
-        )
+        if journal is not None:
+            journal.record(test_number, tc)
+        return tc
 
-        result_tracker[-1].testcase_no = test_number
-        progress_hook(result_tracker[-1])
+    if order is None:
+        numbered: Iterable[Tuple[int, TESTCASE_TYPE]] = enumerate(testcases)
+    else:
+        numbered = ((test_number, testcases[test_number]) for test_number in order)
+
+    test_numbers = range(len(testcases)) if order is None else order
+
+    if executor is None:
+        results = itertools.starmap(judge_case, numbered)
+    else:
+        if dispatch is not None:
+            numbered = ((test_number, testcases[test_number]) for test_number in dispatch)
+
+        futures = {
+            test_number: executor.submit(judge_case, test_number, testcase, time.monotonic())
+            for test_number, testcase in numbered
+        }
+        results = (futures[test_number].result() for test_number in test_numbers)
+
+    try:
+        for test_number, tc in zip(test_numbers, results):
+            result_tracker += tc
+
+            result_tracker[-1].testcase_no = test_number
+            progress_hook(result_tracker[-1])
+
+            if metrics.REGISTRY is not None:
+                metrics.REGISTRY.testcases.inc(exercise_name, tc.verdict)
+                metrics.REGISTRY.program_time.observe(tc.program_time, exercise_name)
+
+            if fail_fast and not tc.passed:
+                result_tracker.skipped = len(testcases) - result_tracker.total
+                break
+    finally:
+        if executor is not None:
+            for future in futures.values():
+                future.cancel()
+
+    if order is not None:
+        result_tracker.testcases.sort(key=lambda tc: tc.testcase_no)
+
+    if sizes is not None and not result_tracker.skipped:
+        result_tracker.analyze_complexity(sizes, complexity)
+
+    if metrics.REGISTRY is not None:
+        metrics.REGISTRY.programs.inc(exercise_name, result_tracker.verdict)
+        metrics.REGISTRY.judging_time.observe(time.monotonic() - started, exercise_name)
 
     return result_tracker
 
@@ -231,7 +506,11 @@ def judge_one(
         test_output: IO_TYPE,
         time_limit: float = 1.0,
         memory_limit: int = 256,
-        judge: ANY_JUDGE = "default"
+        judge: ANY_JUDGE = "default",
+        cache_inputs: bool = True,
+        sandboxes: Optional["sandbox.SandboxPool"] = None,
+        isolation: Optional["sjisolation.Isolation"] = None,
+        interactor: Optional[str] = None
 ) -> TestCaseResult:
     """
     Judge a program on a single test case.
@@ -240,10 +519,12 @@ def judge_one(
         The command to run the program.
 
     :param IO_TYPE test_input:
-        The input to test the program with.
+        The input to test the program with; a `pack.PackedIO` input is
+        streamed to the program as it is decompressed.
 
     :param IO_TYPE test_output:
-        The reference output to `test_input`.
+        The reference output to `test_input`; a `pack.PackedIO` output
+        is only decompressed if the program's output needs judging.
 
     :param float time_limit:
         The time limit for the test case (in seconds).
@@ -255,35 +536,112 @@ def judge_one(
         Can be one of two possibilities: a judging function of type
         `JUDGE_TYPE`, or the name of a build-in judging function.
 
+    :param bool cache_inputs:
+        Whether to pass the input to the program from the shared input
+        cache (see `inputs.open_input()`) instead of writing it out
+        for this run only.
+
+    :param Optional[sandbox.SandboxPool] sandboxes:
+        If given, the program is run in a sandbox from this pool (see
+        `sandbox`), which prevents it from using the network.
+
+    :param Optional[isolation.Isolation] isolation:
+        If given, the program is run on the reserved cores of these
+        settings (see `isolation`).
+
+    :param Optional[str] interactor:
+        If given, the program talks with this interactor (see
+        `interactive`) instead of reading `test_input`; the interactor
+        is given the input and the reference output, and judges the
+        program in place of `judge`.
+
     :return TestCaseResult:
         ...
     """
 
-    process_return = run.run(
-        shlex.split(program_command),
-        stdin_string=_encode_io(test_input),
-        time_limit=time_limit,
-        memory_limit=MEBIBYTE * memory_limit,
-    )
+    import inputs
+    import run
+
+    context = contextlib.nullcontext() if sandboxes is None else sandboxes.sandbox()
+
+    interactor_return = None
+
+    with context as box:
+        if interactor is not None:
+            with _interactor_files(test_input, test_output) as paths:
+                process_return, interactor_return = run.run_interactive(
+                    shlex.split(program_command),
+                    shlex.split(interactor) + paths,
+                    time_limit=time_limit,
+                    memory_limit=MEBIBYTE * memory_limit,
+                    sandbox=box,
+                    isolation=isolation,
+                )
+
+        elif isinstance(test_input, pack.PackedIO):
+            with test_input.open() as stdin_stream:
+                process_return = run.run(
+                    shlex.split(program_command),
+                    stdin_string=stdin_stream,
+                    time_limit=time_limit,
+                    memory_limit=MEBIBYTE * memory_limit,
+                    sandbox=box,
+                    isolation=isolation,
+                )
+        else:
+            try:
+                stdin_file = inputs.open_input(test_input) if cache_inputs else None
+            except OSError:
+                stdin_file = None
+
+            try:
+                process_return = run.run(
+                    shlex.split(program_command),
+                    stdin_string=_encode_io(test_input) if stdin_file is None else None,
+                    time_limit=time_limit,
+                    memory_limit=MEBIBYTE * memory_limit,
+                    stdin_file=stdin_file,
+                    sandbox=box,
+                    isolation=isolation,
+                )
+            finally:
+                if stdin_file is not None:
+                    os.close(stdin_file)
 
     process_output = _decode_io(process_return.stdout)
     process_errors = _decode_io(process_return.stderr)
     process_exitcode = process_return.returncode
+    difference = None
+    judge_message: IO_TYPE = []
 
     if process_return.time_exceeded:
         judge_verdict = TIME_LIMIT_EXCEEDED
     elif process_return.memory_exceeded:
         judge_verdict = MEM_LIMIT_EXCEEDED
+    elif interactor_return is not None:
+        judge_verdict = _interactor_verdict(process_exitcode, interactor_return.returncode)
+        judge_message = _decode_io(interactor_return.stderr)
     elif process_exitcode:
         judge_verdict = RUNTIME_ERROR
     else:
         if isinstance(judge, str):
+            if judge not in JUDGES:
+                raise AssertionError(f"the judge `{judge}` does not exist")
             judge = JUDGES[judge]
 
-        if judge(process_output, test_output):
+        compare_lines = getattr(judge, "compare_lines", None)
+        if compare_lines is not None:
+            difference = diff.first_difference(process_output, test_output, compare_lines)
+            judge_verdict = ANSWER_CORRECT if difference is None else WRONG_ANSWER
+        elif judge(process_output, test_output):
             judge_verdict = ANSWER_CORRECT
         else:
             judge_verdict = WRONG_ANSWER
+            difference = diff.first_difference(process_output, test_output)
+
+        # Only the window around the difference is kept, not the outputs.
+        if difference is not None:
+            process_output, test_output = [], []
 
     return TestCaseResult(
         test_input, test_output,
@@ -293,9 +651,124 @@ def judge_one(
         program_tle=process_return.time_exceeded,
         program_memory=process_return.memory_usage,
         program_mle=process_return.memory_exceeded,
+        program_noise=process_return.background_load,
+        program_difference=difference,
+        judge_message=judge_message,
     )
 
 
+@contextlib.contextmanager
+def _interactor_files(test_input: IO_TYPE, test_output: IO_TYPE) -> Iterator[List[str]]:
+    """
+    Get the paths of files containing `test_input` and `test_output`
+    for an interactor, from the shared input cache if possible, else
+    written out for this run only.
+    """
+
+    import inputs
+
+    try:
+        paths = [inputs.materialize(test_input), inputs.materialize(test_output)]
+    except OSError:
+        paths = None
+
+    if paths is not None:
+        yield paths
+        return
+
+    with tempfile.TemporaryDirectory(prefix="sjudge-") as directory:
+        paths = [os.path.join(directory, "input"), os.path.join(directory, "output")]
+        for path, given_io in zip(paths, (test_input, test_output)):
+            try:
+                data = inputs.encode(given_io)
+            except OSError as err:
+                raise AssertionError(f"the test case could not be read ({err})") from err
+            with open(path, "wb") as fd:
+                fd.write(data)
+        yield paths
+
+
+def _interactor_verdict(program_exitcode: int, interactor_exitcode: int) -> str:
+    import interactive
+
+    # The interactor's verdict comes first: a program which it rejected
+    # usually fails afterwards on the closed pipe.
+    if interactor_exitcode == interactive.INTERACTOR_WRONG_ANSWER:
+        return WRONG_ANSWER
+    elif interactor_exitcode == interactive.INTERACTOR_PROTOCOL_VIOLATION:
+        return PROTOCOL_VIOLATION
+    elif interactor_exitcode != interactive.INTERACTOR_ACCEPTED:
+        raise AssertionError(f"the interactor failed with exit code {interactor_exitcode}")
+
+    return RUNTIME_ERROR if program_exitcode else ANSWER_CORRECT
+
+
+def _borderline(tc: TestCaseResult, time_limit: float, band: float) -> bool:
+    # `tc` was run with the raised limit: a program which was stopped is
+    # over the band, so only the programs which finished are borderline.
+    if band <= 0 or tc.verdict != ANSWER_CORRECT:
+        return False
+    return tc.program_time >= MILLISECOND * time_limit * (1.0 - band)
+
+
+def _enforce_time_limit(tc: TestCaseResult, time_limit: float) -> None:
+    # Judge a run with a raised limit against the real one.
+    if tc.program_time > MILLISECOND * time_limit and not tc.program_mle:
+        tc.verdict = TIME_LIMIT_EXCEEDED
+        tc.program_tle = True
+        tc.passed = False
+
+
+def _reverify(
+        tc: TestCaseResult,
+        attempt: Callable[[float], TestCaseResult],
+        time_limit: float,
+        band: float,
+        runs: int
+) -> TestCaseResult:
+    raised_limit = time_limit * (1.0 + band)
+
+    attempts = [tc]
+    while len(attempts) < runs and not attempts[-1].program_tle:
+        attempts.append(attempt(raised_limit))
+
+    for a in attempts:
+        _enforce_time_limit(a, time_limit)
+
+    settled = sorted(attempts, key=lambda a: a.program_time)[len(attempts) // 2]
+    settled.program_attempts = [(a.program_time, a.verdict) for a in attempts]
+    return settled
+
+
+def _profile(
+        tc: TestCaseResult,
+        program_command: str,
+        attempt: Callable[[float, str, int], TestCaseResult],
+        time_limit: float,
+        memory_limit: int
+) -> None:
+    fd, report_path = tempfile.mkstemp(prefix="sjudge-profile-", suffix=".json")
+    os.close(fd)
+
+    try:
+        if tc.verdict == TIME_LIMIT_EXCEEDED:
+            command = profiler.profiled_command(program_command, report_path, time_limit)
+            if command is not None:
+                attempt(time_limit + profiler.REPORT_GRACE, command, memory_limit)
+                tc.program_profile = profiler.read_report(report_path)
+        else:
+            command = profiler.traced_command(program_command, report_path, MEBIBYTE * memory_limit)
+            if command is not None:
+                attempt(
+                    time_limit * profiler.TRACE_TIME_FACTOR,
+                    command,
+                    int(memory_limit * profiler.TRACE_MEMORY_FACTOR)
+                )
+                tc.program_allocations = profiler.read_allocations(report_path)
+    finally:
+        os.remove(report_path)
+
+
 def _encode_io(given_io: IO_TYPE) -> str:
     return "".join(f"{input_line}\n" for input_line in given_io)
 
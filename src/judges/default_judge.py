@@ -4,11 +4,27 @@ whitespace at the starts and ends of the program's output lines before
 checking if it identical to the reference output.
 """
 
-from typing import Sequence
+from typing import Optional, Sequence
+
+import diff
 
 STRIP_VALUES: str = "".join([' ', '\t'])
 
 
+def compare_lines(program_line: str, expected_line: str) -> Optional[int]:
+    """
+    Compare a line of the program's output with the line of the
+    reference output (see `diff.LINE_COMPARISON_TYPE`).
+    """
+
+    program_line = program_line.strip(STRIP_VALUES)
+    expected_line = expected_line.strip(STRIP_VALUES)
+
+    if program_line == expected_line:
+        return None
+    return diff.differing_token(program_line, expected_line)
+
+
 def default_judge(program_output: Sequence[str], expected_output: Sequence[str]) -> bool:
     """
     Judge a program's output based on the 'default' judge.
@@ -21,5 +37,9 @@ def default_judge(program_output: Sequence[str], expected_output: Sequence[str])
     if len(program_output) != len(expected_output):
         return False
 
-    return all(s.strip(STRIP_VALUES) == expected_output[i].strip(STRIP_VALUES)
-               for i, s in enumerate(program_output))
+    return diff.first_difference(program_output, expected_output, compare_lines) is None
+
+
+# The judging of an output also locates its first difference (see
+# `judge.judge_one()`).
+default_judge.compare_lines = compare_lines
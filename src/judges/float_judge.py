@@ -5,7 +5,33 @@ the program's output to be exactly the reference output; it checks if
 it is numerically close enough to the reference output.
 """
 
-from typing import Sequence
+import functools
+
+from typing import Optional, Sequence
+
+import diff
+
+
+def compare_lines(program_line: str, expected_line: str, precision: int = 8) -> Optional[int]:
+    """
+    Compare a line of the program's output with the line of the
+    reference output (see `diff.LINE_COMPARISON_TYPE`); the numbers are
+    compared up to `precision` decimals (see `float_judge()`).
+    """
+
+    program_line = program_line.split()
+    expected_line = expected_line.split()
+
+    for i, (number, expected_number) in enumerate(zip(program_line, expected_line)):
+        try:
+            if round(float(number), precision) != round(float(expected_number), precision):
+                return i
+        except ValueError:
+            return i
+
+    if len(program_line) != len(expected_line):
+        return min(len(program_line), len(expected_line))
+    return None
 
 
 def float_judge(program_output: Sequence[str], expected_output: Sequence[str], precision: int = 8
@@ -25,19 +51,10 @@ def float_judge(program_output: Sequence[str], expected_output: Sequence[str], p
     if len(program_output) != len(expected_output):
         return False
 
-    try:
-        for line_i, program_line in enumerate(program_output):
-            program_line = program_line.split()
-            expected_line = expected_output[line_i].split()
+    compare = functools.partial(compare_lines, precision=precision)
+    return diff.first_difference(program_output, expected_output, compare) is None
 
-            if len(program_line) != len(expected_line):
-                return False
-
-            for i, number in enumerate(program_line):
-                number = round(float(number), precision)
-                if round(float(expected_line[i]), precision) != number:
-                    return False
-    except ValueError:
-        return False
 
-    return True
+# The judging of an output also locates its first difference (see
+# `judge.judge_one()`).
+float_judge.compare_lines = compare_lines
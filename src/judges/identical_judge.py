@@ -3,7 +3,20 @@ This module contains the 'identical' judge. This judge directly checks
 if the program's output is identical to the reference answer.
 """
 
-from typing import Sequence
+from typing import Optional, Sequence
+
+import diff
+
+
+def compare_lines(program_line: str, expected_line: str) -> Optional[int]:
+    """
+    Compare a line of the program's output with the line of the
+    reference output (see `diff.LINE_COMPARISON_TYPE`).
+    """
+
+    if program_line == expected_line:
+        return None
+    return diff.differing_token(program_line, expected_line)
 
 
 def identical_judge(program_output: Sequence[str], expected_output: Sequence[str]) -> bool:
@@ -18,4 +31,9 @@ def identical_judge(program_output: Sequence[str], expected_output: Sequence[str
     if len(program_output) != len(expected_output):
         return False
 
-    return all(s == expected_output[i] for i, s in enumerate(program_output))
+    return diff.first_difference(program_output, expected_output, compare_lines) is None
+
+
+# The judging of an output also locates its first difference (see
+# `judge.judge_one()`).
+identical_judge.compare_lines = compare_lines
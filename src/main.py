@@ -3,12 +3,11 @@ import os
 import sys
 import traceback
 
-import command
 import display
 import exercise
-import judge
 
 DEFAULT_EXERCISES = "exercises/"
+DEFAULT_SOLUTIONS = "solutions/"
 
 
 def main():
@@ -28,10 +27,53 @@ def main():
     parser.add_argument(
         "-e", "--exercises_location", action="store", default=DEFAULT_EXERCISES,
         help="set the base directory of the exercises.", dest="exercises_location")
+    parser.add_argument(
+        "-r", "--solutions_location", action="store", default=DEFAULT_SOLUTIONS,
+        help="set the base directory of the reference solutions.", dest="solutions_location")
     parser.add_argument(
         "-m", "--manual_command", action="store_true",
         help="enable this flag if you are entering the full command to run your program under "
              "`program_path` (instead of just the file name).", dest="manual_command")
+    parser.add_argument(
+        "-w", "--workers", action="store", default=None,
+        help="judge on the given worker nodes (a comma separated list of `host:port`) instead "
+             "of this computer.", dest="workers")
+    parser.add_argument(
+        "-i", "--isolate", action="store_true",
+        help="run the program in a sandbox without network access.", dest="isolate")
+    parser.add_argument(
+        "-c", "--cores", action="store", default=0, type=int,
+        help="reserve this many cores for the program (and run the judge on the others) to "
+             "reduce timing noise.", dest="cores")
+    parser.add_argument(
+        "-p", "--priority", action="store", default=None, type=int,
+        help="set the niceness of the program (ex: -10 raises its priority; this usually "
+             "requires extra privileges).", dest="priority")
+    parser.add_argument(
+        "-P", "--profile", action="store_true",
+        help="run the test cases which exceed the time or memory limit again under a profiler "
+             "to show where the program spends its time or memory (Python programs only).",
+        dest="profile")
+    parser.add_argument(
+        "-R", "--results", action="store", default=None,
+        help="record the result in this results database to follow the history of the "
+             "programs (see `results.py`).", dest="results")
+    parser.add_argument(
+        "-M", "--metrics", action="store", default=None,
+        help="write the metrics of the judging to this file in the Prometheus text format.",
+        dest="metrics")
+    parser.add_argument(
+        "-j", "--jobs", action="store", default=0, type=int,
+        help="set the number of test cases to judge at once, the longest first (defaults to "
+             "the number of reserved cores, or one).", dest="jobs")
+    parser.add_argument(
+        "-u", "--resume", action="store_true",
+        help="resume an interrupted judging of the same program on the same exercise: the "
+             "test cases it completed are not judged again.", dest="resume")
+    parser.add_argument(
+        "-W", "--watch", action="store_true",
+        help="judge the program again every time its file is saved, starting with the test "
+             "cases which failed and stopping at the first failure.", dest="watch")
     arguments = parser.parse_args()
 
     if arguments.list_exercises:
@@ -57,6 +99,25 @@ def main():
         missing_value = "exercise_name" if arguments.exercise_name is None else "program_path"
         raise AssertionError(f"the argument `{missing_value}` is missing")
 
+    # These are only imported once a program is judged, so that listing
+    # and describing the exercises start quickly.
+    import concurrent.futures
+
+    import calibrate
+    import command
+    import distributed
+    import interactive
+    import journal
+    import judge
+    import metrics
+    import progress
+    import results
+    import sandbox
+    import schedule
+
+    if arguments.metrics:
+        metrics.dump_at_exit(arguments.metrics)
+
     program_command = arguments.program_path
     if not arguments.manual_command:
         if not os.path.isfile(arguments.program_path):
@@ -65,14 +126,184 @@ def main():
 
     specifications = exercise.get_specs(arguments.exercises_location, arguments.exercise_name)
 
+    calibrate.calibrate_specs(specifications, arguments.solutions_location)
+    interactive.prepare_specs(specifications, arguments.solutions_location)
+
     display.d_exercise_specs(**specifications)
-    result = judge.judge_program(
-        program_command,
-        **specifications,
-        progress_hook=display.d_progress_hook
-    )
+
+    if arguments.watch:
+        if arguments.manual_command or arguments.workers:
+            raise AssertionError("only a program file judged on this computer can be watched")
+
+        _watch(arguments, program_command, specifications)
+        return
+
+    renderer = progress.ProgressRenderer(len(specifications["testcases"]))
+
+    if arguments.workers:
+        if arguments.manual_command:
+            raise AssertionError("manual commands can not be used with worker nodes")
+
+        # These only apply to the test cases judged on this computer.
+        local_options = {
+            "--isolate": arguments.isolate, "--cores": arguments.cores,
+            "--jobs": arguments.jobs, "--profile": arguments.profile,
+            "--resume": arguments.resume,
+        }
+        for option, given in local_options.items():
+            if given:
+                raise AssertionError(f"`{option}` can not be used with worker nodes")
+
+        result = distributed.judge_distributed(
+            [distributed.parse_address(a) for a in arguments.workers.split(",")],
+            arguments.program_path,
+            **specifications,
+            progress_hook=renderer
+        )
+    else:
+        run_isolation = _reserve(arguments)
+
+        # The completed test cases are journaled so that the judging can
+        # be resumed with `--resume` if it is interrupted.
+        journal_path = journal.default_path(arguments.exercise_name, arguments.program_path)
+        program_hash = results.submission_hash(arguments.program_path)
+        exercise_hash = journal.exercise_hash(
+            os.path.join(arguments.exercises_location, f"{arguments.exercise_name}.json"),
+            specifications
+        )
+
+        if not arguments.resume:
+            completed = journal.resumable(journal_path, program_hash, exercise_hash)
+            if completed:
+                display.display(f"Note: starting over an interrupted judging of this program "
+                                f"(judged test cases: {completed}); use `--resume` to continue "
+                                f"it instead.", flush=True)
+
+        program_journal = journal.Journal(
+            journal_path, program_hash, exercise_hash, resume=arguments.resume
+        )
+
+        # The test cases are only judged in parallel if asked, as the
+        # programs would compete for the CPUs and the memory. They are
+        # then started the longest first (from the timings of the
+        # previous judgings, see `schedule`) so that they do not make up
+        # the tail of the judging.
+        history = schedule.TimingHistory.for_exercise(arguments.exercise_name)
+        workers = arguments.jobs or arguments.cores or 1
+        sandboxes = sandbox.SandboxPool(workers) if arguments.isolate else None
+        executor, dispatch = None, None
+        if workers > 1:
+            executor = concurrent.futures.ThreadPoolExecutor(workers)
+            dispatch = schedule.longest_first(
+                len(specifications["testcases"]), history, specifications
+            )
+        try:
+            try:
+                result = judge.judge_program(
+                    program_command,
+                    **specifications,
+                    progress_hook=renderer,
+                    executor=executor,
+                    sandboxes=sandboxes,
+                    isolation=run_isolation,
+                    profile=arguments.profile,
+                    journal=program_journal,
+                    dispatch=dispatch
+                )
+            finally:
+                # The test cases already started are finished (and
+                # journaled) before the journal is closed.
+                if executor is not None:
+                    executor.shutdown(wait=True)
+                if sandboxes is not None:
+                    sandboxes.close()
+        except BaseException:
+            program_journal.close()
+            raise
+        else:
+            program_journal.remove()
+
+        history.update(result)
+        history.save()
+
+    renderer.close()
     display.d_judging_summary(result)
 
+    if arguments.results:
+        with results.ResultStore(arguments.results) as store:
+            store.record(result, arguments.exercise_name,
+                         results.submission_hash(arguments.program_path),
+                         host=arguments.workers)
+
+
+def _reserve(arguments):
+    import isolation
+
+    if arguments.priority is not None and not arguments.cores:
+        raise AssertionError("a priority can only be set along with `--cores`")
+
+    run_isolation = None
+    if arguments.cores:
+        run_isolation = isolation.reserve(arguments.cores, arguments.priority)
+        run_isolation.pin_supervisor()
+    return run_isolation
+
+
+def _watch(arguments, program_command, specifications):
+    import concurrent.futures
+    import threading
+
+    import judge
+    import progress
+    import sandbox
+    import schedule
+    import watch
+
+    run_isolation = _reserve(arguments)
+    history = schedule.TimingHistory.for_exercise(arguments.exercise_name)
+
+    # The test cases are only judged in parallel if asked (see `main()`).
+    workers = arguments.jobs or arguments.cores or 1
+    total = len(specifications["testcases"])
+
+    # Each judging has its own executor (and sandboxes): the test cases
+    # still running when a judging stops at a failure would otherwise
+    # hold up the next one. They are left to finish in the background.
+    def retire(executor, sandboxes):
+        executor.shutdown(wait=True)
+        if sandboxes is not None:
+            sandboxes.close()
+
+    def judge_once(order):
+        executor = concurrent.futures.ThreadPoolExecutor(workers)
+        sandboxes = sandbox.SandboxPool(workers) if arguments.isolate else None
+        renderer = progress.ProgressRenderer(total)
+        try:
+            result = judge.judge_program(
+                program_command,
+                **specifications,
+                progress_hook=renderer,
+                executor=executor,
+                sandboxes=sandboxes,
+                isolation=run_isolation,
+                profile=arguments.profile,
+                order=order,
+                fail_fast=True
+            )
+        finally:
+            threading.Thread(target=retire, args=(executor, sandboxes), daemon=True).start()
+        renderer.close()
+        display.d_judging_summary(result)
+
+        history.update(result)
+        history.save()
+        return result
+
+    def usual_order():
+        return schedule.likely_failures_first(total, history, specifications)
+
+    watch.watch(arguments.program_path, total, judge_once, usual_order)
+
 
 if __name__ == "__main__":
     try:
@@ -80,7 +311,7 @@ if __name__ == "__main__":
     except AssertionError as err:
         print(f"error: {err.args[0]}.")
     except KeyboardInterrupt:
-        print("stopping judging due to user interrupt.")
+        print("stopping judging due to user interrupt (use `--resume` to continue).")
     except SystemExit as err:
         sys.exit(*err.args)
     except Exception as err:
@@ -0,0 +1,348 @@
+"""
+This module collects metrics of the judge (ex: the test cases judged per
+verdict, the time used by the programs, the time spent waiting to be
+judged) and exposes them in the Prometheus text format, on a local HTTP
+endpoint (see `serve()`) or in a file written at exit (see
+`dump_at_exit()`).
+
+The collection is off until `enable()` is called: the instrumented code
+first checks whether `REGISTRY` is set, so the judge pays a single
+global lookup per test case when it is off.
+"""
+
+import atexit
+import bisect
+import collections
+import math
+import os
+import threading
+
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+import protocol
+
+# The default port of the HTTP endpoint.
+METRICS_PORT: int = 9464
+
+# The quantiles given by summaries.
+SUMMARY_QUANTILES: Sequence[float] = (0.5, 0.99)
+
+# Summaries compute their quantiles over this many of their latest
+# observations (for each set of labels).
+SUMMARY_WINDOW: int = 1024
+
+# The upper bounds (in milliseconds) of the buckets of the histogram of
+# the time used by the programs.
+PROGRAM_TIME_BUCKETS: Sequence[float] = (
+    1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000
+)
+
+# The content type of the Prometheus text format.
+CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Counter:
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()) -> None:
+        """
+        A metric counting events (ex: test cases) for each set of
+        values of its labels.
+        """
+
+        self.name: str = name
+        self.description: str = description
+        self.labels: Sequence[str] = labels
+
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """
+        Count `amount` events with the label values `label_values`
+        (given in the order of the labels).
+        """
+
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def get(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return "\n".join(lines)
+
+
+class Summary:
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()) -> None:
+        """
+        A metric summarizing observed values (ex: durations) for each
+        set of values of its labels: their count, their sum and the
+        `SUMMARY_QUANTILES` of the latest `SUMMARY_WINDOW` of them.
+        """
+
+        self.name: str = name
+        self.description: str = description
+        self.labels: Sequence[str] = labels
+
+        self._windows: Dict[Tuple[str, ...], Deque[float]] = {}
+        self._totals: Dict[Tuple[str, ...], Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """
+        Add the value `value` with the label values `label_values`.
+        """
+
+        with self._lock:
+            window = self._windows.get(label_values)
+            if window is None:
+                window = self._windows[label_values] = collections.deque(maxlen=SUMMARY_WINDOW)
+            window.append(value)
+
+            count, total = self._totals.get(label_values, (0, 0.0))
+            self._totals[label_values] = (count + 1, total + value)
+
+    def quantile(self, q: float, *label_values: str) -> Optional[float]:
+        """
+        Get the quantile `q` (from 0 to 1) of the latest values with the
+        label values `label_values`, or `None` if there are none.
+        """
+
+        with self._lock:
+            values = sorted(self._windows.get(label_values, ()))
+        if not values:
+            return None
+        return values[min(int(q * len(values)), len(values) - 1)]
+
+    def count(self, *label_values: str) -> int:
+        return self._totals.get(label_values, (0, 0.0))[0]
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} summary"]
+        with self._lock:
+            label_sets = sorted(self._totals)
+
+        for label_values in label_sets:
+            for q in SUMMARY_QUANTILES:
+                labels = _labels(tuple(self.labels) + ("quantile",), label_values + (str(q),))
+                lines.append(f"{self.name}{labels} {_number(self.quantile(q, *label_values))}")
+
+            count, total = self._totals[label_values]
+            labels = _labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return "\n".join(lines)
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, buckets: Sequence[float],
+                 labels: Sequence[str] = ()) -> None:
+        """
+        A metric counting observed values (ex: durations) in buckets for
+        each set of values of its labels. Unlike the quantiles of a
+        summary, the buckets of several judges can be added together.
+
+        :param Sequence[float] buckets:
+            The upper bounds of the buckets (a last bucket holds every
+            value).
+        """
+
+        self.name: str = name
+        self.description: str = description
+        self.buckets: Sequence[float] = tuple(sorted(buckets))
+        self.labels: Sequence[str] = labels
+
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._totals: Dict[Tuple[str, ...], Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """
+        Add the value `value` with the label values `label_values`.
+        """
+
+        # The bucket of a value is the first one whose bound is at least
+        # the value.
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(label_values)
+            if counts is None:
+                counts = self._counts[label_values] = [0] * (len(self.buckets) + 1)
+            counts[bucket] += 1
+
+            count, total = self._totals.get(label_values, (0, 0.0))
+            self._totals[label_values] = (count + 1, total + value)
+
+    def count(self, *label_values: str) -> int:
+        return self._totals.get(label_values, (0, 0.0))[0]
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            label_sets = sorted(self._counts)
+            counts = {label_values: list(self._counts[label_values]) for label_values in label_sets}
+            totals = dict(self._totals)
+
+        bounds = tuple(self.buckets) + (float("inf"),)
+        for label_values in label_sets:
+            # The count of each bucket includes the values of the
+            # previous ones.
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts[label_values]):
+                cumulative += bucket_count
+                labels = _labels(tuple(self.labels) + ("le",), label_values + (_number(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+            count, total = totals[label_values]
+            labels = _labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return "\n".join(lines)
+
+
+class Registry:
+    def __init__(self) -> None:
+        """
+        The metrics collected by the judge.
+        """
+
+        self.testcases = Counter(
+            "sjudge_testcases_total",
+            "The test cases judged, by exercise and verdict.",
+            ("exercise", "verdict"))
+        self.program_time = Histogram(
+            "sjudge_program_time_milliseconds",
+            "The time used by the programs on each test case, by exercise.",
+            PROGRAM_TIME_BUCKETS, ("exercise",))
+        self.programs = Counter(
+            "sjudge_programs_total",
+            "The programs judged, by exercise and verdict.",
+            ("exercise", "verdict"))
+        self.judging_time = Summary(
+            "sjudge_judging_seconds",
+            "The real time taken to judge a program on all the test cases, by exercise.",
+            ("exercise",))
+        self.queue_wait = Summary(
+            "sjudge_queue_wait_seconds",
+            "The time waited before being judged, by queue (`testcase` for the test cases "
+            "waiting for a worker, `submission` for the queued submissions).",
+            ("queue",))
+        self.supervisor_overhead = Summary(
+            "sjudge_supervisor_overhead_seconds",
+            "The real time taken by each run of a program outside of the program itself "
+            "(starting it, collecting its output).")
+
+    def expose(self) -> str:
+        """
+        Get the metrics in the Prometheus text format.
+        """
+
+        metrics = (self.testcases, self.program_time, self.programs, self.judging_time,
+                   self.queue_wait, self.supervisor_overhead)
+        return "\n".join(metric.expose() for metric in metrics) + "\n"
+
+
+# The metrics being collected, or `None` if the collection is off.
+REGISTRY: Optional[Registry] = None
+
+
+def enable() -> Registry:
+    """
+    Turn on the collection of metrics (if it is not already on) and get
+    the collected metrics.
+    """
+
+    global REGISTRY
+
+    if REGISTRY is None:
+        REGISTRY = Registry()
+    return REGISTRY
+
+
+def disable() -> None:
+    """
+    Turn off the collection of metrics and forget the collected ones.
+    """
+
+    global REGISTRY
+
+    REGISTRY = None
+
+
+def write(path: str) -> None:
+    """
+    Write the collected metrics to the file `path` (ex: for the textfile
+    collector of the Prometheus node exporter).
+    """
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as fp:
+        fp.write(enable().expose())
+    os.replace(temporary_path, path)
+
+
+def dump_at_exit(path: str) -> None:
+    """
+    Turn on the collection of metrics and write them to the file `path`
+    when the interpreter exits.
+    """
+
+    enable()
+    atexit.register(write, path)
+
+
+def serve(address: str) -> "http.server.HTTPServer":
+    """
+    Turn on the collection of metrics and serve them over HTTP on the
+    address `address` ("host:port" or "host"; only use a local host)
+    from a background thread.
+
+    :return http.server.HTTPServer:
+        The server; call `shutdown()` on it to stop it.
+    """
+
+    import http.server
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            body = enable().expose().encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    enable()
+
+    server = http.server.ThreadingHTTPServer(
+        protocol.parse_address(address, METRICS_PORT), MetricsHandler
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+
+    pairs = (f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: Optional[float]) -> str:
+    if value is None or math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
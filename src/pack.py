@@ -0,0 +1,325 @@
+"""
+This module manages compressed exercise packs. Instead of storing the
+test cases inside the exercise specifications, a packed exercise stores
+each input and reference output as a separately compressed member of a
+".pack" file next to the specifications, which only keep an index of
+the members:
+
+    {..., "testcases": {"pack": "name.pack", "compression": "gzip",
+                        "index": [[in_offset, in_size, out_offset, out_size], ...]}}
+
+Inputs are read and decompressed in chunks as they are passed to the
+program (see `PackedIO.open()`) and the reference outputs are only
+decompressed when they are first needed.
+"""
+
+import argparse
+import collections.abc
+import gzip
+import io
+import json
+import os
+import zlib
+
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# The extension of the file containing the compressed test cases.
+PACK_EXTENSION: str = ".pack"
+
+# The supported compression algorithms.
+GZIP: str = "gzip"
+ZSTD: str = "zstd"
+COMPRESSIONS: List[str] = [GZIP, ZSTD]
+
+# The number of bytes of a compressed member read at a time.
+_READ_SIZE: int = 64 * 1024
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == GZIP:
+        return gzip.compress(data)
+    return _zstandard().ZstdCompressor().compress(data)
+
+
+def _zstandard():
+    if zstandard is None:
+        raise AssertionError("zstd compression requires the `zstandard` package")
+    return zstandard
+
+
+class _MemberReader(io.RawIOBase):
+    def __init__(self, pack_path: str, compression: str, offset: int, size: int) -> None:
+        # A stream of the decompressed bytes of the member of `size`
+        # bytes at `offset` in the pack file, which is read in chunks of
+        # `_READ_SIZE` bytes as the stream is read.
+        self._fd = open(pack_path, "rb")
+        self._fd.seek(offset)
+        self._remaining: int = size
+
+        self._gzip: bool = compression == GZIP
+        if self._gzip:
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        else:
+            self._decompressor = _zstandard().ZstdDecompressor().decompressobj()
+
+        self._pending: bytes = b""
+        self._position: int = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._position == len(self._pending):
+            self._pending, self._position = self._decompress(len(buffer)), 0
+
+        size = min(len(buffer), len(self._pending) - self._position)
+        buffer[:size] = self._pending[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._fd.close()
+        super().close()
+
+    def _decompress(self, limit: int) -> bytes:
+        # Get the next decompressed bytes (at most `limit` of them for
+        # gzip), or nothing at the end of the member.
+        while True:
+            data = self._decompressor.unconsumed_tail if self._gzip else b""
+            if not data:
+                if not self._remaining:
+                    return b""
+                data = self._fd.read(min(_READ_SIZE, self._remaining))
+                if not data:
+                    raise AssertionError("the pack file is truncated")
+                self._remaining -= len(data)
+
+            if self._gzip:
+                output = self._decompressor.decompress(data, limit)
+            else:
+                output = self._decompressor.decompress(data)
+            if output:
+                return output
+
+
+class PackedIO(collections.abc.Sequence):
+    def __init__(self, pack_path: str, compression: str, offset: int, size: int) -> None:
+        """
+        A class representing an input or reference output stored in a
+        pack. It behaves like a list of lines, but the lines are only
+        decompressed the first time they are accessed.
+
+        :param str pack_path:
+            The path to the pack file.
+
+        :param str compression:
+            The compression algorithm of the pack.
+
+        :param int offset:
+            The position of the compressed member in the pack file.
+
+        :param int size:
+            The size of the compressed member.
+        """
+
+        self.pack_path: str = pack_path
+        self.compression: str = compression
+        self.offset: int = offset
+        self.size: int = size
+
+        self._lines: Optional[List[str]] = None
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, collections.abc.Sequence) and not isinstance(other, str):
+            return self.lines() == list(other)
+        return NotImplemented
+
+    def __getitem__(self, item):
+        return self.lines()[item]
+
+    def __len__(self) -> int:
+        return len(self.lines())
+
+    def __repr__(self) -> str:
+        return f"PackedIO({self.pack_path!r}, offset={self.offset})"
+
+    def lines(self) -> List[str]:
+        """
+        Get the (decompressed) lines of this input or output.
+        """
+
+        if self._lines is None:
+            with self.open() as fd:
+                text = str(fd.read(), encoding="utf-8")
+            self._lines = text[:-1].split("\n") if text else []
+
+        return self._lines
+
+    def open(self) -> BinaryIO:
+        """
+        Get a stream of the decompressed bytes; each line is terminated
+        by a newline, as it is to be passed to a program.
+        """
+
+        member = _MemberReader(self.pack_path, self.compression, self.offset, self.size)
+        return io.BufferedReader(member, _READ_SIZE)
+
+
+class PackedTestcases(collections.abc.Sequence):
+    def __init__(self, path: str, testcases_spec: Dict[str, Any]) -> None:
+        """
+        A class representing the test cases of a packed exercise as a
+        sequence of (input, reference output) tuples of `PackedIO`.
+
+        :param str path:
+            The directory of the exercise.
+
+        :param Dict[str, Any] testcases_spec:
+            The "testcases" value of the exercise specifications.
+        """
+
+        self.pack_path: str = os.path.join(path, testcases_spec["pack"])
+        self.compression: str = testcases_spec["compression"]
+        self.index: List[List[int]] = testcases_spec["index"]
+
+        if self.compression not in COMPRESSIONS:
+            raise AssertionError(f"the compression `{self.compression}` is not supported")
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+
+        in_offset, in_size, out_offset, out_size = self.index[item]
+        return (
+            PackedIO(self.pack_path, self.compression, in_offset, in_size),
+            PackedIO(self.pack_path, self.compression, out_offset, out_size),
+        )
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+class PackWriter:
+    def __init__(self, path: str, specifications: Dict[str, Any], compression: str = GZIP) -> None:
+        """
+        A class to write a packed exercise one test case at a time; it
+        has the same interface as `exercise.ExerciseWriter`.
+
+        :param str path:
+            The path of the exercise specifications file; the pack file
+            is written next to it.
+
+        :param Dict[str, Any] specifications:
+            The specifications of the exercise; the "testcases" value
+            is ignored.
+
+        :param str compression:
+            The compression algorithm to use.
+        """
+
+        if compression not in COMPRESSIONS:
+            raise AssertionError(f"the compression `{compression}` is not supported")
+        if compression == ZSTD:
+            _zstandard()
+
+        self.path: str = path
+        self.pack_path: str = os.path.splitext(path)[0] + PACK_EXTENSION
+        self.compression: str = compression
+        self.testcases: int = 0
+        self.trailer: Dict[str, Any] = {}
+
+        self._specifications = {k: v for k, v in specifications.items() if k != "testcases"}
+        self._index: List[Tuple[int, int, int, int]] = []
+
+        self._temp_path: str = f"{self.pack_path}.{os.getpid()}.tmp"
+        self._fd = open(self._temp_path, "wb")
+
+    def __enter__(self) -> "PackWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, testcase: Sequence[Sequence[str]]) -> None:
+        """
+        Append the test case `testcase` (an input and output pair) to
+        the exercise.
+        """
+
+        entry: List[int] = []
+        for lines in testcase:
+            data = "".join(f"{line}\n" for line in lines).encode("utf-8")
+            member = _compress(data, self.compression)
+
+            entry += [self._fd.tell(), len(member)]
+            self._fd.write(member)
+
+        self._index.append(tuple(entry))
+        self.testcases += 1
+
+    def close(self) -> None:
+        """
+        Finish writing the exercise and move it to its final location.
+        """
+
+        self._fd.close()
+        os.replace(self._temp_path, self.pack_path)
+
+        self._specifications["testcases"] = {
+            "pack": os.path.basename(self.pack_path),
+            "compression": self.compression,
+            "index": self._index,
+        }
+        self._specifications.update(self.trailer)
+
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as fd:
+            json.dump(self._specifications, fd)
+        os.replace(temp_path, self.path)
+
+    def abort(self) -> None:
+        """
+        Discard everything written so far.
+        """
+
+        self._fd.close()
+        os.remove(self._temp_path)
+
+
+def main() -> None:
+    import exercise
+
+    parser = argparse.ArgumentParser(description="Compress the test cases of an exercise.")
+    parser.add_argument(
+        "exercise_name", action="store", type=str,
+        help="the name of the exercise to compress.")
+    parser.add_argument(
+        "-e", "--exercises_location", action="store", default="exercises/",
+        help="set the base directory of the exercises.", dest="exercises_location")
+    parser.add_argument(
+        "-c", "--compression", action="store", default=GZIP, choices=COMPRESSIONS,
+        help="set the compression algorithm.", dest="compression")
+    arguments = parser.parse_args()
+
+    specifications = exercise.get_specs(arguments.exercises_location, arguments.exercise_name)
+    spec_path = os.path.join(arguments.exercises_location, f"{arguments.exercise_name}.json")
+
+    with PackWriter(spec_path, specifications, arguments.compression) as writer:
+        for testcase in specifications["testcases"]:
+            writer.write(testcase)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except AssertionError as err:
+        print(f"error: {err.args[0]}.")
@@ -0,0 +1,121 @@
+"""
+This module contains a registry of plugins (ex: judges) which are only
+imported when they are first used, so that commands which do not need
+them (ex: listing the exercises) start quickly.
+
+A plugin is given by a path of the form "module:attribute", or by an
+entry point of the registry's group in an installed package, ex:
+
+    [project.entry-points."sjudge.judges"]
+    tolerant = "my_package.judges:tolerant_judge"
+"""
+
+import collections.abc
+import importlib
+import threading
+
+from typing import Any, Dict, Iterator, Optional
+
+
+def load(path: str) -> Any:
+    """
+    Import the object at `path` ("module:attribute").
+    """
+
+    module_name, _, attribute = path.partition(":")
+    obj = importlib.import_module(module_name)
+    for name in filter(None, attribute.split(".")):
+        obj = getattr(obj, name)
+    return obj
+
+
+class Registry(collections.abc.Mapping):
+    def __init__(self, group: str, builtins: Dict[str, str]) -> None:
+        """
+        A mapping of names to plugins which imports each plugin on first
+        access.
+
+        :param str group:
+            The entry point group of the plugins of installed packages.
+
+        :param Dict[str, str] builtins:
+            The paths ("module:attribute") of the built-in plugins.
+        """
+
+        self.group: str = group
+
+        self._paths: Dict[str, Any] = dict(builtins)
+        self._loaded: Dict[str, Any] = {}
+        self._entry_points: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def register(self, name: str, plugin: Any) -> None:
+        """
+        Add a plugin: either the object itself or its path.
+        """
+
+        with self._lock:
+            self._loaded.pop(name, None)
+            if isinstance(plugin, str):
+                self._paths[name] = plugin
+            else:
+                self._loaded[name] = plugin
+
+    def __getitem__(self, name: str) -> Any:
+        with self._lock:
+            if name in self._loaded:
+                return self._loaded[name]
+
+        if name in self._paths:
+            plugin = load(self._paths[name])
+        elif name in self._discover():
+            plugin = self._discover()[name].load()
+        else:
+            raise KeyError(name)
+
+        with self._lock:
+            return self._loaded.setdefault(name, plugin)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._loaded or name in self._paths or name in self._discover()
+
+    def __iter__(self) -> Iterator[str]:
+        names = dict.fromkeys(self._paths)
+        names.update(dict.fromkeys(self._loaded))
+        names.update(dict.fromkeys(self._discover()))
+        return iter(names)
+
+    def __len__(self) -> int:
+        return len(list(iter(self)))
+
+    def _discover(self) -> Dict[str, Any]:
+        # Looking up the entry points is slow, so it is only done if a
+        # plugin is not built in.
+        if self._entry_points is None:
+            metadata = _metadata()
+            if metadata is None:
+                self._entry_points = {}
+                return self._entry_points
+
+            entry_points = metadata.entry_points()
+            if hasattr(entry_points, "select"):
+                entry_points = entry_points.select(group=self.group)
+            else:
+                entry_points = entry_points.get(self.group, ())
+
+            self._entry_points = {ep.name: ep for ep in entry_points}
+
+        return self._entry_points
+
+
+def _metadata():
+    # `importlib.metadata` was added in Python 3.8; the `importlib_metadata`
+    # backport (see `requirements.txt`) provides it on Python 3.7.
+    try:
+        import importlib.metadata as metadata
+    except ImportError:
+        try:
+            import importlib_metadata as metadata
+        except ImportError:
+            return None
+    return metadata
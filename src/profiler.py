@@ -0,0 +1,182 @@
+"""
+This module profiles Python programs which exceeded a limit, so that
+students can see where their program is slow or uses too much memory:
+the test case is run again under a bootstrap (see `boot/`) which
+reports either the functions and lines in which the program spent its
+time, or the lines which allocated its memory.
+"""
+
+import json
+import os
+import shlex
+import signal
+
+from typing import Any, Dict, List, Optional
+
+# The directory of the bootstraps.
+BOOTSTRAPS: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "boot")
+
+# The bootstrap running a program under the sampling profiler.
+BOOTSTRAP: str = os.path.join(BOOTSTRAPS, "sampling.py")
+
+# The bootstrap running a program with `tracemalloc`.
+ALLOCATIONS_BOOTSTRAP: str = os.path.join(BOOTSTRAPS, "allocations.py")
+
+# The time (in seconds of CPU time) between samples of the program.
+SAMPLE_INTERVAL: float = 0.001
+
+# The number of functions, lines and allocation sites kept in a report.
+PROFILE_TOP: int = 5
+
+# The profiled run stops itself after the time limit; the judge only
+# stops it this long (in seconds) afterwards, giving it time to write
+# its report.
+REPORT_GRACE: float = 0.5
+
+# A profile is represented by a dictionary (so that it can be sent as
+# JSON) with the following keys:
+#   - "samples": the number of samples taken,
+#   - "stopped": whether the program was stopped at the time limit,
+#   - "functions": the hottest functions, as [name, file, first line,
+#     number of samples in which they were running],
+#   - "lines": the hottest lines, as [file, line number, number of
+#     samples, source code of the line].
+PROFILE_TYPE = Dict[str, Any]
+
+# The traced run stops itself at the memory limit, but it is slower,
+# and `tracemalloc` needs several times the memory of many small objects
+# for its records and its report, so the judge raises its limits by
+# these factors.
+TRACE_TIME_FACTOR: float = 4.0
+TRACE_MEMORY_FACTOR: float = 8.0
+
+# The allocations of a program are represented by a dictionary (so that
+# they can be sent as JSON) with the following keys:
+#   - "size"/"peak": the memory (in bytes) used by the objects of the
+#     program when it was stopped and at its peak,
+#   - "line": the line on which the program reached the memory limit,
+#     as [file, line number, source code of the line],
+#   - "sites": the lines which allocated the most memory that is still
+#     in use, as [file, line number, size (in bytes), number of
+#     objects, source code of the line].
+ALLOCATIONS_TYPE = Dict[str, Any]
+
+
+def profiled_command(program_command: str, report_path: str, time_limit: float) -> Optional[str]:
+    """
+    Get the command to run the Python program of `program_command` under
+    the sampling profiler for at most `time_limit` seconds, writing its
+    profile to `report_path`.
+
+    :return Optional[str]:
+        The command, or `None` if the program can not be profiled (it
+        is not a Python file or the system has no interval timers).
+    """
+
+    if not hasattr(signal, "setitimer"):
+        return None
+
+    return _bootstrap_command(
+        program_command, [BOOTSTRAP, report_path, str(time_limit), str(SAMPLE_INTERVAL)]
+    )
+
+
+def traced_command(
+        program_command: str,
+        report_path: str,
+        memory_limit: int,
+        top: int = PROFILE_TOP
+) -> Optional[str]:
+    """
+    Get the command to run the Python program of `program_command` with
+    `tracemalloc` until it uses `memory_limit` bytes, then write its
+    `top` largest allocation sites to `report_path`.
+
+    :return Optional[str]:
+        The command, or `None` if the program can not be traced (it is
+        not a Python file or the system can not limit its memory).
+    """
+
+    # The bootstrap limits the memory of the program with `resource`,
+    # which is only available on POSIX systems.
+    if os.name != "posix":
+        return None
+
+    return _bootstrap_command(
+        program_command, [ALLOCATIONS_BOOTSTRAP, report_path, str(memory_limit), str(top)]
+    )
+
+
+def read_report(report_path: str, top: int = PROFILE_TOP) -> Optional[PROFILE_TYPE]:
+    """
+    Read the profile written by the sampling profiler to `report_path`,
+    keeping the `top` hottest functions and lines.
+
+    :return Optional[PROFILE_TYPE]:
+        The profile, or `None` if there is none (ex: the program was
+        stopped by the judge before writing it) or it holds no samples.
+    """
+
+    try:
+        with open(report_path) as fp:
+            report = json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+    if not report.get("samples"):
+        return None
+
+    # The report lists the entries by decreasing number of samples; the
+    # files are shown by name only.
+    report["functions"] = [
+        [name, os.path.basename(filename), line, count]
+        for name, filename, line, count in report["functions"][:top]
+    ]
+    report["lines"] = [
+        [os.path.basename(filename), line, count, source]
+        for filename, line, count, source in report["lines"][:top]
+    ]
+    return report
+
+
+def read_allocations(report_path: str) -> Optional[ALLOCATIONS_TYPE]:
+    """
+    Read the allocations written by the traced run to `report_path`.
+
+    :return Optional[ALLOCATIONS_TYPE]:
+        The allocations, or `None` if there are none (ex: the program
+        did not reach the memory limit this time).
+    """
+
+    try:
+        with open(report_path) as fp:
+            report = json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+    filename, line, source = report["line"]
+    report["line"] = [os.path.basename(filename), line, source]
+    report["sites"] = [
+        [os.path.basename(filename), line, size, count, source]
+        for filename, line, size, count, source in report["sites"]
+    ]
+    return report
+
+
+def _bootstrap_command(program_command: str, bootstrap_args: List[str]) -> Optional[str]:
+    args = shlex.split(program_command)
+    if not args or not os.path.basename(args[0]).startswith("python"):
+        return None
+
+    # The bootstrap is inserted between the interpreter's options and
+    # the program's file.
+    for i, arg in enumerate(args[1:], 1):
+        if arg in ("-c", "-m") or not arg.startswith("-"):
+            break
+    else:
+        return None
+
+    if arg in ("-c", "-m"):
+        return None
+
+    return " ".join(shlex.quote(a) for a in args[:i] + bootstrap_args + args[i:])
@@ -0,0 +1,140 @@
+"""
+This module contains a progress renderer for judging many test cases
+(see `ProgressRenderer`). Instead of a line per test case, it shows the
+details of the failed test cases only, along with a status line of the
+counts per verdict which is refreshed at a fixed rate, so the cost of
+displaying the progress does not grow with the number of test cases.
+"""
+
+import collections
+import sys
+import time
+
+from typing import Optional, TextIO
+
+import display
+import judge as sjudge
+
+# The time (in seconds) between refreshes of the status line on a
+# terminal.
+REFRESH_INTERVAL: float = 0.1
+
+# The time (in seconds) between status lines when the output is not a
+# terminal (ex: a log file).
+BATCH_INTERVAL: float = 2.0
+
+# Every test case is displayed (as by `display.d_progress_hook()`) if
+# there are at most this many of them.
+DETAIL_LIMIT: int = 20
+
+
+class ProgressRenderer:
+    def __init__(
+            self,
+            total: int,
+            stream: Optional[TextIO] = None,
+            interval: Optional[float] = None,
+            detail_limit: int = DETAIL_LIMIT
+    ) -> None:
+        """
+        A progress hook (see `judge.judge_program()`) displaying the
+        progress of the judging of `total` test cases; call `close()`
+        once the judging is done.
+
+        :param int total:
+            The number of test cases.
+
+        :param Optional[TextIO] stream:
+            The stream to write to (the status line and the test
+            cases displayed); defaults to standard output. The status
+            line is redrawn in place if it is a terminal, otherwise a
+            new status line is written at every refresh.
+
+        :param Optional[float] interval:
+            The time (in seconds) between refreshes; defaults to
+            `REFRESH_INTERVAL` on a terminal, else `BATCH_INTERVAL`.
+
+        :param int detail_limit:
+            Every test case is displayed in detail if there are at most
+            this many, otherwise only the failed ones are.
+        """
+
+        self.total: int = total
+        self.stream: TextIO = sys.stdout if stream is None else stream
+        self.tty: bool = self.stream.isatty()
+        self.interval: float = interval or (REFRESH_INTERVAL if self.tty else BATCH_INTERVAL)
+        self.detailed: bool = total <= detail_limit
+
+        self.done: int = 0
+        self.counts: "collections.Counter[str]" = collections.Counter()
+
+        self._start: float = time.monotonic()
+        self._last_render: float = self._start
+        self._status_length: int = 0
+        self._rendered: int = 0
+
+    def __call__(self, tc: sjudge.TestCaseResult) -> None:
+        self.done += 1
+        self.counts[tc.verdict] += 1
+
+        if self.detailed or tc.verdict != sjudge.ANSWER_CORRECT:
+            self._clear()
+            display.d_progress_hook(tc, self.stream)
+
+        if self.detailed:
+            return
+
+        now = time.monotonic()
+        if now - self._last_render >= self.interval:
+            self._render(now)
+
+    def close(self) -> None:
+        """
+        Display the final status line (if the status line is shown).
+        """
+
+        if not self.detailed and self._rendered != self.done:
+            self._render(time.monotonic())
+        if self.tty and self._status_length:
+            self._write("\n")
+            self._status_length = 0
+
+    def status(self, now: Optional[float] = None) -> str:
+        """
+        Get the status line: the number of judged test cases, the counts
+        per verdict and the judging rate.
+        """
+
+        elapsed = (time.monotonic() if now is None else now) - self._start
+        counts = ", ".join(f"{verdict}: {count}" for verdict, count in self.counts.items())
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+
+        return f"Judged {self.done}/{self.total}  [{counts}]  ({rate:.0f} cases/s)"
+
+    def _render(self, now: float) -> None:
+        status = self.status(now)
+
+        if self.tty:
+            # Pad with spaces to erase the end of a longer previous line.
+            padding = " " * max(self._status_length - len(status), 0)
+            self._write(f"\r{status}{padding}")
+            self._status_length = len(status)
+        else:
+            self._write(f"{status}\n")
+
+        self._last_render = now
+        self._rendered = self.done
+
+    def _clear(self) -> None:
+        if self.tty and self._status_length:
+            self._write("\r" + " " * self._status_length + "\r")
+            self._status_length = 0
+
+    def _write(self, s: str) -> None:
+        try:
+            self.stream.write(s)
+        except UnicodeEncodeError:
+            for old, new in display.SIMPLE_CHARACTERS.items():
+                s = s.replace(old, new)
+            self.stream.write(s)
+        self.stream.flush()
@@ -0,0 +1,89 @@
+"""
+This module contains the message format shared by the network services
+of `sjudge` (see `distributed` and `daemon`): JSON objects, one per
+line. It only depends on the standard library so that thin clients
+start quickly.
+"""
+
+import json
+import os
+import socket
+import tempfile
+
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+# A network address: a host name and a port.
+ADDRESS_TYPE = Tuple[str, int]
+
+# A message sent between a client and a server.
+MESSAGE_TYPE = Dict[str, Any]
+
+# The default port and address of the judge server (see `daemon`); a
+# Unix socket is used where they are supported.
+DAEMON_PORT: int = 8738
+DAEMON_ADDRESS: str = (
+    os.path.join(tempfile.gettempdir(), "sjudge.sock") if hasattr(socket, "AF_UNIX")
+    else f"127.0.0.1:{DAEMON_PORT}"
+)
+
+
+def parse_address(s: str, default_port: int) -> ADDRESS_TYPE:
+    """
+    Get the address represented by `s` ("host:port" or "host").
+    """
+
+    host, _, port = s.rpartition(":")
+    if not host:
+        return port, default_port
+
+    try:
+        return host, int(port)
+    except ValueError:
+        raise AssertionError(f"the address `{s}` is invalid")
+
+
+def connect(address: str, default_port: int) -> socket.socket:
+    """
+    Connect to the server at `address`: the path of a Unix socket, or
+    "host:port" for a TCP socket.
+    """
+
+    if is_unix_address(address):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(address)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    return socket.create_connection(parse_address(address, default_port))
+
+
+def is_unix_address(address: str) -> bool:
+    """
+    Determine whether `address` is the path of a Unix socket.
+    """
+
+    return hasattr(socket, "AF_UNIX") and ":" not in address
+
+
+def receive_message(fd: BinaryIO) -> Optional[MESSAGE_TYPE]:
+    """
+    Read a message from `fd`; returns `None` if the connection was
+    closed.
+    """
+
+    line = fd.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def send_message(fd: BinaryIO, message: MESSAGE_TYPE) -> None:
+    """
+    Write the message `message` to `fd`.
+    """
+
+    fd.write(json.dumps(message).encode("utf-8") + b"\n")
+    fd.flush()
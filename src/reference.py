@@ -0,0 +1,168 @@
+"""
+This module fills in the reference outputs of an exercise by running a
+reference solution on the inputs of each of its test cases. The
+reference solution can be written in any language that `command`
+supports, and the test cases are run in parallel.
+"""
+
+import argparse
+import functools
+import multiprocessing
+import os
+
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import command
+import exercise
+import judge as sjudge
+import pack
+
+# The reference solution is given this many times the limits of the
+# exercise; the limits are only there to catch a broken reference.
+REFERENCE_LEEWAY: float = 10.0
+
+# The name of the specification in which the time (in seconds) and
+# memory (in bytes) used by the reference solution on each test case
+# is recorded.
+USAGE_SPEC: str = "reference_usage"
+
+# The number of test cases sent to a worker process at a time.
+_CHUNK_SIZE: int = 4
+
+# The result of running the reference solution on a test case: its
+# output, the time it took and the memory it used.
+_REFERENCE_RESULT = Tuple[sjudge.IO_TYPE, float, int]
+
+
+def fill_outputs(
+        path: str,
+        ex_name: str,
+        reference_command: str,
+        processes: Optional[int] = None
+) -> None:
+    """
+    Replace the reference output of every test case of the exercise
+    `ex_name` located in the directory `path` with the output of the
+    reference solution. The time and memory used by the reference
+    solution are recorded under `USAGE_SPEC`.
+
+    :param str path:
+        The directory of the exercise.
+
+    :param str ex_name:
+        The name of the exercise.
+
+    :param str reference_command:
+        The command to run the reference solution.
+
+    :param Optional[int] processes:
+        The number of test cases to run at once; defaults to the number
+        of CPUs.
+    """
+
+    # The test cases are streamed from the exercise, so that they are
+    # never all held in memory.
+    specifications = exercise.stream_specs(path, ex_name)
+    testcases: Iterable[sjudge.TESTCASE_TYPE] = specifications["testcases"]
+
+    run_reference = functools.partial(
+        _run_reference,
+        reference_command,
+        REFERENCE_LEEWAY * specifications["time_limit"],
+        int(REFERENCE_LEEWAY * specifications["memory_limit"]),
+    )
+    inputs = (test_input for test_input, _ in testcases)
+    usage: List[Tuple[float, int]] = []
+
+    compression = None
+    if isinstance(testcases, pack.PackedTestcases):
+        compression = testcases.compression
+
+    # The usage of a previous reference solution is replaced by the one
+    # written after the test cases.
+    header = {k: v for k, v in specifications.items() if k != USAGE_SPEC}
+
+    spec_path = os.path.join(path, f"{ex_name}.json")
+    with exercise.get_writer(spec_path, header, compression) as writer:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.imap(run_reference, inputs, _CHUNK_SIZE)
+            for (test_input, _), result in zip(testcases, results):
+                test_output, time_usage, memory_usage = result
+                writer.write((test_input, test_output))
+                usage.append((time_usage, memory_usage))
+
+        writer.trailer[USAGE_SPEC] = usage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Fill in the reference outputs of an exercise.")
+    parser.add_argument(
+        "exercise_name", action="store", type=str,
+        help="the name of the exercise to fill in the outputs of.")
+    parser.add_argument(
+        "reference_path", action="store", nargs="?", type=str,
+        help="the path to the reference solution; defaults to the exercise's reference.")
+    parser.add_argument(
+        "-e", "--exercises_location", action="store", default="exercises/",
+        help="set the base directory of the exercises.", dest="exercises_location")
+    parser.add_argument(
+        "-r", "--solutions_location", action="store", default="solutions/",
+        help="set the base directory of the reference solutions.", dest="solutions_location")
+    parser.add_argument(
+        "-p", "--processes", action="store", default=None, type=int,
+        help="set the number of test cases to run at once.", dest="processes")
+    arguments = parser.parse_args()
+
+    reference_path = arguments.reference_path
+    if reference_path is None:
+        specifications = exercise.get_specs(
+            arguments.exercises_location, arguments.exercise_name
+        )
+        if "reference" not in specifications:
+            raise AssertionError(
+                f"the exercise `{arguments.exercise_name}` does not name a reference solution"
+            )
+        reference_path = os.path.join(
+            arguments.solutions_location, specifications["reference"]
+        )
+
+    if not os.path.isfile(reference_path):
+        raise AssertionError(f"the file `{reference_path}` does not exist")
+
+    fill_outputs(
+        arguments.exercises_location,
+        arguments.exercise_name,
+        command.get_command(reference_path),
+        arguments.processes
+    )
+
+
+def _accept(program_output: Sequence[str], expected_output: Sequence[str]) -> bool:
+    return True
+
+
+def _run_reference(
+        reference_command: str,
+        time_limit: float,
+        memory_limit: int,
+        test_input: sjudge.IO_TYPE
+) -> _REFERENCE_RESULT:
+    tc = sjudge.judge_one(
+        reference_command, test_input, [], time_limit, memory_limit, _accept
+    )
+
+    if not tc.passed:
+        raise AssertionError(
+            f"the reference solution failed on the input {test_input[:1]} "
+            f"({tc.verdict.lower()})"
+        )
+
+    return tc.program_stdout, tc.program_time / sjudge.MILLISECOND, tc.program_memory
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except AssertionError as err:
+        print(f"error: {err.args[0]}.")
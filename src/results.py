@@ -0,0 +1,388 @@
+"""
+This module keeps the history of judged programs in an SQLite database,
+to follow how the time used by each user's programs evolves, which
+exercises are the slowest and whether a grader got slower. Every result
+(see `judge.JudgeResult`) is stored with its test cases, keyed by the
+exercise, the hash of the judged program, the user, the host it was
+judged on and when it was judged.
+
+Results are written in batches (one transaction for up to `BATCH_SIZE`
+results), and the queries are answered from indexes on the exercise,
+the program hash, the user, the host and the time, so they stay fast
+over millions of results.
+"""
+
+import argparse
+import getpass
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import judge as sjudge
+
+# The most results written in one transaction.
+BATCH_SIZE: int = 100
+
+# The longest time (in seconds) a result waits to be written.
+FLUSH_INTERVAL: float = 5.0
+
+# The length (in seconds) of the periods in which the trend of a host
+# is averaged.
+TREND_PERIOD: float = 24 * 3600
+
+# The number of days of the trend of a host displayed by default.
+TREND_DAYS: float = 30
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    exercise TEXT NOT NULL,
+    submission TEXT NOT NULL,
+    user TEXT NOT NULL,
+    host TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    verdict TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    maximum_time REAL NOT NULL,
+    maximum_memory INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS testcases (
+    result INTEGER NOT NULL REFERENCES results (id),
+    testcase_no INTEGER NOT NULL,
+    verdict TEXT NOT NULL,
+    program_time REAL NOT NULL,
+    program_memory INTEGER NOT NULL,
+    program_noise REAL NOT NULL,
+    PRIMARY KEY (result, testcase_no)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS exercises (
+    exercise TEXT PRIMARY KEY,
+    results INTEGER NOT NULL,
+    total_time REAL NOT NULL,
+    maximum_time REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_exercise ON results (exercise, timestamp);
+CREATE INDEX IF NOT EXISTS results_submission ON results (submission);
+CREATE INDEX IF NOT EXISTS results_user ON results (user, exercise, timestamp);
+CREATE INDEX IF NOT EXISTS results_host ON results (host, exercise, timestamp);
+CREATE INDEX IF NOT EXISTS results_host_timestamp ON results (host, timestamp);
+CREATE INDEX IF NOT EXISTS results_timestamp ON results (timestamp);
+"""
+
+# A result waiting to be written: the values of its row in `results`
+# and the rows of its test cases (without the id of the result).
+_PENDING_TYPE = Tuple[Tuple[Any, ...], List[Tuple[Any, ...]]]
+
+
+def submission_hash(program: str) -> str:
+    """
+    Get the hash identifying the program `program`: the hash of its
+    content if it is a file, otherwise the hash of the command itself
+    (ex: a manual command).
+    """
+
+    digest = hashlib.sha256()
+    if os.path.isfile(program):
+        with open(program, "rb") as fd:
+            for chunk in iter(lambda: fd.read(64 * 1024), b""):
+                digest.update(chunk)
+    else:
+        digest.update(program.encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def default_user() -> str:
+    """
+    Get the user to record results under if none is given: the user
+    running the judge.
+    """
+
+    try:
+        return getpass.getuser()
+    except (ImportError, KeyError, OSError):
+        return "default"
+
+
+class ResultStore:
+    def __init__(self, path: str, batch_size: int = BATCH_SIZE) -> None:
+        """
+        A database of results; it can be shared between threads. The
+        results are written by `flush()` (which `record()` calls once
+        `batch_size` results are waiting or the oldest one has waited
+        `FLUSH_INTERVAL` seconds) and on `close()`.
+
+        :param str path:
+            The path of the SQLite database.
+
+        :param int batch_size:
+            The most results written in one transaction.
+        """
+
+        self.path: str = path
+        self.batch_size: int = batch_size
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending: List[_PENDING_TYPE] = []
+        self._oldest: float = 0.0
+
+        with self._connection() as db:
+            # The write-ahead log lets the history be queried while
+            # results are written.
+            db.execute("PRAGMA journal_mode = WAL")
+            db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections can not be shared between threads.
+        if not hasattr(self._local, "db"):
+            self._local.db = sqlite3.connect(self.path, timeout=30)
+            self._local.db.row_factory = sqlite3.Row
+        return self._local.db
+
+    def record(
+            self,
+            result: sjudge.JudgeResult,
+            ex_name: str,
+            submission: str,
+            user: Optional[str] = None,
+            host: Optional[str] = None,
+            timestamp: Optional[float] = None
+    ) -> None:
+        """
+        Add the result `result` of a program on the exercise `ex_name`
+        to the database.
+
+        :param str submission:
+            The hash of the program (see `submission_hash()`).
+
+        :param Optional[str] user:
+            The user who submitted the program; defaults to the user
+            running the judge.
+
+        :param Optional[str] host:
+            The host the program was judged on; defaults to this one.
+
+        :param Optional[float] timestamp:
+            When the program was judged; defaults to now.
+        """
+
+        row = (
+            ex_name, submission, user or default_user(), host or socket.gethostname(),
+            time.time() if timestamp is None else timestamp,
+            result.verdict, result.passed, result.total,
+            result.maximum_time, result.maximum_memory,
+        )
+        testcases = [
+            (tc.testcase_no, tc.verdict, tc.program_time, tc.program_memory, tc.program_noise)
+            for tc in result
+        ]
+
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append((row, testcases))
+
+            full = len(self._pending) >= self.batch_size
+            if not full and time.monotonic() - self._oldest < FLUSH_INTERVAL:
+                return
+
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the waiting results in one transaction.
+        """
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        with self._connection() as db:
+            for row, testcases in pending:
+                result_id = db.execute(
+                    "INSERT INTO results (exercise, submission, user, host, timestamp, verdict, "
+                    "passed, total, maximum_time, maximum_memory) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row
+                ).lastrowid
+                db.executemany(
+                    "INSERT INTO testcases (result, testcase_no, verdict, program_time, "
+                    "program_memory, program_noise) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(result_id,) + testcase for testcase in testcases]
+                )
+
+                # The totals of each exercise answer `slowest_exercises()`
+                # without going through all of its results.
+                # (An upsert would need SQLite 3.24 or newer.)
+                db.execute(
+                    "INSERT OR IGNORE INTO exercises (exercise, results, total_time, maximum_time) "
+                    "VALUES (?, 0, 0, 0)", (row[0],)
+                )
+                db.execute(
+                    "UPDATE exercises SET results = results + 1, total_time = total_time + ?, "
+                    "maximum_time = MAX(maximum_time, ?) WHERE exercise = ?",
+                    (row[8], row[8], row[0])
+                )
+
+    def close(self) -> None:
+        """
+        Write the waiting results and close the connection of this
+        thread.
+        """
+
+        self.flush()
+        if hasattr(self._local, "db"):
+            self._local.db.close()
+            del self._local.db
+
+    def user_history(self, user: str, ex_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the results of the user `user` (on the exercise `ex_name`
+        only, if given) from the oldest to the newest.
+        """
+
+        query = ("SELECT timestamp, exercise, submission, verdict, passed, total, maximum_time, "
+                 "maximum_memory FROM results WHERE user = ?")
+        parameters: List[Any] = [user]
+        if ex_name is not None:
+            query += " AND exercise = ?"
+            parameters.append(ex_name)
+
+        return self._rows(query + " ORDER BY timestamp", parameters)
+
+    def submission_history(self, submission: str) -> List[Dict[str, Any]]:
+        """
+        Get every result of the program with the hash `submission` (ex:
+        the same program judged on different hosts).
+        """
+
+        return self._rows(
+            "SELECT timestamp, exercise, user, host, verdict, passed, total, maximum_time, "
+            "maximum_memory FROM results WHERE submission = ? ORDER BY timestamp",
+            [submission]
+        )
+
+    def slowest_exercises(self, limit: int = 10,
+                          since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Get the `limit` exercises whose programs take the most time on
+        average (judged since the timestamp `since`, if given; only the
+        results since then are read, so it is meant for recent periods).
+        """
+
+        if since is None:
+            return self._rows(
+                "SELECT exercise, results, total_time / results AS average_time, maximum_time "
+                "FROM exercises ORDER BY average_time DESC LIMIT ?", [limit]
+            )
+
+        return self._rows(
+            "SELECT exercise, COUNT(*) AS results, AVG(maximum_time) AS average_time, "
+            "MAX(maximum_time) AS maximum_time FROM results INDEXED BY results_timestamp "
+            "WHERE timestamp >= ? "
+            "GROUP BY exercise ORDER BY average_time DESC LIMIT ?", [since, limit]
+        )
+
+    def host_trend(self, host: str, ex_name: Optional[str] = None,
+                   period: float = TREND_PERIOD,
+                   since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Get the average time of the programs judged on the host `host`
+        (on the exercise `ex_name` only, if given, as the times of
+        different exercises are not comparable) in each period of
+        `period` seconds, from the oldest to the newest.
+
+        Only the results judged since the timestamp `since` (if given)
+        are read, from a range of the index on the host and the time.
+        """
+
+        query = ("SELECT CAST(timestamp / ? AS INTEGER) * ? AS period, COUNT(*) AS results, "
+                 "AVG(maximum_time) AS average_time FROM results WHERE host = ?")
+        parameters: List[Any] = [period, period, host]
+        if ex_name is not None:
+            query += " AND exercise = ?"
+            parameters.append(ex_name)
+        if since is not None:
+            query += " AND timestamp >= ?"
+            parameters.append(since)
+
+        return self._rows(query + " GROUP BY period ORDER BY period", parameters)
+
+    def _rows(self, query: str, parameters: List[Any]) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self._connection().execute(query, parameters)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query the history of judged programs.")
+    parser.add_argument(
+        "database", action="store", type=str,
+        help="the path of the results database.")
+
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    user_parser = subparsers.add_parser("user", help="display the results of a user.")
+    user_parser.add_argument("user", action="store", type=str)
+    user_parser.add_argument("exercise_name", action="store", nargs="?", type=str)
+
+    submission_parser = subparsers.add_parser(
+        "submission", help="display the results of a program (by its hash).")
+    submission_parser.add_argument("submission", action="store", type=str)
+
+    slowest_parser = subparsers.add_parser("slowest", help="display the slowest exercises.")
+    slowest_parser.add_argument(
+        "-n", "--limit", action="store", default=10, type=int,
+        help="set the number of exercises to display.", dest="limit")
+    slowest_parser.add_argument(
+        "-d", "--days", action="store", default=None, type=float,
+        help="only count the results of the last few days.", dest="days")
+
+    host_parser = subparsers.add_parser("host", help="display the daily trend of a host.")
+    host_parser.add_argument("host", action="store", type=str)
+    host_parser.add_argument("exercise_name", action="store", nargs="?", type=str)
+    host_parser.add_argument(
+        "-d", "--days", action="store", default=TREND_DAYS, type=float,
+        help=f"set the number of days to display (default: {TREND_DAYS:g}).", dest="days")
+
+    arguments = parser.parse_args()
+
+    if not os.path.isfile(arguments.database):
+        raise AssertionError(f"the file `{arguments.database}` does not exist")
+
+    with ResultStore(arguments.database) as store:
+        if arguments.action == "user":
+            rows = store.user_history(arguments.user, arguments.exercise_name)
+        elif arguments.action == "submission":
+            rows = store.submission_history(arguments.submission)
+        elif arguments.action == "slowest":
+            since = None if arguments.days is None else time.time() - 24 * 3600 * arguments.days
+            rows = store.slowest_exercises(arguments.limit, since)
+        else:
+            since = time.time() - 24 * 3600 * arguments.days
+            rows = store.host_trend(arguments.host, arguments.exercise_name, since=since)
+
+    for row in rows:
+        if "timestamp" in row:
+            row["timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["timestamp"]))
+        if "period" in row:
+            row["period"] = time.strftime("%Y-%m-%d", time.localtime(row["period"]))
+        print("  ".join(f"{key}: {value}" for key, value in row.items()))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except AssertionError as err:
+        print(f"error: {err.args[0]}.")
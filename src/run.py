@@ -3,13 +3,20 @@ This module contains a wrapper around `subprocess.run()` that provides
 various extra features enabled by `psutil`.
 """
 
+import contextlib
+import os
 import subprocess
 import tempfile
+import threading
 import time
 
 import psutil
 
-from typing import List
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+import metrics
+from isolation import Isolation
+from sandbox import Sandbox
 
 # The actual time tracker uses CPU time instead of realtime, however,
 # if the test program happens to just become dormant without using CPU,
@@ -25,6 +32,32 @@ from typing import List
 # out because 1.11 - 0.1*1.11 == 0.999 and 0.999 < 1.0.
 _REALTIME_BUFFER: float = 0.1
 
+# The size (in bytes) of the chunks in which a stream passed as standard
+# input is written to the process.
+_STDIN_CHUNK_SIZE: int = 64 * 1024
+
+# The size (in bytes) of the chunks in which the standard error of a
+# process is read.
+_STDERR_CHUNK_SIZE: int = 64 * 1024
+
+# The standard error of a process is captured as it is written: only
+# its first `STDERR_HEAD_SIZE` and last `STDERR_TAIL_SIZE` bytes are
+# kept (the end usually holds the exception which stopped the process),
+# so a process flooding its standard error uses a constant amount of
+# memory. The part in between is replaced by the `STDERR_OMITTED` line.
+STDERR_HEAD_SIZE: int = 16 * 1024
+STDERR_TAIL_SIZE: int = 16 * 1024
+STDERR_OMITTED: str = "⯇{} bytes omitted⯈"
+
+# The time (in seconds) to wait for the rest of the standard error of a
+# process once it has stopped (the pipe stays open if the process left
+# children behind).
+_STDERR_GRACE: float = 0.1
+
+# The time (in seconds) an interactor is given to stop once the process
+# it interacts with has stopped (see `run_interactive()`).
+_INTERACTOR_GRACE: float = 1.0
+
 
 class CompletedProcess(subprocess.CompletedProcess):
     def __init__(
@@ -34,6 +67,7 @@ class CompletedProcess(subprocess.CompletedProcess):
             timed_out: bool,
             max_memory: int,
             memory_exceeded: bool,
+            background_load: float = 0.0,
             **kwargs
     ):
         """
@@ -54,6 +88,10 @@ class CompletedProcess(subprocess.CompletedProcess):
         :param bool memory_exceeded:
             `True` if the program exceeded the memory limit and needed
             to be forcibly killed, otherwise `False`.
+
+        :param float background_load:
+            The fraction of the reserved cores used by other processes
+            before the process was started (see `isolation`).
         """
 
         super().__init__(*args, **kwargs)
@@ -61,13 +99,17 @@ class CompletedProcess(subprocess.CompletedProcess):
         self.time_exceeded: bool = timed_out
         self.memory_usage: int = max_memory
         self.memory_exceeded: bool = memory_exceeded
+        self.background_load: float = background_load
 
 
 def run(
         args: List[str],
-        stdin_string: str,
+        stdin_string: Optional[Union[str, BinaryIO]],
         memory_limit: int,
-        time_limit: float
+        time_limit: float,
+        stdin_file: Optional[Union[int, str]] = None,
+        sandbox: Optional[Sandbox] = None,
+        isolation: Optional[Isolation] = None
 ) -> CompletedProcess:
     """
     Run command with arguments and return a `CompletedProcess`
@@ -81,9 +123,11 @@ def run(
     :param List[str] args:
         Arguments to pass to `psutil.Popen()` to start the process.
 
-    :param str stdin_string:
+    :param Union[str, BinaryIO] stdin_string:
         The string that is to be passed to the process through standard
-        input.
+        input. This can also be a binary file object (ex: a
+        decompression stream), which is then streamed to the process
+        through a pipe while it runs.
 
     :param int memory_limit:
         The maximum memory (in bytes) the process is allowed to use;
@@ -94,28 +138,252 @@ def run(
         The maximum time (in seconds) to run the process before
         forcibly killing it.
 
+    :param Optional[Union[int, str]] stdin_file:
+        An open file descriptor or the path of a file to pass to the
+        process as standard input as is; `stdin_string` is ignored if
+        this is given. A file descriptor is read from its current
+        position and is not closed.
+
+    :param Optional[Sandbox] sandbox:
+        If given, the process is run in this sandbox (see `sandbox`),
+        which is reset once the process has stopped.
+
+    :param Optional[Isolation] isolation:
+        If given, the process is run on the reserved cores of these
+        settings (see `isolation`).
+
     :return CompletedProcess:
         ...
     """
 
+    entered = time.monotonic()
     fp_out = tempfile.TemporaryFile()
-    fp_err = tempfile.TemporaryFile()
 
-    try:
-        with tempfile.TemporaryFile() as fp_in:
-            fp_in.write(bytes(stdin_string, encoding="utf-8"))
-            fp_in.seek(0)
+    feeder = None
+    process_args = args if sandbox is None else sandbox.wrap(args)
+
+    noise = 0.0 if isolation is None else isolation.background_load()
+    pinning = contextlib.nullcontext() if isolation is None else isolation.pinned()
+
+    # The real time is measured from the supervisor's clock: the start
+    # time of the process reported by the system can be off by a lot.
+    start_time = time.monotonic()
 
-            process = psutil.Popen(
-                args, stdin=fp_in, stdout=fp_out, stderr=fp_err, universal_newlines=True
+    try:
+        with pinning:
+            if isinstance(stdin_file, int):
+                process = psutil.Popen(
+                    process_args, stdin=stdin_file, stdout=fp_out, stderr=subprocess.PIPE
+                )
+
+            elif stdin_file is not None:
+                with open(stdin_file, "rb") as fp_in:
+                    process = psutil.Popen(
+                        process_args, stdin=fp_in, stdout=fp_out, stderr=subprocess.PIPE
+                    )
+
+            elif isinstance(stdin_string, str):
+                with tempfile.TemporaryFile() as fp_in:
+                    fp_in.write(bytes(stdin_string, encoding="utf-8"))
+                    fp_in.seek(0)
+
+                    process = psutil.Popen(
+                        process_args, stdin=fp_in, stdout=fp_out, stderr=subprocess.PIPE
+                    )
+
+            else:
+                process = psutil.Popen(
+                    process_args, stdin=subprocess.PIPE, stdout=fp_out, stderr=subprocess.PIPE
+                )
+
+        # The helper threads are started outside of the reserved cores.
+        if process.stdin is not None:
+            feeder = threading.Thread(
+                target=_feed, args=(stdin_string, process.stdin), daemon=True
             )
+            feeder.start()
+
+        capturer, stderr_buffer = _capture_stderr(process)
 
     except FileNotFoundError as err:
         fp_out.close()
-        fp_err.close()
 
         raise AssertionError(err.args[1][:1].lower() + err.args[1][1:])
 
+    if isolation is not None:
+        isolation.prioritize(process.pid)
+
+    running = time.monotonic()
+    time_usage, memory_usage = _supervise(process, memory_limit, time_limit, start_time)
+    stopped = time.monotonic()
+
+    if sandbox is not None:
+        sandbox.reset()
+
+    if isolation is not None:
+        isolation.account(time_usage)
+
+    if feeder is not None:
+        feeder.join()
+
+    fp_out.seek(0)
+    stdout = str(fp_out.read(), encoding="utf-8")
+    fp_out.close()
+
+    capturer.join(_STDERR_GRACE)
+    stderr = stderr_buffer.getvalue()
+
+    if metrics.REGISTRY is not None:
+        overhead = time.monotonic() - entered - (stopped - running)
+        metrics.REGISTRY.supervisor_overhead.observe(overhead)
+
+    return CompletedProcess(
+        args,
+        process.poll(),
+        time_taken=time_usage,
+        timed_out=time_usage > time_limit,
+        max_memory=memory_usage,
+        memory_exceeded=memory_usage > memory_limit,
+        background_load=noise,
+        stdout=stdout,
+        stderr=stderr
+    )
+
+
+def run_interactive(
+        args: List[str],
+        interactor_args: List[str],
+        memory_limit: int,
+        time_limit: float,
+        sandbox: Optional[Sandbox] = None,
+        isolation: Optional[Isolation] = None
+) -> Tuple[CompletedProcess, subprocess.CompletedProcess]:
+    """
+    Run command with arguments along with an interactor: the standard
+    output of each process is connected to the standard input of the
+    other by a pipe, so messages are passed directly between them
+    without going through this process.
+
+    Only the process of `args` is limited and measured, as by `run()`;
+    the interactor is given `_INTERACTOR_GRACE` seconds to stop once the
+    process has stopped.
+
+    :param List[str] args:
+        Arguments to pass to `psutil.Popen()` to start the process.
+
+    :param List[str] interactor_args:
+        Arguments to start the interactor.
+
+    :param int memory_limit:
+        The maximum memory (in bytes) the process is allowed to use.
+
+    :param float time_limit:
+        The maximum time (in seconds) to run the process.
+
+    :param Optional[Sandbox] sandbox:
+        If given, the process (but not the interactor) is run in this
+        sandbox.
+
+    :param Optional[Isolation] isolation:
+        If given, the process (but not the interactor) is run on the
+        reserved cores of these settings.
+
+    :return Tuple[CompletedProcess, subprocess.CompletedProcess]:
+        The completed process (whose `stdout` is empty) and the
+        completed interactor.
+    """
+
+    process_args = args if sandbox is None else sandbox.wrap(args)
+
+    noise = 0.0 if isolation is None else isolation.background_load()
+    pinning = contextlib.nullcontext() if isolation is None else isolation.pinned()
+
+    to_interactor, from_process = os.pipe()
+    to_process, from_interactor = os.pipe()
+
+    try:
+        try:
+            interactor = subprocess.Popen(
+                interactor_args, stdin=to_interactor, stdout=from_interactor,
+                stderr=subprocess.PIPE
+            )
+        except FileNotFoundError as err:
+            raise AssertionError(err.args[1][:1].lower() + err.args[1][1:])
+
+        start_time = time.monotonic()
+
+        try:
+            with pinning:
+                process = psutil.Popen(
+                    process_args, stdin=to_process, stdout=from_process, stderr=subprocess.PIPE
+                )
+        except FileNotFoundError as err:
+            interactor.kill()
+            interactor.wait()
+            raise AssertionError(err.args[1][:1].lower() + err.args[1][1:])
+
+    finally:
+        # Each end of the pipes must only be open in the process using
+        # it, so that either one sees the end of its input when the
+        # other one stops.
+        for fd in (to_interactor, from_process, to_process, from_interactor):
+            os.close(fd)
+
+    capturer, stderr_buffer = _capture_stderr(process)
+    interactor_capturer, interactor_buffer = _capture_stderr(interactor)
+
+    if isolation is not None:
+        isolation.prioritize(process.pid)
+
+    running = time.monotonic()
+    time_usage, memory_usage = _supervise(process, memory_limit, time_limit, start_time)
+    stopped = time.monotonic()
+
+    if sandbox is not None:
+        sandbox.reset()
+
+    if isolation is not None:
+        isolation.account(time_usage)
+
+    try:
+        interactor.wait(_INTERACTOR_GRACE)
+    except subprocess.TimeoutExpired:
+        interactor.kill()
+        interactor.wait()
+        raise AssertionError("the interactor did not stop after the program")
+
+    capturer.join(_STDERR_GRACE)
+    interactor_capturer.join(_STDERR_GRACE)
+
+    completed_process = CompletedProcess(
+        args,
+        process.poll(),
+        time_taken=time_usage,
+        timed_out=time_usage > time_limit,
+        max_memory=memory_usage,
+        memory_exceeded=memory_usage > memory_limit,
+        background_load=noise,
+        stdout="",
+        stderr=stderr_buffer.getvalue()
+    )
+    completed_interactor = subprocess.CompletedProcess(
+        interactor_args,
+        interactor.returncode,
+        stdout="",
+        stderr=interactor_buffer.getvalue()
+    )
+
+    return completed_process, completed_interactor
+
+
+def _supervise(
+        process: psutil.Popen,
+        memory_limit: int,
+        time_limit: float,
+        start_time: float
+) -> Tuple[float, int]:
+    # Track the time and memory usage of the process until it stops or
+    # exceeds a limit, then make sure that it is stopped.
     time_usage, memory_usage = _get_data(process)
 
     while process.poll() is None:
@@ -123,7 +391,7 @@ def run(
             time_usage, this_memory = _get_data(process)
             memory_usage = max(memory_usage, this_memory)
 
-            realtime_usage = time.time() - process.create_time()
+            realtime_usage = time.monotonic() - start_time
             if max(time_usage, realtime_usage * (1.0 - _REALTIME_BUFFER)) > time_limit:
                 time_usage = time_limit + 0.001
                 break
@@ -140,24 +408,52 @@ def run(
         except psutil.NoSuchProcess:
             break
 
-    fp_out.seek(0)
-    stdout = str(fp_out.read(), encoding="utf-8")
-    fp_out.close()
+    return time_usage, memory_usage
 
-    fp_err.seek(0)
-    stderr = str(fp_err.read(), encoding="utf-8")
-    fp_err.close()
 
-    return CompletedProcess(
-        args,
-        process.poll(),
-        time_taken=time_usage,
-        timed_out=time_usage > time_limit,
-        max_memory=memory_usage,
-        memory_exceeded=memory_usage > memory_limit,
-        stdout=stdout,
-        stderr=stderr
+def _capture_stderr(process: subprocess.Popen) -> Tuple[threading.Thread, "_HeadTailBuffer"]:
+    stderr_buffer = _HeadTailBuffer(STDERR_HEAD_SIZE, STDERR_TAIL_SIZE)
+    capturer = threading.Thread(
+        target=_capture, args=(process.stderr, stderr_buffer), daemon=True
     )
+    capturer.start()
+    return capturer, stderr_buffer
+
+
+class _HeadTailBuffer:
+    def __init__(self, head_size: int, tail_size: int) -> None:
+        # The tail is a bounded buffer from which the oldest bytes are
+        # dropped as new ones are written.
+        self.head_size: int = head_size
+        self.tail_size: int = tail_size
+
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.omitted: int = 0
+        self._lock = threading.Lock()
+
+    def write(self, data: bytes) -> None:
+        with self._lock:
+            room = self.head_size - len(self.head)
+            if room > 0:
+                self.head += data[:room]
+                data = data[room:]
+
+            self.tail += data
+            excess = len(self.tail) - self.tail_size
+            if excess > 0:
+                del self.tail[:excess]
+                self.omitted += excess
+
+    def getvalue(self) -> str:
+        with self._lock:
+            head = str(self.head, encoding="utf-8", errors="replace")
+            tail = str(self.tail, encoding="utf-8", errors="replace")
+            omitted = self.omitted
+
+        if omitted:
+            return f"{head}\n{STDERR_OMITTED.format(omitted)}\n{tail}"
+        return head + tail
 
 
 def _get_data(p: psutil.Process):
@@ -166,3 +462,34 @@ def _get_data(p: psutil.Process):
         m = p.memory_info().rss
 
     return t, m
+
+
+def _capture(source: BinaryIO, buffer: _HeadTailBuffer) -> None:
+    try:
+        while True:
+            chunk = os.read(source.fileno(), _STDERR_CHUNK_SIZE)
+            if not chunk:
+                break
+            buffer.write(chunk)
+    except OSError:
+        pass
+    finally:
+        source.close()
+
+
+def _feed(source: BinaryIO, destination: BinaryIO) -> None:
+    # Stops silently if the process exits (or is killed) without reading
+    # all of its input.
+    try:
+        while True:
+            chunk = source.read(_STDIN_CHUNK_SIZE)
+            if not chunk:
+                break
+            destination.write(chunk)
+    except (BrokenPipeError, OSError):
+        pass
+    finally:
+        try:
+            destination.close()
+        except (BrokenPipeError, OSError):
+            pass
@@ -0,0 +1,200 @@
+"""
+This module manages sandboxes for running programs without network
+access. A sandbox is a set of unprivileged Linux user, network and mount
+namespaces kept alive by a small holder process; a program is run in a
+sandbox by entering its namespaces with `nsenter`.
+
+Creating namespaces is much slower than entering existing ones, so the
+sandboxes are created ahead of time by a `SandboxPool` and reused: after
+each run, the sandbox is reset by killing whatever processes the program
+left behind in it.
+"""
+
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import time
+
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+# The commands that sandboxes depend on (from util-linux).
+_UNSHARE: str = "unshare"
+_NSENTER: str = "nsenter"
+
+# The maximum time (in seconds) to wait for a new sandbox to be ready.
+_STARTUP_TIMEOUT: float = 5.0
+
+
+def available() -> bool:
+    """
+    Determine whether sandboxes can be created on this computer.
+    """
+
+    if not os.path.isdir("/proc") or not (shutil.which(_UNSHARE) and shutil.which(_NSENTER)):
+        return False
+
+    try:
+        r = subprocess.run(
+            [_UNSHARE, "--user", "--map-root-user", "--net", "--mount", "true"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=_STARTUP_TIMEOUT
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+    return r.returncode == 0
+
+
+class Sandbox:
+    def __init__(self) -> None:
+        """
+        A set of user, network and mount namespaces in which programs
+        can be run (see `wrap()`). The network namespace only contains
+        a loopback interface which is down, so programs can not open
+        any connections.
+        """
+
+        self._holder = subprocess.Popen(
+            [_UNSHARE, "--user", "--map-root-user", "--net", "--mount", "sleep", "infinity"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self.pid: int = self._holder.pid
+
+        # `unshare` only runs `sleep` once the namespaces are created;
+        # entering the holder's namespaces before that would enter ours.
+        deadline = time.monotonic() + _STARTUP_TIMEOUT
+        while _namespace(self.pid) in (None, _namespace(os.getpid())) or not self._ready():
+            if self._holder.poll() is not None or time.monotonic() > deadline:
+                self.close()
+                raise AssertionError("the sandbox could not be created")
+            time.sleep(0.001)
+
+        self.namespace: str = _namespace(self.pid)
+
+    def _ready(self) -> bool:
+        try:
+            return os.path.basename(os.readlink(f"/proc/{self.pid}/exe")) == "sleep"
+        except OSError:
+            return False
+
+    def alive(self) -> bool:
+        """
+        Determine whether the sandbox can still be used.
+        """
+
+        return self._holder.poll() is None
+
+    def close(self) -> None:
+        """
+        Destroy the sandbox and every process in it.
+        """
+
+        self._holder.kill()
+        self._holder.wait()
+        self.reset()
+
+    def processes(self) -> List[int]:
+        """
+        Get the ids of the processes running in the sandbox (except the
+        holder process).
+        """
+
+        pids = []
+        for entry in os.listdir("/proc"):
+            if entry.isdigit() and int(entry) != self.pid:
+                if _namespace(int(entry)) == self.namespace:
+                    pids.append(int(entry))
+        return pids
+
+    def reset(self) -> None:
+        """
+        Kill every process left in the sandbox by the previous run.
+        """
+
+        for pid in self.processes():
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def wrap(self, args: List[str]) -> List[str]:
+        """
+        Get the arguments to run the command `args` in the sandbox (from
+        the current working directory).
+        """
+
+        return [
+            _NSENTER, "-t", str(self.pid), "--user", "--net", "--mount",
+            f"--wd={os.getcwd()}", "--"
+        ] + args
+
+
+class SandboxPool:
+    def __init__(self, size: int = 1) -> None:
+        """
+        A pool of `size` sandboxes created ahead of time.
+        """
+
+        if not available():
+            raise AssertionError("sandboxes are not supported on this computer")
+
+        self._sandboxes: "queue.Queue[Sandbox]" = queue.Queue()
+        for _ in range(size):
+            self._sandboxes.put(Sandbox())
+
+    def close(self) -> None:
+        """
+        Destroy all the sandboxes of the pool.
+        """
+
+        while True:
+            try:
+                self._sandboxes.get_nowait().close()
+            except queue.Empty:
+                break
+
+    @contextmanager
+    def sandbox(self) -> Iterator[Sandbox]:
+        """
+        Get a sandbox from the pool for the duration of a run (which
+        must reset it, see `run.run()`); it is replaced when it is given
+        back if it broke.
+        """
+
+        s = self._sandboxes.get()
+        try:
+            yield s
+        finally:
+            if not s.alive():
+                s = Sandbox()
+            self._sandboxes.put(s)
+
+
+def measure_overhead(pool: SandboxPool, runs: int = 20) -> float:
+    """
+    Get the median extra time (in seconds) it takes to run a program in
+    a sandbox from `pool` (including its reset) compared to running it
+    directly.
+    """
+
+    def timed(wrap: bool) -> float:
+        start = time.perf_counter()
+        if wrap:
+            with pool.sandbox() as s:
+                subprocess.run(s.wrap(["true"]))
+                s.reset()
+        else:
+            subprocess.run(["true"])
+        return time.perf_counter() - start
+
+    overheads = sorted(timed(True) - timed(False) for _ in range(runs))
+    return overheads[len(overheads) // 2]
+
+
+def _namespace(pid: int) -> Optional[str]:
+    try:
+        return os.readlink(f"/proc/{pid}/ns/net")
+    except OSError:
+        return None
@@ -0,0 +1,167 @@
+"""
+This module schedules the test cases of an exercise from the history of
+their timings (see `judge.judge_program()`): when the test cases are
+judged in parallel, the longest ones are started first so that they do
+not end up in the tail of the judging, and when the judging stops at
+the first failure, the test cases which fail most often are judged
+first.
+
+The history of an exercise is kept in a small JSON file holding, for
+each test case, a moving average of the time used by the programs and
+the number of times it was judged and failed. The test cases without
+history are estimated from the time used by the reference solution (see
+`reference.USAGE_SPEC`) or from their sizes (see `complexity`).
+"""
+
+import json
+import os
+import statistics
+import threading
+
+from typing import Dict, List, Optional
+
+import exercise
+import judge as sjudge
+
+# The default directory of the histories.
+HISTORY_DIRECTORY: str = os.path.join(os.path.expanduser("~"), ".cache", "sjudge", "timings")
+
+# The weight of the latest time in the moving average of a test case.
+SMOOTHING: float = 0.3
+
+
+class TimingHistory:
+    def __init__(self, path: str) -> None:
+        """
+        The history of the test cases of an exercise, stored in the file
+        `path` (which is created by `save()`).
+        """
+
+        self.path: str = path
+
+        # The moving average of the time (in milliseconds), the number
+        # of judgings and the number of failures of each test case.
+        self.times: Dict[int, float] = {}
+        self.runs: Dict[int, int] = {}
+        self.failures: Dict[int, int] = {}
+
+        self._lock = threading.Lock()
+
+        try:
+            with open(path, "r", encoding="utf-8") as fd:
+                history = json.load(fd)
+        except (OSError, ValueError):
+            return
+
+        for name in ("times", "runs", "failures"):
+            getattr(self, name).update(
+                (int(test_number), value) for test_number, value in history.get(name, {}).items()
+            )
+
+    @classmethod
+    def for_exercise(cls, ex_name: str, directory: str = HISTORY_DIRECTORY) -> "TimingHistory":
+        """
+        Get the history of the exercise `ex_name`.
+        """
+
+        return cls(os.path.join(directory, f"{ex_name}.json"))
+
+    def update(self, result: sjudge.JudgeResult) -> None:
+        """
+        Add the judged test cases of `result` to the history.
+        """
+
+        with self._lock:
+            for tc in result:
+                i = tc.testcase_no
+                previous = self.times.get(i)
+                self.times[i] = tc.program_time if previous is None else (
+                    SMOOTHING * tc.program_time + (1.0 - SMOOTHING) * previous
+                )
+                self.runs[i] = self.runs.get(i, 0) + 1
+                self.failures[i] = self.failures.get(i, 0) + (not tc.passed)
+
+    def save(self) -> None:
+        """
+        Write the history to its file.
+        """
+
+        with self._lock:
+            history = {
+                name: {str(i): value for i, value in getattr(self, name).items()}
+                for name in ("times", "runs", "failures")
+            }
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        # The file is replaced at once, as other judges may read it.
+        temporary_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as fd:
+            json.dump(history, fd)
+        os.replace(temporary_path, self.path)
+
+    def failure_rate(self, test_number: int) -> float:
+        """
+        Get the estimated probability that a program fails the test case
+        `test_number` (one half for a test case never judged).
+        """
+
+        # The counts are smoothed so that a single judging does not
+        # decide the estimate.
+        return (self.failures.get(test_number, 0) + 1) / (self.runs.get(test_number, 0) + 2)
+
+
+def estimated_times(
+        total: int,
+        history: TimingHistory,
+        specifications: Optional[exercise.SPEC_TYPE] = None
+) -> List[float]:
+    """
+    Get the estimated time of each of the `total` test cases of an
+    exercise with the specifications `specifications`, in the unit of
+    whichever source estimated them; the estimates are only meant to be
+    compared with each other.
+    """
+
+    specifications = specifications or {}
+
+    known: Dict[int, float] = {i: t for i, t in history.times.items() if i < total}
+    if not known and specifications.get("reference_usage"):
+        known = {i: usage[0] for i, usage in enumerate(specifications["reference_usage"][:total])}
+    if not known and specifications.get("sizes"):
+        known = dict(enumerate(specifications["sizes"][:total]))
+
+    # The test cases without an estimate are assumed to be average.
+    default = statistics.mean(known.values()) if known else 0.0
+    return [known.get(i, default) for i in range(total)]
+
+
+def longest_first(
+        total: int,
+        history: TimingHistory,
+        specifications: Optional[exercise.SPEC_TYPE] = None
+) -> List[int]:
+    """
+    Get the order in which to start the `total` test cases of an
+    exercise (see `judge.judge_program()`) so that the longest ones are
+    started first.
+    """
+
+    times = estimated_times(total, history, specifications)
+    return sorted(range(total), key=lambda i: -times[i])
+
+
+def likely_failures_first(
+        total: int,
+        history: TimingHistory,
+        specifications: Optional[exercise.SPEC_TYPE] = None
+) -> List[int]:
+    """
+    Get the order in which to judge the `total` test cases of an
+    exercise when the judging stops at the first failure: the test cases
+    which fail most often first, the shortest first among equally likely
+    ones.
+    """
+
+    times = estimated_times(total, history, specifications)
+    return sorted(range(total), key=lambda i: (-history.failure_rate(i), times[i]))
@@ -0,0 +1,379 @@
+"""
+This module stress tests a program against a reference solution: a
+generator program writes a random input for each seed (given as its
+only argument), both programs are run on it in parallel over many
+seeds, and the first input on which the program disagrees with the
+reference solution (or fails) is minimized and saved.
+
+The generator, reference solution and program can be written in any
+language that `command` supports. A small input is run in a few
+milliseconds (mostly the startup of the programs), so fast languages
+check thousands of inputs per second across all cores.
+"""
+
+import argparse
+import functools
+import multiprocessing
+import re
+import shlex
+
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import command
+import judge as sjudge
+import run
+
+# The number of seeds sent to a worker process at a time.
+_CHUNK_SIZE: int = 16
+
+# The most runs of the programs spent on minimizing a failing input.
+MINIMIZE_RUNS: int = 1000
+
+# The default path of the saved failing input.
+DEFAULT_OUTPUT: str = "counterexample.txt"
+
+_INTEGER = re.compile(r"-?\d+")
+
+# The result of checking a seed: the seed, the generated input and the
+# result of the program on it (`None` if it agreed with the reference).
+_SEED_RESULT = Tuple[int, sjudge.IO_TYPE, Optional[sjudge.TestCaseResult]]
+
+
+class StressFailure:
+    def __init__(self, seed: int, iterations: int, generated_input: sjudge.IO_TYPE,
+                 result: sjudge.TestCaseResult) -> None:
+        """
+        A class to keep track of an input on which a program disagreed
+        with the reference solution.
+
+        :param int seed:
+            The seed from which the input was generated.
+
+        :param int iterations:
+            The number of seeds which were checked up to this one.
+
+        :param IO_TYPE generated_input:
+            The input as it was generated.
+
+        :param TestCaseResult result:
+            The result of the program on the minimized input (its
+            `exercise_input`), judged against the reference output.
+        """
+
+        self.seed: int = seed
+        self.iterations: int = iterations
+        self.generated_input: sjudge.IO_TYPE = generated_input
+        self.result: sjudge.TestCaseResult = result
+
+
+def stress(
+        generator_command: str,
+        reference_command: str,
+        program_command: str,
+        iterations: int,
+        first_seed: int = 0,
+        time_limit: float = 1.0,
+        memory_limit: int = 256,
+        judge: sjudge.ANY_JUDGE = "default",
+        processes: Optional[int] = None,
+        minimize: bool = True
+) -> Optional[StressFailure]:
+    """
+    Check a program against a reference solution on the inputs written
+    by a generator for the seeds `first_seed` to `first_seed +
+    iterations - 1`, stopping at the first disagreement.
+
+    :param str generator_command:
+        The command to run the generator; the seed is appended to it.
+
+    :param str reference_command:
+        The command to run the reference solution.
+
+    :param str program_command:
+        The command to run the program.
+
+    :param int iterations:
+        The number of seeds to check.
+
+    :param int first_seed:
+        The first seed to check.
+
+    :param float time_limit:
+        The time limit of each run (in seconds).
+
+    :param int memory_limit:
+        The memory limit of each run (in mebibytes).
+
+    :param ANY_JUDGE judge:
+        The judging function comparing the program's output with the
+        reference solution's output (see `judge.judge_program()`).
+
+    :param Optional[int] processes:
+        The number of seeds to check at once; defaults to the number of
+        CPUs. If this is 1, the seeds are checked in this process.
+
+    :param bool minimize:
+        Whether to minimize the failing input (see `minimize_input()`).
+
+    :return Optional[StressFailure]:
+        The failure on the first failing seed, or `None` if the program
+        agreed with the reference solution on every seed.
+    """
+
+    check_seed = functools.partial(
+        _check_seed, generator_command, reference_command, program_command,
+        time_limit, memory_limit, judge
+    )
+    seeds = range(first_seed, first_seed + iterations)
+
+    failure = None
+    if processes == 1:
+        failure = _first_failure(map(check_seed, seeds))
+    else:
+        # The pool is terminated on leaving, which stops the seeds which
+        # are still being checked.
+        with multiprocessing.Pool(processes) as pool:
+            failure = _first_failure(pool.imap(check_seed, seeds, _CHUNK_SIZE))
+
+    if failure is None:
+        return None
+
+    seed, generated_input, result = failure
+    if minimize:
+        fails = functools.partial(
+            _disagrees, reference_command, program_command, time_limit, memory_limit, judge
+        )
+        result = fails(minimize_input(generated_input, fails)) or result
+
+    return StressFailure(seed, seed - first_seed + 1, generated_input, result)
+
+
+def minimize_input(
+        test_input: sjudge.IO_TYPE,
+        fails: Callable[[List[str]], object],
+        runs: int = MINIMIZE_RUNS
+) -> List[str]:
+    """
+    Shrink the failing input `test_input` while `fails(input)` stays
+    true, by removing lines, then tokens of each line, then decreasing
+    integers (ex: the number of items on the first line), until none of
+    these changes keep the input failing or `fails` was called `runs`
+    times.
+    """
+
+    budget = [runs]
+
+    def check(candidate: List[str]) -> bool:
+        if budget[0] <= 0:
+            return False
+        budget[0] -= 1
+        return bool(fails(candidate))
+
+    lines = list(test_input)
+    while budget[0] > 0:
+        previous = list(lines)
+
+        lines = _remove_chunks(lines, check)
+        for i in range(len(lines)):
+            tokens = _remove_chunks(
+                lines[i].split(),
+                lambda ts: check(lines[:i] + [" ".join(ts)] + lines[i + 1:])
+            )
+            lines[i] = " ".join(tokens)
+
+        for i in range(len(lines)):
+            tokens = lines[i].split()
+            for j, token in enumerate(tokens):
+                tokens[j] = _decrease_integer(
+                    token,
+                    lambda t: check(lines[:i] + [" ".join(tokens[:j] + [t] + tokens[j + 1:])]
+                                    + lines[i + 1:])
+                )
+            lines[i] = " ".join(tokens)
+
+        if lines == previous:
+            break
+
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Stress test a program against a reference solution on random inputs.")
+    parser.add_argument(
+        "generator_path", action="store", type=str,
+        help="the path to the generator, which writes an input for the seed given as argument.")
+    parser.add_argument(
+        "reference_path", action="store", type=str,
+        help="the path to the reference solution.")
+    parser.add_argument(
+        "program_path", action="store", type=str,
+        help="the path to the program to test.")
+    parser.add_argument(
+        "-n", "--iterations", action="store", default=10000, type=int,
+        help="set the number of seeds to check.", dest="iterations")
+    parser.add_argument(
+        "-s", "--seed", action="store", default=0, type=int,
+        help="set the first seed to check.", dest="seed")
+    parser.add_argument(
+        "-t", "--time_limit", action="store", default=1.0, type=float,
+        help="set the time limit of each run (in seconds).", dest="time_limit")
+    parser.add_argument(
+        "-j", "--judge", action="store", default="default",
+        help="set the judge comparing the outputs.", dest="judge")
+    parser.add_argument(
+        "-p", "--processes", action="store", default=None, type=int,
+        help="set the number of seeds to check at once.", dest="processes")
+    parser.add_argument(
+        "-o", "--output", action="store", default=DEFAULT_OUTPUT,
+        help="set the path of the saved failing input.", dest="output")
+    arguments = parser.parse_args()
+
+    failure = stress(
+        command.get_command(arguments.generator_path),
+        command.get_command(arguments.reference_path),
+        command.get_command(arguments.program_path),
+        arguments.iterations,
+        first_seed=arguments.seed,
+        time_limit=arguments.time_limit,
+        judge=arguments.judge,
+        processes=arguments.processes
+    )
+
+    if failure is None:
+        print(f"The program agreed with the reference solution on {arguments.iterations} inputs.")
+        return
+
+    import display
+
+    failing_input = failure.result.exercise_input
+    with open(arguments.output, "w", encoding="utf-8") as fp:
+        fp.writelines(f"{line}\n" for line in failing_input)
+
+    print(f"The program failed on the input of seed {failure.seed} (after {failure.iterations} "
+          f"inputs); the minimized input was saved to `{arguments.output}`.")
+    display.d_progress_hook(failure.result)
+
+
+def _first_failure(results: Iterable[_SEED_RESULT]) -> Optional[_SEED_RESULT]:
+    for result in results:
+        if result[2] is not None:
+            return result
+    return None
+
+
+def _check_seed(
+        generator_command: str,
+        reference_command: str,
+        program_command: str,
+        time_limit: float,
+        memory_limit: int,
+        judge: sjudge.ANY_JUDGE,
+        seed: int
+) -> _SEED_RESULT:
+    generated = run.run(
+        shlex.split(generator_command) + [str(seed)],
+        stdin_string="",
+        memory_limit=sjudge.MEBIBYTE * memory_limit,
+        time_limit=time_limit
+    )
+    if generated.returncode or generated.time_exceeded or generated.memory_exceeded:
+        raise AssertionError(f"the generator failed on the seed {seed}")
+
+    generated_input = sjudge._decode_io(generated.stdout)
+    valid, reference_output = _reference_output(
+        reference_command, time_limit, memory_limit, generated_input
+    )
+    if not valid:
+        raise AssertionError(f"the reference solution failed on the seed {seed}")
+
+    result = _judge(
+        program_command, time_limit, memory_limit, judge, generated_input, reference_output
+    )
+    return seed, generated_input, result
+
+
+def _reference_output(
+        reference_command: str,
+        time_limit: float,
+        memory_limit: int,
+        test_input: sjudge.IO_TYPE
+) -> Tuple[bool, sjudge.IO_TYPE]:
+    tc = sjudge.judge_one(
+        reference_command, test_input, [], time_limit, memory_limit,
+        lambda program_output, expected_output: True, cache_inputs=False
+    )
+    return tc.passed, tc.program_stdout
+
+
+def _disagrees(
+        reference_command: str,
+        program_command: str,
+        time_limit: float,
+        memory_limit: int,
+        judge: sjudge.ANY_JUDGE,
+        test_input: sjudge.IO_TYPE
+) -> Optional[sjudge.TestCaseResult]:
+    # The result of the program if it fails on an input which the
+    # reference solution accepts (an input on which the reference
+    # solution fails is invalid, ex: after a line was removed).
+    valid, reference_output = _reference_output(
+        reference_command, time_limit, memory_limit, test_input
+    )
+    if not valid:
+        return None
+
+    return _judge(program_command, time_limit, memory_limit, judge, test_input, reference_output)
+
+
+def _judge(
+        program_command: str,
+        time_limit: float,
+        memory_limit: int,
+        judge: sjudge.ANY_JUDGE,
+        test_input: sjudge.IO_TYPE,
+        reference_output: sjudge.IO_TYPE
+) -> Optional[sjudge.TestCaseResult]:
+    # The inputs are not cached, as most of them are only run once.
+    tc = sjudge.judge_one(
+        program_command, test_input, reference_output, time_limit, memory_limit, judge,
+        cache_inputs=False
+    )
+    return None if tc.passed else tc
+
+
+def _remove_chunks(items: List[str], fails: Callable[[List[str]], bool]) -> List[str]:
+    # Remove runs of items, from half of them down to single items,
+    # while the rest still fails.
+    chunk = len(items) // 2
+    while chunk >= 1:
+        i = 0
+        while i < len(items):
+            candidate = items[:i] + items[i + chunk:]
+            if fails(candidate):
+                items = candidate
+            else:
+                i += chunk
+        chunk //= 2
+
+    if len(items) == 1 and fails([]):
+        items = []
+    return items
+
+
+def _decrease_integer(token: str, fails: Callable[[str], bool]) -> str:
+    if not _INTEGER.fullmatch(token):
+        return token
+
+    value = int(token)
+    for smaller in (0, value // 2, value - 1):
+        if abs(smaller) < abs(value) and fails(str(smaller)):
+            return str(smaller)
+    return token
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except AssertionError as err:
+        print(f"error: {err.args[0]}.")
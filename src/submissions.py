@@ -0,0 +1,420 @@
+"""
+This module manages a persistent queue of submissions in front of
+`judge.judge_program()`. The queue is stored in an SQLite database so
+that no submission is lost if the grader crashes, and submissions are
+started in a fair order:
+
+  1. a user's first submission for an exercise comes before their
+     resubmissions,
+  2. users with fewer running submissions come first,
+  3. users who were served least recently come first,
+  4. otherwise, submissions are started in the order they arrived.
+
+A resubmission replaces its user's queued (not yet started) submission
+for the same exercise. Submissions are only started while there are
+free CPUs and enough available memory for the exercise's memory limit.
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from typing import Any, Dict, List, Optional
+
+import calibrate
+import command
+import exercise
+import interactive
+import judge as sjudge
+import metrics
+import results
+
+# The possible states of a submission.
+QUEUED: str = "queued"
+RUNNING: str = "running"
+DONE: str = "done"
+FAILED: str = "failed"
+SUPERSEDED: str = "superseded"
+
+# The memory (in bytes) kept free in addition to the memory limit of
+# the exercise of a submission before it is started.
+MEMORY_HEADROOM: int = 256 * sjudge.MEBIBYTE
+
+# The time (in seconds) the dispatcher waits before checking again for
+# submissions it can start.
+POLL_INTERVAL: float = 0.1
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    source BLOB NOT NULL,
+    attempt INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    enqueued REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    verdict TEXT,
+    passed INTEGER,
+    total INTEGER,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS submissions_state ON submissions (state, enqueued);
+CREATE INDEX IF NOT EXISTS submissions_user ON submissions (user, exercise);
+"""
+
+# The fair order described in the module docstring.
+_NEXT_SUBMISSION: str = """
+SELECT s.id, s.exercise FROM submissions s
+WHERE s.state = 'queued'
+ORDER BY
+    s.attempt > 1,
+    (SELECT COUNT(*) FROM submissions r WHERE r.user = s.user AND r.state = 'running'),
+    COALESCE((SELECT MAX(r.started) FROM submissions r WHERE r.user = s.user), 0),
+    s.enqueued
+LIMIT 1
+"""
+
+
+class SubmissionQueue:
+    def __init__(
+            self,
+            path: str,
+            exercises_location: str = "exercises/",
+            solutions_location: str = "solutions/",
+            max_running: Optional[int] = None,
+            results_path: Optional[str] = None
+    ) -> None:
+        """
+        A persistent queue of submissions. Submissions which were
+        running when a previous queue on the same database stopped are
+        queued again.
+
+        :param str path:
+            The path of the SQLite database.
+
+        :param str exercises_location:
+            The base directory of the exercises.
+
+        :param str solutions_location:
+            The base directory of the reference solutions.
+
+        :param Optional[int] max_running:
+            The maximum number of submissions to judge at once; defaults
+            to the number of CPUs.
+
+        :param Optional[str] results_path:
+            If given, the results of the submissions are also recorded
+            in the results database at this path (see `results`).
+        """
+
+        self.path: str = path
+        self.exercises_location: str = exercises_location
+        self.solutions_location: str = solutions_location
+        self.max_running: int = max_running or os.cpu_count() or 1
+        self.results: Optional[results.ResultStore] = None
+        if results_path is not None:
+            self.results = results.ResultStore(results_path)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+        with self._connection() as db:
+            db.executescript(_SCHEMA)
+            db.execute("UPDATE submissions SET state = ?, started = NULL WHERE state = ?",
+                       (QUEUED, RUNNING))
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections can not be shared between threads.
+        if not hasattr(self._local, "db"):
+            self._local.db = sqlite3.connect(self.path, timeout=30)
+            self._local.db.row_factory = sqlite3.Row
+        return self._local.db
+
+    def submit(self, user: str, ex_name: str, program_path: str) -> int:
+        """
+        Add the program `program_path` of `user` for the exercise
+        `ex_name` to the queue and get the id of the submission. The
+        program is copied into the database.
+        """
+
+        if not exercise.exists(self.exercises_location, ex_name):
+            raise AssertionError(f"the exercise `{ex_name}` does not exist")
+        if not os.path.isfile(program_path):
+            raise AssertionError(f"the file `{program_path}` does not exist")
+
+        with open(program_path, "rb") as fd:
+            source = fd.read()
+
+        with self._connection() as db:
+            attempt = db.execute(
+                "SELECT COUNT(*) FROM submissions WHERE user = ? AND exercise = ?",
+                (user, ex_name)
+            ).fetchone()[0] + 1
+
+            db.execute(
+                "UPDATE submissions SET state = ? WHERE user = ? AND exercise = ? AND state = ?",
+                (SUPERSEDED, user, ex_name, QUEUED)
+            )
+            return db.execute(
+                "INSERT INTO submissions (user, exercise, filename, source, attempt, state, "
+                "enqueued) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (user, ex_name, os.path.basename(program_path), source, attempt, QUEUED,
+                 time.time())
+            ).lastrowid
+
+    def status(self, submission_id: int) -> Dict[str, Any]:
+        """
+        Get the state (and result, once judged) of a submission.
+        """
+
+        row = self._connection().execute(
+            "SELECT id, user, exercise, attempt, state, enqueued, started, finished, verdict, "
+            "passed, total, message FROM submissions WHERE id = ?", (submission_id,)
+        ).fetchone()
+
+        if row is None:
+            raise AssertionError(f"the submission `{submission_id}` does not exist")
+        return dict(row)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Get the current metrics of the queue: the number of queued and
+        running submissions, the longest and average wait (in seconds)
+        of the queued submissions and the average wait of the
+        submissions started in the last hour.
+        """
+
+        db = self._connection()
+        now = time.time()
+
+        depth, longest, average = db.execute(
+            "SELECT COUNT(*), MAX(? - enqueued), AVG(? - enqueued) FROM submissions "
+            "WHERE state = ?", (now, now, QUEUED)
+        ).fetchone()
+        running = db.execute(
+            "SELECT COUNT(*) FROM submissions WHERE state = ?", (RUNNING,)
+        ).fetchone()[0]
+        recent = db.execute(
+            "SELECT AVG(started - enqueued) FROM submissions WHERE started > ?", (now - 3600,)
+        ).fetchone()[0]
+
+        return {
+            "queue_depth": depth,
+            "running": running,
+            "longest_wait": longest or 0.0,
+            "average_wait": average or 0.0,
+            "recent_average_wait": recent or 0.0,
+        }
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Mark the next submission (in the fair order) as running and get
+        it, if there is one and there are enough resources to run it.
+        """
+
+        db = self._connection()
+
+        with self._lock, db:
+            db.execute("BEGIN IMMEDIATE")
+
+            running = db.execute(
+                "SELECT COUNT(*) FROM submissions WHERE state = ?", (RUNNING,)
+            ).fetchone()[0]
+            if running >= self.max_running:
+                return None
+
+            row = db.execute(_NEXT_SUBMISSION).fetchone()
+            if row is None:
+                return None
+
+            db.execute("UPDATE submissions SET state = ?, started = ? WHERE id = ?",
+                       (RUNNING, time.time(), row["id"]))
+
+            submission = dict(db.execute(
+                "SELECT * FROM submissions WHERE id = ?", (row["id"],)
+            ).fetchone())
+
+        # The exercise is only loaded once the submission is claimed, so
+        # that the database is not locked while it is read.
+        try:
+            specifications = exercise.get_specs(self.exercises_location, submission["exercise"])
+        except AssertionError as err:
+            self._finish(submission["id"], FAILED, message=err.args[0])
+            return None
+        except Exception as err:
+            self._finish(submission["id"], FAILED,
+                         message=f"an unexpected error has occurred ({err!r})")
+            return None
+
+        if not _memory_available(sjudge.MEBIBYTE * specifications["memory_limit"]):
+            with db:
+                db.execute("UPDATE submissions SET state = ?, started = NULL WHERE id = ?",
+                           (QUEUED, submission["id"]))
+            return None
+
+        if metrics.REGISTRY is not None:
+            metrics.REGISTRY.queue_wait.observe(
+                submission["started"] - submission["enqueued"], "submission"
+            )
+
+        submission["specifications"] = specifications
+        return submission
+
+    def judge(self, submission: Dict[str, Any]) -> None:
+        """
+        Judge a submission returned by `claim()` and record its result.
+        """
+
+        specifications = submission["specifications"]
+        state, result, message = FAILED, None, None
+
+        try:
+            calibrate.calibrate_specs(specifications, self.solutions_location)
+            interactive.prepare_specs(specifications, self.solutions_location)
+
+            with tempfile.TemporaryDirectory() as directory:
+                program_path = os.path.join(directory, submission["filename"])
+                with open(program_path, "wb") as fd:
+                    fd.write(submission["source"])
+                os.chmod(program_path, 0o755)
+
+                result = sjudge.judge_program(command.get_command(program_path),
+                                              **specifications)
+                submission_hash = results.submission_hash(program_path)
+            state = DONE
+
+        except AssertionError as err:
+            message = err.args[0]
+        except Exception as err:
+            message = f"an unexpected error has occurred ({err!r})"
+        finally:
+            # The submission always leaves the running state, which frees
+            # its place for the next one.
+            self._finish(submission["id"], state, result, message)
+
+        if state == DONE and self.results is not None:
+            self.results.record(result, submission["exercise"], submission_hash,
+                                user=submission["user"])
+
+    def _finish(self, submission_id: int, state: str,
+                result: Optional[sjudge.JudgeResult] = None,
+                message: Optional[str] = None) -> None:
+        with self._connection() as db:
+            db.execute(
+                "UPDATE submissions SET state = ?, finished = ?, verdict = ?, passed = ?, "
+                "total = ?, message = ? WHERE id = ?",
+                (state, time.time(), result and result.verdict, result and result.passed,
+                 result and result.total, message, submission_id)
+            )
+
+    def serve(self, stop: Optional[threading.Event] = None) -> None:
+        """
+        Start the queued submissions as resources become available until
+        `stop` is set, judging each one in its own thread.
+        """
+
+        stop = stop or threading.Event()
+
+        while not stop.is_set():
+            self._threads = [t for t in self._threads if t.is_alive()]
+
+            submission = self.claim()
+            if submission is None:
+                if self.results is not None:
+                    self.results.flush()
+                stop.wait(POLL_INTERVAL)
+                continue
+
+            thread = threading.Thread(target=self.judge, args=(submission,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        for thread in self._threads:
+            thread.join()
+
+        if self.results is not None:
+            self.results.close()
+
+
+def _memory_available(memory: int) -> bool:
+    import psutil
+
+    return psutil.virtual_memory().available >= memory + MEMORY_HEADROOM
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the queue of submissions.")
+    parser.add_argument(
+        "database", action="store", type=str,
+        help="the path of the queue's database.")
+    parser.add_argument(
+        "-e", "--exercises_location", action="store", default="exercises/",
+        help="set the base directory of the exercises.", dest="exercises_location")
+    parser.add_argument(
+        "-r", "--solutions_location", action="store", default="solutions/",
+        help="set the base directory of the reference solutions.", dest="solutions_location")
+
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    submit_parser = subparsers.add_parser("submit", help="add a submission to the queue.")
+    submit_parser.add_argument("user", action="store", type=str)
+    submit_parser.add_argument("exercise_name", action="store", type=str)
+    submit_parser.add_argument("program_path", action="store", type=str)
+
+    status_parser = subparsers.add_parser("status", help="display a submission or the queue.")
+    status_parser.add_argument("submission_id", action="store", nargs="?", type=int)
+
+    serve_parser = subparsers.add_parser("serve", help="judge the queued submissions.")
+    serve_parser.add_argument(
+        "-j", "--jobs", action="store", default=None, type=int,
+        help="set the number of submissions to judge at once.", dest="jobs")
+    serve_parser.add_argument(
+        "-R", "--results", action="store", default=None,
+        help="also record the results in this results database (see `results.py`).",
+        dest="results")
+    serve_parser.add_argument(
+        "-M", "--metrics", action="store", default=None,
+        help="serve the metrics of the judge in the Prometheus text format on this local "
+             "`host:port`.", dest="metrics")
+
+    arguments = parser.parse_args()
+
+    submission_queue = SubmissionQueue(
+        arguments.database,
+        arguments.exercises_location,
+        arguments.solutions_location,
+        getattr(arguments, "jobs", None),
+        getattr(arguments, "results", None)
+    )
+
+    if arguments.action == "submit":
+        print(submission_queue.submit(
+            arguments.user, arguments.exercise_name, arguments.program_path
+        ))
+    elif arguments.action == "status":
+        if arguments.submission_id is None:
+            status = submission_queue.metrics()
+        else:
+            status = submission_queue.status(arguments.submission_id)
+        for key, value in status.items():
+            print(f"{key}: {value}")
+    else:
+        if arguments.metrics:
+            metrics.serve(arguments.metrics)
+        submission_queue.serve()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except AssertionError as err:
+        print(f"error: {err.args[0]}.")
+    except KeyboardInterrupt:
+        print("stopping the queue due to user interrupt.")
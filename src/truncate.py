@@ -60,3 +60,42 @@ def truncate(
             break
 
     return return_s
+
+
+def head_tail(
+        s: List[str],
+        head: int,
+        tail: int,
+        char_limit: Optional[int] = None
+) -> List[str]:
+    """
+    Truncate a given string to its first `head` and last `tail` lines
+    (ex: to show both the start of an error message and the exception
+    at its end).
+
+    :param List[str] s:
+        The message to truncate (each string in the list represents one
+        line of a program's output).
+
+    :param int head:
+        The number of lines to keep from the start.
+
+    :param int tail:
+        The number of lines to keep from the end.
+
+    :param int char_limit:
+        The maximum number of characters of each line.
+
+    :return List[str]:
+        The kept lines, separated by `TRUNCATED_STRING` if lines were
+        left out.
+    """
+
+    if len(s) > head + tail:
+        s = s[:head] + [TRUNCATED_STRING] + (s[-tail:] if tail else [])
+
+    if char_limit is not None:
+        s = [line if len(line) <= char_limit or line == TRUNCATED_STRING
+             else line[:char_limit] + TRUNCATED_STRING for line in s]
+
+    return s
@@ -0,0 +1,111 @@
+"""
+This module contains the watch mode of `main.py`: a program is judged
+again every time its file is saved. What matters is how soon the first
+failure is shown after saving, so the test cases which failed in the
+previous judging are judged first (then those which were not judged,
+then those which passed), in parallel, and the judging stops at the
+first failed test case.
+"""
+
+import os
+import time
+
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import display
+import judge as sjudge
+
+# The time (in seconds) between checks of the program's file.
+WATCH_INTERVAL: float = 0.05
+
+# The state of a file: its modification time (in nanoseconds) and size.
+FILE_STAMP = Tuple[int, int]
+
+
+def stamp(path: str) -> Optional[FILE_STAMP]:
+    """
+    Get the state of the file `path`, or `None` if it does not exist.
+    """
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+def wait_for_change(path: str, previous: Optional[FILE_STAMP],
+                    interval: float = WATCH_INTERVAL) -> FILE_STAMP:
+    """
+    Wait until the file `path` has changed from the state `previous`
+    and get its new state. The file must then stay the same for
+    `interval` seconds, as editors may save a file in several steps.
+    """
+
+    current = previous
+    while True:
+        time.sleep(interval)
+
+        new = stamp(path)
+        if new is not None and new != previous and new == current:
+            return new
+        current = new
+
+
+def failed_first(
+        total: int,
+        previous: Optional[sjudge.JudgeResult],
+        usual_order: Optional[Sequence[int]] = None
+) -> List[int]:
+    """
+    Get the order in which to judge `total` test cases after the result
+    `previous`: the failed test cases first, then those which were not
+    judged (ex: after a stop at the first failure), then those which
+    passed, each in the order `usual_order` (ex: the test cases most
+    likely to fail first, see `schedule`; defaults to their order).
+    """
+
+    order = list(range(total) if usual_order is None else usual_order)
+    if previous is None:
+        return order
+
+    passed = {tc.testcase_no: tc.passed for tc in previous}
+    rank = {False: 0, None: 1, True: 2}
+    return sorted(order, key=lambda i: rank[passed.get(i)])
+
+
+def watch(
+        program_path: str,
+        total: int,
+        judge_once: Callable[[List[int]], sjudge.JudgeResult],
+        usual_order: Optional[Callable[[], Sequence[int]]] = None
+) -> None:
+    """
+    Judge the program `program_path` on `total` test cases, and judge it
+    again every time its file is saved, until interrupted.
+
+    :param Callable[[List[int]], JudgeResult] judge_once:
+        The function judging the program once, given the order of the
+        test cases (see `judge.judge_program()`).
+
+    :param Optional[Callable[[], Sequence[int]]] usual_order:
+        The function giving the order of the test cases before the
+        previous failures are moved first (see `failed_first()`).
+    """
+
+    previous = None
+    current = stamp(program_path)
+
+    try:
+        while True:
+            order = None if usual_order is None else usual_order()
+            previous = judge_once(failed_first(total, previous, order))
+
+            display.display(f"Watching `{program_path}` for changes (press Ctrl+C to stop).",
+                            flush=True)
+            current = wait_for_change(program_path, current)
+            display.display()
+            display.display(f"`{program_path}` changed; judging it again.", flush=True)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,123 @@
+import _template
+
+import json
+import shutil
+
+import pytest
+
+import calibrate
+import exercise
+from calibrate import calibrate_exercise, calibrate_specs, time_limits
+
+tc = 2
+testcases = [([""], [""]) for _ in range(tc)]
+
+
+def test__time_limits(tmp_path):
+    limits = time_limits("tests/solutions/ac_tester.py", testcases, cache_directory=str(tmp_path))
+    assert len(limits) == tc
+    assert all(limit >= calibrate.MINIMUM_TIME_LIMIT for limit in limits)
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+
+def test__time_limits__cached(tmp_path, monkeypatch):
+    limits = time_limits("tests/solutions/ac_tester.py", testcases, cache_directory=str(tmp_path))
+
+    def no_benchmark(*args, **kwargs):
+        raise AssertionError("the reference solution should not be benchmarked")
+
+    monkeypatch.setattr(calibrate, "benchmark", no_benchmark)
+    assert time_limits("tests/solutions/ac_tester.py", testcases,
+                       cache_directory=str(tmp_path)) == limits
+
+
+def test__time_limits__separate_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(calibrate, "benchmark", lambda *args, **kwargs: [1.0, 1.0])
+    time_limits("tests/solutions/ac_tester.py", testcases, cache_directory=str(tmp_path))
+    time_limits("tests/solutions/echo_tester.py", testcases, cache_directory=str(tmp_path))
+
+    # each reference solution has its own cache file, so that concurrent
+    # calibrations do not overwrite each other's timings.
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test__time_limits__multiplier(tmp_path, monkeypatch):
+    monkeypatch.setattr(calibrate, "benchmark", lambda *args, **kwargs: [0.0, 1.0])
+
+    limits = time_limits("tests/solutions/ac_tester.py", testcases, cache_directory=str(tmp_path),
+                         multiplier=2.5)
+    assert limits == [calibrate.MINIMUM_TIME_LIMIT, 2.5]
+
+
+def test__time_limits__bad_reference(tmp_path):
+    with pytest.raises(AssertionError):
+        time_limits("tests/solutions/wa_tester.py", testcases, cache_directory=str(tmp_path))
+
+
+def test__time_limits__no_exist(tmp_path):
+    with pytest.raises(AssertionError):
+        time_limits("tests/solutions/hopefullynothingiscalledthis.py", testcases,
+                    cache_directory=str(tmp_path))
+
+
+def test__calibrate_exercise(tmp_path, monkeypatch):
+    for extension in ("json", "txt"):
+        shutil.copy(f"tests/exercises/test0.{extension}", tmp_path / f"test0.{extension}")
+    specifications = exercise.get_specs(str(tmp_path), "test0")
+
+    total = len(specifications["testcases"])
+    monkeypatch.setattr(calibrate, "benchmark", lambda *args, **kwargs: [1.0] * total)
+
+    calibrate_exercise(str(tmp_path), "test0", "tests/solutions/ac_tester.py",
+                       cache_directory=str(tmp_path / "cache"))
+
+    calibrated = exercise.get_specs(str(tmp_path), "test0")
+    assert calibrated["time_limits"] == [calibrate.DEFAULT_MULTIPLIER] * total
+    assert calibrated["testcases"] == specifications["testcases"]
+
+    # calibrating again replaces the time limits.
+    calibrate_exercise(str(tmp_path), "test0", "tests/solutions/ac_tester.py",
+                       cache_directory=str(tmp_path / "cache"))
+    with open(tmp_path / "test0.json") as fd:
+        keys = [key for key, _ in json.load(fd, object_pairs_hook=lambda pairs: pairs)]
+    assert keys.count("time_limits") == 1
+
+
+def test__calibrate_specs(tmp_path, monkeypatch):
+    monkeypatch.setattr(calibrate, "benchmark", lambda *args, **kwargs: [1.0, 2.0])
+    specifications = {"reference": "ac_tester.py", "time_limit": 1.0, "memory_limit": 64,
+                      "judge": "default", "testcases": testcases, "time_limits": [9.0, 9.0]}
+
+    # the stored time limits are kept without the reference solution.
+    calibrate_specs(specifications, str(tmp_path), cache_directory=str(tmp_path / "cache"))
+    assert specifications["time_limits"] == [9.0, 9.0]
+
+    calibrate_specs(specifications, "tests/solutions/", cache_directory=str(tmp_path / "cache"))
+    assert specifications["time_limits"] == [3.0, 6.0]
+
+
+def test__calibrate_exercise__reference_usage(tmp_path, monkeypatch):
+    for extension in ("json", "txt"):
+        shutil.copy(f"tests/exercises/test0.{extension}", tmp_path / f"test0.{extension}")
+    specifications = exercise.get_specs(str(tmp_path), "test0")
+    total = len(specifications["testcases"])
+
+    specifications["reference_usage"] = [[0.5, 1024]] * total
+    with exercise.get_writer(str(tmp_path / "test0.json"), specifications) as writer:
+        for testcase in specifications["testcases"]:
+            writer.write(testcase)
+
+    def no_benchmark(*args, **kwargs):
+        raise AssertionError("the reference solution should not be benchmarked")
+
+    # the time recorded when the outputs were filled in is reused, and
+    # cached for the calibrations when judging.
+    monkeypatch.setattr(calibrate, "benchmark", no_benchmark)
+    calibrate_exercise(str(tmp_path), "test0", "tests/solutions/ac_tester.py",
+                       cache_directory=str(tmp_path / "cache"))
+    calibrated = exercise.get_specs(str(tmp_path), "test0")
+    assert calibrated["time_limits"] == [0.5 * calibrate.DEFAULT_MULTIPLIER] * total
+
+    calibrated["reference"] = "ac_tester.py"
+    calibrate_specs(calibrated, "tests/solutions/", cache_directory=str(tmp_path / "cache"))
+    assert calibrated["time_limits"] == [0.5 * calibrate.DEFAULT_MULTIPLIER] * total
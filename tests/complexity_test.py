@@ -0,0 +1,94 @@
+import _template
+
+import math
+import random
+
+import complexity
+import judge
+from judge import JudgeResult
+
+SIZES = [10, 30, 100, 300, 1000, 3000, 10000]
+
+
+def _usages(growth, sizes=SIZES, noise=0.02, seed=0):
+    rng = random.Random(seed)
+    return [(5.0 + growth(n)) * (1.0 + rng.uniform(-noise, noise)) for n in sizes]
+
+
+def _result(time, memory=0, tle=False):
+    return judge.TestCaseResult([""], [""], [""], [], 0, program_time=time,
+                          program_memory=memory, program_tle=tle)
+
+
+def test__estimate():
+    assert complexity.estimate(SIZES, _usages(lambda n: 0.0)) == "1"
+    assert complexity.estimate(SIZES, _usages(lambda n: 10 * math.log(n))) == "log n"
+    assert complexity.estimate(SIZES, _usages(lambda n: n / 10)) == "n"
+    assert complexity.estimate(SIZES, _usages(lambda n: n * math.log(n) / 10)) == "n log n"
+    assert complexity.estimate(SIZES, _usages(lambda n: n * n / 1000)) == "n^2"
+
+
+def test__estimate__few_sizes():
+    assert complexity.estimate([10, 10, 100, 100], [1, 2, 10, 20]) is None
+    assert complexity.estimate([0, 0.5, 10, 100], [1, 1, 10, 100]) is None
+
+
+def test__estimate__median():
+    sizes = [10, 10, 10, 100, 100, 100, 1000, 1000, 1000]
+    usages = [1, 1, 50, 10, 10, 10, 100, 100, 1]
+    assert complexity.estimate(sizes, usages) == "n"
+
+
+def test__estimate__noise():
+    assert complexity.estimate(SIZES, [0] * len(SIZES)) == "1"
+
+    # Times of a few milliseconds which only differ by the granularity
+    # of the timer are not mistaken for growth.
+    jittery = [1, 0, 0, 1, 0, 2, 4]
+    assert complexity.estimate(SIZES, jittery) == "n"
+    assert complexity.estimate(SIZES, jittery, complexity.TIME_NOISE) == "1"
+
+    results = JudgeResult([
+        _result(t, 1024 * 1024 + 4096 * i) for i, t in enumerate(jittery)
+    ])
+    results.analyze_complexity(SIZES, "1")
+    assert results.complexity["time"] == results.complexity["memory"] == "1"
+    assert results.verdict == judge.ANSWER_CORRECT
+
+
+def test__exceeds():
+    assert complexity.exceeds("n^2", "n log n")
+    assert not complexity.exceeds("n", "n log n")
+    assert not complexity.exceeds(None, "1")
+
+    try:
+        complexity.exceeds("n", "n!")
+        assert False
+    except AssertionError as err:
+        assert "n!" in str(err)
+
+
+def test__analyze_complexity():
+    r = JudgeResult([_result(5 + n * n / 1000, 1000) for n in SIZES])
+    r.analyze_complexity(SIZES)
+    assert r.complexity == {"time": "n^2", "memory": "1", "sizes": 7, "required": None}
+    assert r.verdict == judge.ANSWER_CORRECT
+
+    r.analyze_complexity(SIZES, "n log n")
+    assert r.verdict == judge.COMPLEXITY_EXCEEDED
+
+    r = JudgeResult([_result(5 + n * n / 1000) for n in SIZES])
+    r.analyze_complexity(SIZES, "n^2")
+    assert r.verdict == judge.ANSWER_CORRECT
+
+
+def test__analyze_complexity__stopped():
+    results = [_result(5 + n / 10) for n in SIZES]
+    results[-1] = _result(10000, tle=True)
+    results[-1].verdict = judge.TIME_LIMIT_EXCEEDED
+
+    r = JudgeResult(results)
+    r.analyze_complexity(SIZES, "1")
+    assert r.complexity["sizes"] == 6
+    assert r.complexity["time"] == "n"
+    assert r.verdict == judge.TIME_LIMIT_EXCEEDED
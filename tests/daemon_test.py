@@ -0,0 +1,104 @@
+import _template
+
+import threading
+
+import pytest
+
+import judge
+import protocol
+from daemon import make_server
+from schedule import TimingHistory
+
+tc = 3
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "test0.txt").write_text("test0")
+    (tmp_path / "test0.json").write_text(
+        '{"exercise": "test0", "judge": "default", "time_limit": 6.0, "memory_limit": 64, '
+        '"testcases": [[["1"], ["1"]], [["2"], ["2"]], [["3"], ["3"]]]}'
+    )
+
+    s = make_server("127.0.0.1:0", str(tmp_path), str(tmp_path), 2,
+                    history_directory=str(tmp_path / "timings"))
+    threading.Thread(target=s.serve_forever, daemon=True).start()
+
+    yield s
+
+    s.shutdown()
+    s.server_close()
+
+
+def _submit(s, message):
+    host, port = s.server_address
+    with protocol.connect(f"{host}:{port}", protocol.DAEMON_PORT) as sock:
+        with sock.makefile("rwb") as fd:
+            protocol.send_message(fd, message)
+
+            messages = []
+            while True:
+                m = protocol.receive_message(fd)
+                if m is None:
+                    return messages
+                messages.append(m)
+
+
+def test__daemon__judge(server):
+    for program, verdict in [("echo_tester.py", judge.ANSWER_CORRECT),
+                             ("wa_tester.py", judge.WRONG_ANSWER)]:
+        messages = _submit(server, {"type": "judge", "exercise": "test0",
+                                    "program": f"tests/solutions/{program}"})
+
+        assert [m["type"] for m in messages] == ["specs"] + ["result"] * tc + ["done"]
+        assert messages[0]["specs"]["exercise"] == "test0"
+        assert "testcases" not in messages[0]["specs"]
+
+        results = [judge.TestCaseResult.from_dict(m["result"]) for m in messages[1:-1]]
+        assert [r.testcase_no for r in results] == list(range(tc))
+        assert all(r.verdict == verdict for r in results)
+
+
+def test__daemon__history(server, tmp_path):
+    for _ in range(2):
+        _submit(server, {"type": "judge", "exercise": "test0",
+                         "program": "tests/solutions/echo_tester.py"})
+
+    # Every judging updates the timings which order the next ones.
+    assert server.history("test0").runs == {0: 2, 1: 2, 2: 2}
+    saved = TimingHistory.for_exercise("test0", str(tmp_path / "timings"))
+    assert saved.runs == {0: 2, 1: 2, 2: 2}
+    assert sorted(saved.times) == [0, 1, 2]
+
+
+def test__daemon__cached(server):
+    specs = server.exercises.get("test0")
+    assert server.exercises.get("test0") is specs
+
+
+def test__daemon__errors(server):
+    messages = _submit(server, {"type": "judge", "exercise": "test1",
+                                "program": "tests/solutions/ac_tester.py"})
+    assert [m["type"] for m in messages] == ["error"]
+
+    messages = _submit(server, {"type": "judge", "exercise": "test0",
+                                "program": "tests/solutions/hopefullynothingiscalledthis.py"})
+    assert [m["type"] for m in messages] == ["error"]
+
+
+@pytest.mark.skipif(not protocol.is_unix_address("sock"), reason="requires Unix sockets")
+def test__daemon__unix(tmp_path):
+    s = make_server(str(tmp_path / "sjudge.sock"), "tests/exercises/", "tests/exercises/", 1,
+                    history_directory=str(tmp_path / "timings"))
+    threading.Thread(target=s.serve_forever, daemon=True).start()
+
+    try:
+        with protocol.connect(str(tmp_path / "sjudge.sock"), protocol.DAEMON_PORT) as sock:
+            with sock.makefile("rwb") as fd:
+                protocol.send_message(fd, {"type": "judge", "exercise": "test0",
+                                           "program": "tests/solutions/ac_tester.py"})
+                assert protocol.receive_message(fd)["type"] == "specs"
+                assert protocol.receive_message(fd)["type"] == "done"
+    finally:
+        s.shutdown()
+        s.server_close()
@@ -0,0 +1,94 @@
+import _template
+
+from diff import first_difference, CONTEXT_TOKENS, ELLIPSIS
+from judge import judge_one, WRONG_ANSWER
+from command import get_command
+
+
+def test__first_difference__equal():
+    assert first_difference([], []) is None
+    assert first_difference(["1 2", " 3 "], ["1  2", "3"]) is None
+
+
+def test__first_difference__line():
+    received = [str(i) for i in range(100000)]
+    expected = list(received)
+    expected[54321] = "x"
+
+    d = first_difference(iter(received), iter(expected))
+    assert d["line"] == 54322
+    assert d["token"] == 1
+    assert d["context"] == [[54320, "54319"], [54321, "54320"]]
+    assert d["expected"] == "x"
+    assert d["received"] == "54321"
+
+
+def test__first_difference__token():
+    received = [" ".join(str(i) for i in range(1000))]
+    expected = [received[0].replace(" 500 ", " 0 ")]
+
+    d = first_difference(received, expected)
+    assert d["line"] == 1
+    assert d["token"] == 501
+    assert d["context"] == []
+    assert d["expected"].split()[CONTEXT_TOKENS + 1] == "0"
+    assert d["received"].split()[CONTEXT_TOKENS + 1] == "500"
+    assert d["received"].startswith(ELLIPSIS) and d["received"].endswith(ELLIPSIS)
+
+
+def test__first_difference__length():
+    d = first_difference(["a", "b"], ["a", "b", "c"])
+    assert d["line"] == 3
+    assert d["expected"] == "c"
+    assert d["received"] is None
+
+    d = first_difference(["a b"], ["a b c"])
+    assert d["token"] == 3
+    assert d["received"] == "a b"
+
+
+def test__judge_one__difference():
+    tc = judge_one(get_command("tests/solutions/echo_tester.py"), ["a", "b", "c"],
+                   ["a", "b", "d"])
+    assert tc.verdict == WRONG_ANSWER
+    assert tc.program_difference["line"] == 3
+    assert tc.to_dict()["program_difference"] == tc.program_difference
+
+
+def test__first_difference__float_judge():
+    import judges.float_judge
+
+    # the first difference is the first one which the judge does not tolerate.
+    received = ["1.000000001 2.5", "3 4"]
+    expected = ["1.0 2.5", "3 5"]
+
+    d = first_difference(received, expected, judges.float_judge.compare_lines)
+    assert d["line"] == 2
+    assert d["token"] == 2
+    assert first_difference(received[:1], expected[:1], judges.float_judge.compare_lines) is None
+
+
+def test__first_difference__default_judge():
+    import judges.default_judge
+
+    d = first_difference(["1  2"], ["1 2"], judges.default_judge.compare_lines)
+    assert d["line"] == 1
+    assert d["token"] == 2
+    assert first_difference(["  1 2 "], ["1 2"], judges.default_judge.compare_lines) is None
+
+
+def test__judge_one__float_difference():
+    tc = judge_one(get_command("tests/solutions/echo_tester.py"), ["1.000000001", "2"],
+                   ["1", "3"], judge="float")
+    assert tc.verdict == WRONG_ANSWER
+    assert tc.program_difference["line"] == 2
+    assert tc.program_stdout == []
+
+
+def test__differing_token():
+    from diff import differing_token
+
+    assert differing_token("abc def", "abc deg") == 1
+    assert differing_token("ab", "abc") == 0
+    assert differing_token("a  b", "a b") == 1
+    assert differing_token("", "a") == 0
@@ -0,0 +1,152 @@
+import _template
+
+import os
+import threading
+import time
+
+import pytest
+
+import distributed
+import judge
+from distributed import WorkerServer
+from distributed import exercise_hash
+from distributed import judge_distributed
+from distributed import parse_address
+
+ml, tl, tc = (32, 6, 5)
+
+
+@pytest.fixture
+def workers(tmp_path):
+    servers = []
+    for i in range(2):
+        server = WorkerServer(("127.0.0.1", 0), str(tmp_path / f"cache{i}"))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+
+    yield servers
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _addresses(servers):
+    return [server.server_address for server in servers]
+
+
+def test__parse_address():
+    assert parse_address("localhost:1234") == ("localhost", 1234)
+    assert parse_address("localhost")[0] == "localhost"
+
+    with pytest.raises(AssertionError):
+        parse_address("localhost:port")
+
+
+def test__judge_distributed__ac(workers):
+    testcases = [([str(i)], [str(i)]) for i in range(tc)]
+    seen = []
+
+    r = judge_distributed(_addresses(workers), "tests/solutions/echo_tester.py", testcases,
+                          time_limit=tl, memory_limit=ml,
+                          progress_hook=lambda t: seen.append(t.testcase_no))
+    assert r.verdict == judge.ANSWER_CORRECT
+    assert r.passed == r.total == tc
+    assert seen == list(range(tc))
+    assert [t.exercise_input for t in r] == [i for i, _ in testcases]
+
+    h = exercise_hash(testcases)
+    assert any(h in server.exercises for server in workers)
+
+
+def test__judge_distributed__wa(workers):
+    testcases = [([""], [""]) for _ in range(tc)]
+    r = judge_distributed(_addresses(workers), "tests/solutions/wa_tester.py", testcases,
+                          time_limit=tl, memory_limit=ml)
+    assert r.verdict == judge.WRONG_ANSWER
+    assert r.passed == 0
+    assert r.total == tc
+
+
+def test__judge_distributed__dead_worker(workers):
+    testcases = [([""], [""]) for _ in range(tc)]
+    addresses = _addresses(workers) + [("127.0.0.1", 1)]
+
+    r = judge_distributed(addresses, "tests/solutions/ac_tester.py", testcases,
+                          time_limit=tl, memory_limit=ml)
+    assert r.passed == r.total == tc
+
+
+def test__judge_distributed__no_workers():
+    with pytest.raises(AssertionError):
+        judge_distributed([("127.0.0.1", 1)], "tests/solutions/ac_tester.py", [([""], [""])])
+
+
+def test__judge_distributed__stopped(workers):
+    testcases = [([str(i)], [str(i)]) for i in range(400)]
+
+    def interrupt(tc):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        judge_distributed(_addresses(workers), "tests/solutions/echo_tester.py", testcases,
+                          time_limit=tl, memory_limit=ml, progress_hook=interrupt)
+
+    # The workers are not kept busy with results which are not needed.
+    deadline = time.monotonic() + 3
+    while any(t.name.startswith(distributed._DRIVER_NAME) for t in threading.enumerate()):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test__judge_distributed__reverify(workers, monkeypatch):
+    testcases = [([""], [""]) for _ in range(2)]
+    r = judge_distributed(_addresses(workers), "tests/solutions/ac_tester.py", testcases,
+                          time_limits=[0.001, 0.001], memory_limit=ml, reverify_band=0.0)
+    assert all(not t.program_attempts for t in r)
+
+    # A wide band makes every time borderline, so it is verified again.
+    r = judge_distributed(_addresses(workers), "tests/solutions/ac_tester.py", testcases,
+                          time_limits=[tl, tl], memory_limit=ml, reverify_band=1.0)
+    assert [t.testcase_no for t in r] == [0, 1]
+    assert all(len(t.program_attempts) == judge.REVERIFY_RUNS for t in r)
+
+
+def test__judge_distributed__cached(workers):
+    testcases = [([""], [""]) for _ in range(tc)]
+    judge_distributed(_addresses(workers), "tests/solutions/ac_tester.py", testcases)
+
+    for server in workers:
+        server.exercises.clear()
+
+    r = judge_distributed(_addresses(workers), "tests/solutions/ac_tester.py", testcases)
+    assert r.passed == r.total == tc
+
+
+def test__worker_server__tampered_cache(tmp_path):
+    server = WorkerServer(("127.0.0.1", 0), str(tmp_path / "cache"))
+    try:
+        testcases = [[["1"], ["1"]]]
+        h = exercise_hash(testcases)
+        server.add_exercise(h, testcases)
+
+        (tmp_path / "cache" / f"{h}.json").write_text('[[["1"], ["2"]]]')
+        server.exercises.clear()
+        assert server.get_exercise(h) is None
+    finally:
+        server.server_close()
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="requires POSIX permissions")
+def test__worker_server__shared_cache(tmp_path):
+    directory = tmp_path / "cache"
+    directory.mkdir()
+    directory.chmod(0o777)
+
+    server = WorkerServer(("127.0.0.1", 0), str(directory))
+    try:
+        testcases = [[["1"], ["1"]]]
+        with pytest.raises(AssertionError):
+            server.add_exercise(exercise_hash(testcases), testcases)
+    finally:
+        server.server_close()
@@ -1,12 +1,16 @@
 import _template
 
 import copy
+import json
 import pytest
 
+import exercise
+from exercise import ExerciseWriter
 from exercise import exists
 from exercise import get_description
 from exercise import get_specs
 from exercise import list_exercises
+from exercise import stream_specs
 
 DEFAULT_SPECS = {
     "exercise": None,
@@ -75,6 +79,36 @@ def test__get_specs__no_exist():
         get_specs("tests/exercise_test.py", "test1")
 
 
+def test__stream_specs(tmp_path, monkeypatch):
+    d = copy.deepcopy(DEFAULT_SPECS)
+    d["exercise"] = "streamed"
+    d["testcases"] = [[["1", "22"], ["333"]], [[], []], [["4"], ["5 6"]]]
+    d["time_limits"] = [1.5, 2.25, 10]
+
+    (tmp_path / "streamed.txt").write_text("streamed")
+    (tmp_path / "streamed.json").write_text(json.dumps(d, indent=1))
+
+    # the file is read a few characters at a time, so that values are cut
+    # off by the reads.
+    monkeypatch.setattr(exercise, "_STREAM_SIZE", 3)
+    specs = stream_specs(str(tmp_path), "streamed")
+
+    assert len(specs["testcases"]) == 3
+    assert list(specs["testcases"]) == d["testcases"]
+    assert list(specs["testcases"]) == d["testcases"]
+    assert dict(specs, testcases=d["testcases"]) == d
+
+
+def test__stream_specs__corrupt(tmp_path):
+    with pytest.raises(AssertionError):
+        stream_specs("tests/exercises/", "test1")
+
+    (tmp_path / "cut.txt").write_text("cut")
+    (tmp_path / "cut.json").write_text(json.dumps(DEFAULT_SPECS)[:-5])
+    with pytest.raises(AssertionError):
+        stream_specs(str(tmp_path), "cut")
+
+
 def test__list_exercises():
     assert list_exercises("tests/") == []
     assert sorted(list_exercises("tests/exercises/")) == ["test0", "test1", "test2"]
@@ -86,3 +120,26 @@ def test__list_exercises__no_exist():
 
     with pytest.raises(AssertionError):
         list_exercises("tests/exercise_test.py")
+
+
+def test__exercise_writer(tmp_path):
+    d = copy.deepcopy(DEFAULT_SPECS)
+    d["exercise"] = "written"
+    d["testcases"] = [[["1"], ["2"]], [["3"], ["4"]]]
+
+    (tmp_path / "written.txt").write_text("written")
+    with ExerciseWriter(str(tmp_path / "written.json"), d) as writer:
+        for testcase in d["testcases"]:
+            writer.write(testcase)
+
+    assert writer.testcases == 2
+    assert get_specs(str(tmp_path), "written") == d
+
+
+def test__exercise_writer__abort(tmp_path):
+    with pytest.raises(KeyboardInterrupt):
+        with ExerciseWriter(str(tmp_path / "written.json"), DEFAULT_SPECS) as writer:
+            writer.write([["1"], ["2"]])
+            raise KeyboardInterrupt
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,76 @@
+import _template
+
+import json
+
+from exercise import get_specs
+from generator import case_random
+from generator import generate
+
+SPECS = {
+    "exercise": "generated",
+    "judge": "default",
+    "time_limit": 1.0,
+    "memory_limit": 256,
+}
+
+
+def make_testcase(rng, case_number):
+    x = rng.randrange(10 ** 9)
+    return [str(case_number), str(x)], [str(case_number + x)]
+
+
+def _generate(tmp_path, name, **kwargs):
+    path = tmp_path / f"{name}.json"
+    (tmp_path / f"{name}.txt").write_text(name)
+    generate(str(path), dict(SPECS, exercise=name), make_testcase, 40, **kwargs)
+    return path
+
+
+def test__case_random():
+    assert case_random(0, 5).random() == case_random(0, 5).random()
+    assert case_random(0, 5).random() != case_random(0, 6).random()
+    assert case_random(0, 5).random() != case_random(1, 5).random()
+
+
+def test__generate(tmp_path):
+    _generate(tmp_path, "test0", processes=1)
+    specs = get_specs(str(tmp_path), "test0")
+
+    assert specs["exercise"] == "test0"
+    assert len(specs["testcases"]) == 40
+    assert [tc[0][0] for tc in specs["testcases"]] == [str(i) for i in range(40)]
+
+
+def test__generate__empty(tmp_path):
+    _generate(tmp_path, "test0", processes=1)
+    path = tmp_path / "empty.json"
+    generate(str(path), SPECS, make_testcase, 0, processes=1)
+    assert json.loads(path.read_text())["testcases"] == []
+
+
+def test__generate__deterministic(tmp_path):
+    a = _generate(tmp_path, "test0", processes=1, seed=3)
+    b = _generate(tmp_path, "test1", processes=2, seed=3)
+    c = _generate(tmp_path, "test2", processes=1, seed=4)
+
+    a_cases = json.loads(a.read_text())["testcases"]
+    assert a_cases == json.loads(b.read_text())["testcases"]
+    assert a_cases != json.loads(c.read_text())["testcases"]
+
+
+def test__generate__compressed(tmp_path):
+    a = _generate(tmp_path, "test0", processes=1)
+    b = _generate(tmp_path, "test1", processes=2, compression="gzip")
+
+    packed = get_specs(str(tmp_path), "test1")["testcases"]
+    assert [list(map(list, tc)) for tc in packed] == json.loads(a.read_text())["testcases"]
+
+
+def test__generate__sizes(tmp_path):
+    path = tmp_path / "sized.json"
+    (tmp_path / "sized.txt").write_text("sized")
+    generate(str(path), dict(SPECS, exercise="sized"), make_testcase, 10,
+             processes=1, size_function=lambda tc: int(tc[0][0]))
+
+    specs = get_specs(str(tmp_path), "sized")
+    assert specs["sizes"] == list(range(10))
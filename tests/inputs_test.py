@@ -0,0 +1,90 @@
+import _template
+
+import os
+
+import pytest
+
+import inputs
+from inputs import encode
+from inputs import evict
+from inputs import materialize
+from inputs import open_input
+
+
+def test__encode():
+    assert encode([]) == b""
+    assert encode([""]) == b"\n"
+    assert encode(["abc", "def"]) == b"abc\ndef\n"
+
+
+def test__materialize(tmp_path):
+    directory = str(tmp_path / "inputs")
+    path = materialize(["abc", "def"], directory)
+
+    with open(path, "rb") as fd:
+        assert fd.read() == b"abc\ndef\n"
+
+    assert materialize(["abc", "def"], directory) == path
+    assert materialize(["abc", "de"], directory) != path
+
+
+def test__materialize__reused(tmp_path):
+    directory = str(tmp_path / "inputs")
+    path = materialize(["abc"], directory)
+    size = os.stat(path).st_size
+
+    materialize(["abc"], directory)
+    assert os.stat(path).st_size == size
+    assert len(os.listdir(os.path.dirname(path))) == 1
+
+
+def test__materialize__remembered(tmp_path, monkeypatch):
+    directory = str(tmp_path / "inputs")
+    test_input = ["abc"]
+    path = materialize(test_input, directory)
+
+    def no_encode(test_input):
+        raise AssertionError("the input should not be encoded again")
+
+    monkeypatch.setattr(inputs, "encode", no_encode)
+    assert materialize(test_input, directory) == path
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="requires POSIX permissions")
+def test__materialize__not_private(tmp_path):
+    directory = tmp_path / "inputs"
+    directory.mkdir(mode=0o755)
+    directory.chmod(0o755)
+
+    with pytest.raises(PermissionError):
+        materialize(["abc"], str(directory))
+
+
+def test__open_input(tmp_path):
+    directory = str(tmp_path / "inputs")
+    test_input = ["abc"]
+
+    fd = open_input(test_input, directory)
+    try:
+        assert os.read(fd, 16) == b"abc\n"
+    finally:
+        os.close(fd)
+
+    # an input evicted since it was materialized is written again.
+    evict(directory, 0)
+    fd = open_input(test_input, directory)
+    try:
+        assert os.read(fd, 16) == b"abc\n"
+    finally:
+        os.close(fd)
+
+
+def test__evict(tmp_path):
+    directory = str(tmp_path / "inputs")
+    old = materialize(["old"], directory)
+    new = materialize(["new"], directory)
+    os.utime(old, ns=(0, 0))
+
+    evict(directory, os.stat(new).st_size)
+    assert not os.path.exists(old)
+    assert os.path.exists(new)
@@ -0,0 +1,101 @@
+import _template
+
+import pytest
+
+import os
+import sys
+import time
+
+import interactive
+import judge
+from command import get_command
+
+ml, tl = (64, 6)
+
+INTERACTOR = get_command("tests/solutions/guess_interactor.py")
+
+
+def _judge(program, test_input):
+    return judge.judge_one(get_command(f"tests/solutions/{program}"), test_input, [],
+                           time_limit=tl, memory_limit=ml, interactor=INTERACTOR)
+
+
+def test__interactive__ac():
+    tc = _judge("guess_tester.py", ["123456789 30"])
+    assert tc.verdict == judge.ANSWER_CORRECT
+    assert tc.program_memory > 0
+
+
+def test__interactive__wa():
+    tc = _judge("guess_tester.py", ["123456789 5"])
+    assert tc.verdict == judge.WRONG_ANSWER
+    assert tc.judge_message == ["no correct guess in 5 queries"]
+
+
+def test__interactive__protocol_violation():
+    tc = _judge("wa_tester.py", ["5 30"])
+    assert tc.verdict == judge.PROTOCOL_VIOLATION
+    assert tc.judge_message == ["expected a guess, got 'wa'"]
+
+
+def test__interactive__rte_tle():
+    # The interactor rejects a program which stops talking to it.
+    tc = _judge("rte_tester.py", ["5 30"])
+    assert tc.verdict == judge.PROTOCOL_VIOLATION
+    assert any(tc.program_stderr)
+
+    tc = judge.judge_one(get_command("tests/solutions/tle_tester.py"), ["5 30"], [],
+                         time_limit=0.5, memory_limit=ml, interactor=INTERACTOR)
+    assert tc.verdict == judge.TIME_LIMIT_EXCEEDED
+
+
+def test__interactive__latency(tmp_path):
+    # 10000 exchanges between two processes, each blocking on the other.
+    ping = tmp_path / "ping.py"
+    ping.write_text("import sys\n"
+                    "for i in range(int(open(sys.argv[1]).read())):\n"
+                    "    print(i, flush=True)\n"
+                    "    assert int(sys.stdin.readline()) == i\n")
+    pong = tmp_path / "pong.py"
+    pong.write_text("import sys\n"
+                    "for line in sys.stdin:\n"
+                    "    print(line, end='', flush=True)\n")
+
+    start = time.monotonic()
+    tc = judge.judge_one(f"{sys.executable} {pong}", ["10000"], [], time_limit=tl,
+                         memory_limit=ml, interactor=f"{sys.executable} {ping}")
+    assert tc.verdict == judge.ANSWER_CORRECT
+    assert time.monotonic() - start < 3
+
+
+def test__prepare_specs(tmp_path):
+    specs = {"interactor": "guess_interactor.py"}
+    interactive.prepare_specs(specs, "tests/solutions/")
+    assert specs["interactor"] == get_command(os.path.join("tests/solutions/",
+                                                           "guess_interactor.py"))
+
+    with pytest.raises(AssertionError):
+        interactive.prepare_specs({"interactor": "missing.py"}, str(tmp_path))
+
+    specs = {}
+    interactive.prepare_specs(specs, str(tmp_path))
+    assert specs == {}
+
+
+def test__interactive__uncached(monkeypatch):
+    import inputs
+
+    def materialize(test_input, directory=inputs.CACHE_DIRECTORY):
+        raise PermissionError(directory)
+
+    # The input and output are written out for this run only.
+    monkeypatch.setattr(inputs, "materialize", materialize)
+    assert _judge("guess_tester.py", ["123456789 30"]).verdict == judge.ANSWER_CORRECT
+
+
+def test__interactive__vanished_pack(tmp_path):
+    import pack
+
+    test_input = pack.PackedIO(str(tmp_path / "missing.pack"), pack.GZIP, 0, 10)
+    with pytest.raises(AssertionError, match="the test case could not be read"):
+        _judge("guess_tester.py", test_input)
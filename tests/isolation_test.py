@@ -0,0 +1,69 @@
+import _template
+
+import pytest
+
+import os
+import sys
+
+import isolation
+from judge import judge_one
+from command import get_command
+from run import run
+
+MEBIBYTE = 1024 * 1024
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "sched_setaffinity"),
+                                reason="requires CPU affinity")
+
+
+def _isolation(**kwargs):
+    return isolation.Isolation([min(os.sched_getaffinity(0))], **kwargs)
+
+
+def test__reserve():
+    with pytest.raises(AssertionError):
+        isolation.reserve(0)
+    with pytest.raises(AssertionError):
+        isolation.reserve(len(os.sched_getaffinity(0)))
+
+    if len(os.sched_getaffinity(0)) > 1:
+        i = isolation.reserve(1)
+        assert len(i.cores) == 1
+        assert set(i.cores) | set(i.supervisor_cores) == os.sched_getaffinity(0)
+
+
+def test__run__pinned():
+    i = _isolation()
+    previous = os.sched_getaffinity(0)
+
+    code = "import os; print(sorted(os.sched_getaffinity(0)))"
+    c = run([sys.executable, "-c", code], "", memory_limit=64 * MEBIBYTE, time_limit=6,
+            isolation=i)
+    assert c.stdout.strip() == str(i.cores)
+    assert os.sched_getaffinity(0) == previous
+    assert 0.0 <= c.background_load <= 1.0
+
+
+def test__run__priority():
+    i = _isolation(priority=5)
+
+    code = "import os, time; time.sleep(0.2); print(os.getpriority(os.PRIO_PROCESS, 0))"
+    c = run([sys.executable, "-c", code], "", memory_limit=64 * MEBIBYTE, time_limit=6,
+            isolation=i)
+    assert c.stdout.strip() == str(os.getpriority(os.PRIO_PROCESS, 0) + 5)
+
+
+def test__background_load():
+    i = _isolation()
+
+    # The judged programs are not counted as background load.
+    i.account(1000.0)
+    assert i.background_load() == 0.0
+    assert 0.0 <= i.background_load() <= 1.0
+
+
+def test__judge_one__noise():
+    tc = judge_one(get_command("tests/solutions/echo_tester.py"), ["abc"], ["abc"],
+                   isolation=_isolation())
+    assert tc.passed
+    assert 0.0 <= tc.program_noise <= 1.0
@@ -0,0 +1,135 @@
+import _template
+
+import os
+
+import journal
+import judge
+import pack
+from command import get_command
+from journal import Journal
+from judge import judge_program
+
+ECHO = get_command("tests/solutions/echo_tester.py")
+WA = get_command("tests/solutions/wa_tester.py")
+TESTCASES = [(["1"], ["1"]), (["2"], ["3"]), (["3"], ["3"])]
+
+
+def test__exercise_hash(tmp_path):
+    spec_path = tmp_path / "test0.json"
+    spec_path.write_text('{"time_limit": 1.0}')
+    specs = {"time_limit": 1.0, "memory_limit": 64, "testcases": []}
+
+    h = journal.exercise_hash(str(spec_path), specs)
+    assert h == journal.exercise_hash(str(spec_path), dict(specs, testcases=[1]))
+    assert h != journal.exercise_hash(str(spec_path), dict(specs, time_limit=2.0))
+
+    spec_path.write_text('{"time_limit": 1.5}')
+    assert h != journal.exercise_hash(str(spec_path), specs)
+
+
+def test__exercise_hash__pack(tmp_path):
+    spec_path = tmp_path / "test0.json"
+    spec_path.write_text('{"time_limit": 1.0}')
+    pack_path = tmp_path / "test0.pack"
+    pack_path.write_bytes(b"1")
+    specs = {"time_limit": 1.0, "testcases": pack.PackedTestcases(
+        str(tmp_path), {"pack": "test0.pack", "compression": "gzip", "index": []}
+    )}
+
+    h = journal.exercise_hash(str(spec_path), specs)
+    assert h == journal.exercise_hash(str(spec_path), specs)
+
+    # The test cases of a packed exercise change with its pack.
+    pack_path.write_bytes(b"22")
+    assert h != journal.exercise_hash(str(spec_path), specs)
+
+
+def test__journal__resume(tmp_path):
+    path = str(tmp_path / "journals" / "test0.jsonl")
+
+    j = Journal(path, "program", "exercise")
+    first = judge_program(ECHO, TESTCASES[:2], journal=j)
+    j.close()
+
+    j = Journal(path, "program", "exercise")
+    assert sorted(j.completed) == [0, 1]
+
+    # The journaled test cases are not run again (the program would
+    # now fail on all of them).
+    resumed = judge_program(WA, TESTCASES, journal=j)
+    j.close()
+
+    assert [tc.verdict for tc in resumed] == [
+        judge.ANSWER_CORRECT, judge.WRONG_ANSWER, judge.WRONG_ANSWER
+    ]
+    assert resumed[1].program_difference == first[1].program_difference
+    assert resumed[1].exercise_input == ["2"]
+    assert [tc.testcase_no for tc in resumed] == [0, 1, 2]
+    assert sorted(Journal(path, "program", "exercise").completed) == [0, 1, 2]
+
+
+def test__journal__mismatch(tmp_path):
+    path = str(tmp_path / "test0.jsonl")
+
+    j = Journal(path, "program", "exercise")
+    judge_program(ECHO, TESTCASES[:1], journal=j)
+    j.close()
+
+    assert Journal(path, "program", "exercise").completed
+    assert not Journal(path, "other", "exercise").completed
+    assert not Journal(path, "program", "exercise").completed
+    assert not Journal(path, "program", "exercise", resume=False).completed
+
+
+def test__journal__cut_off(tmp_path):
+    path = tmp_path / "test0.jsonl"
+
+    j = Journal(str(path), "program", "exercise")
+    judge_program(ECHO, TESTCASES, journal=j)
+    j.close()
+
+    content = path.read_text()
+    path.write_text(content[:-10])
+
+    j = Journal(str(path), "program", "exercise")
+    assert sorted(j.completed) == [0, 1]
+    j.record(2, judge.judge_one(ECHO, ["3"], ["3"]))
+    j.close()
+
+    assert sorted(Journal(str(path), "program", "exercise").completed) == [0, 1, 2]
+
+
+def test__journal__remove(tmp_path):
+    path = tmp_path / "test0.jsonl"
+    Journal(str(path), "program", "exercise").remove()
+    assert not path.exists()
+
+
+def test__journal__resumable(tmp_path):
+    path = str(tmp_path / "test0.jsonl")
+    assert journal.resumable(path, "program", "exercise") == 0
+
+    j = Journal(path, "program", "exercise")
+    judge_program(ECHO, TESTCASES[:2], journal=j)
+    j.close()
+
+    assert journal.resumable(path, "program", "exercise") == 2
+    assert journal.resumable(path, "other", "exercise") == 0
+
+
+def test__journal__sync(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, "fsync", synced.append)
+    monkeypatch.setattr(journal, "SYNC_INTERVAL", 3600)
+
+    path = str(tmp_path / "test0.jsonl")
+    j = Journal(path, "program", "exercise")
+    for i in range(10):
+        j.record(i, judge.TestCaseResult([""], [""], [""], [], 0))
+
+    # The results are written as they are recorded, but only synced to
+    # disk once the journal is closed.
+    assert not synced
+    assert journal.resumable(path, "program", "exercise") == 10
+    j.close()
+    assert len(synced) == 1
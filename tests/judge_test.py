@@ -57,3 +57,64 @@ def test__judge_program__wa():
     assert r.total == tc
     assert r.maximum_memory <= MEBIBYTE * ml
     assert r.maximum_time <= 1000 * tl
+
+
+def test__testcase_result__dict():
+    c = get_command("tests/solutions/wa_tester.py")
+    r = judge_program(c, [([""], [""])], time_limit=tl, memory_limit=ml)
+
+    d = r[0].to_dict()
+    assert judge.TestCaseResult.from_dict(d).to_dict() == d
+    assert d["verdict"] == judge.WRONG_ANSWER
+    assert d["program_difference"]["received"] == "wa"
+
+    # only the window around the difference is kept.
+    assert d["program_stdout"] == d["exercise_output"] == []
+
+
+def test__judge_program__executor():
+    import concurrent.futures
+
+    c = get_command("tests/solutions/echo_tester.py")
+    testcases = [([str(i)], [str(i)]) for i in range(tc)]
+    seen = []
+
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        r = judge_program(c, testcases, time_limit=tl, memory_limit=ml, executor=executor,
+                          progress_hook=lambda t: seen.append(t.testcase_no))
+
+    assert r.passed == r.total == tc
+    assert seen == list(range(tc))
+
+
+def _result(time, verdict=judge.ANSWER_CORRECT):
+    return judge.TestCaseResult([""], [""], [""], [], 0, verdict=verdict, program_time=time,
+                                program_tle=verdict == judge.TIME_LIMIT_EXCEEDED)
+
+
+def test__reverify__median():
+    reruns = iter([_result(1030), _result(970)])
+    r = judge._reverify(_result(990), lambda limit: next(reruns), 1.0, 0.05, 3)
+    assert r.verdict == judge.ANSWER_CORRECT
+    assert r.program_time == 990
+    assert r.program_attempts == [(990, judge.ANSWER_CORRECT),
+                                  (1030, judge.TIME_LIMIT_EXCEEDED),
+                                  (970, judge.ANSWER_CORRECT)]
+
+    reruns = iter([_result(1020), _result(1010)])
+    r = judge._reverify(_result(1001), lambda limit: next(reruns), 1.0, 0.05, 3)
+    assert r.verdict == judge.TIME_LIMIT_EXCEEDED
+    assert not r.passed
+    assert len(r.program_attempts) == 3
+
+
+def test__judge_program__reverify():
+    c = get_command("tests/solutions/tle_tester.py")
+    r = judge_program(c, [([""], [""])], time_limit=0.5, memory_limit=ml)
+    assert r.verdict == judge.TIME_LIMIT_EXCEEDED
+
+    # A run stopped at the raised limit is decisive.
+    assert r[0].program_attempts == []
+
+    r = judge_program(c, [([""], [""])], time_limit=0.5, memory_limit=ml, reverify_band=0)
+    assert r[0].program_attempts == []
@@ -0,0 +1,130 @@
+import _template
+
+import concurrent.futures
+import urllib.request
+
+import pytest
+
+import judge
+import metrics
+from command import get_command
+from judge import judge_program
+
+
+@pytest.fixture
+def registry():
+    yield metrics.enable()
+    metrics.disable()
+
+
+def test__counter():
+    c = metrics.Counter("c_total", "A counter.", ("a", "b"))
+    c.inc("x", 'y"')
+    c.inc("x", 'y"', amount=2)
+    c.inc("z", "w")
+
+    assert c.get("x", 'y"') == 3
+    assert c.expose().splitlines() == [
+        "# HELP c_total A counter.",
+        "# TYPE c_total counter",
+        'c_total{a="x",b="y\\""} 3.0',
+        'c_total{a="z",b="w"} 1.0',
+    ]
+
+
+def test__summary():
+    s = metrics.Summary("s_seconds", "A summary.")
+    for i in range(1, 101):
+        s.observe(i)
+
+    assert s.quantile(0.5) == 51
+    assert s.quantile(0.99) == 100
+    assert s.quantile(0.5, "missing") is None
+    assert s.expose().splitlines() == [
+        "# HELP s_seconds A summary.",
+        "# TYPE s_seconds summary",
+        's_seconds{quantile="0.5"} 51.0',
+        's_seconds{quantile="0.99"} 100.0',
+        "s_seconds_sum 5050.0",
+        "s_seconds_count 100",
+    ]
+
+
+def test__summary__window():
+    s = metrics.Summary("s_seconds", "A summary.", ("exercise",))
+    for i in range(metrics.SUMMARY_WINDOW + 10):
+        s.observe(1000 if i < 10 else 1, "test0")
+
+    assert s.count("test0") == metrics.SUMMARY_WINDOW + 10
+    assert s.quantile(0.99, "test0") == 1
+
+
+def test__histogram():
+    h = metrics.Histogram("h_milliseconds", "A histogram.", (10, 1), ("exercise",))
+    for value in (0.5, 1, 5, 10, 50):
+        h.observe(value, "test0")
+
+    assert h.count("test0") == 5
+    assert h.expose().splitlines() == [
+        "# HELP h_milliseconds A histogram.",
+        "# TYPE h_milliseconds histogram",
+        'h_milliseconds_bucket{exercise="test0",le="1.0"} 2',
+        'h_milliseconds_bucket{exercise="test0",le="10.0"} 4',
+        'h_milliseconds_bucket{exercise="test0",le="+Inf"} 5',
+        'h_milliseconds_sum{exercise="test0"} 66.5',
+        'h_milliseconds_count{exercise="test0"} 5',
+    ]
+
+
+def test__number():
+    assert metrics._number(1) == "1.0"
+    assert metrics._number(float("inf")) == "+Inf"
+    assert metrics._number(float("-inf")) == "-Inf"
+    assert metrics._number(float("nan")) == "NaN"
+    assert metrics._number(None) == "NaN"
+
+
+def test__disabled():
+    metrics.disable()
+    judge_program(get_command("tests/solutions/ac_tester.py"), [([""], ["ac"])])
+    assert metrics.REGISTRY is None
+
+
+def test__judge_program(registry):
+    c = get_command("tests/solutions/echo_tester.py")
+    testcases = [(["1"], ["1"]), (["2"], ["3"]), (["3"], ["3"])]
+
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        judge_program(c, testcases, exercise="test0", executor=executor)
+
+    assert registry.testcases.get("test0", judge.ANSWER_CORRECT) == 2
+    assert registry.testcases.get("test0", judge.WRONG_ANSWER) == 1
+    assert registry.programs.get("test0", judge.WRONG_ANSWER) == 1
+    assert registry.program_time.count("test0") == 3
+    assert registry.queue_wait.count("testcase") == 3
+    assert registry.supervisor_overhead.count() == 3
+    overhead = registry.supervisor_overhead.quantile(0.5)
+    assert 0 <= overhead < registry.judging_time.quantile(0.5, "test0")
+    assert 'sjudge_program_time_milliseconds_bucket{exercise="test0",le="+Inf"} 3' in (
+        registry.expose().splitlines()
+    )
+
+
+def test__serve(registry, tmp_path):
+    registry.testcases.inc("test0", judge.ANSWER_CORRECT)
+
+    server = metrics.serve("127.0.0.1:0")
+    try:
+        host, port = server.server_address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            assert response.headers["Content-Type"] == metrics.CONTENT_TYPE
+            body = response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert body == registry.expose()
+    assert 'sjudge_testcases_total{exercise="test0",verdict="Answer Correct"} 1.0' in body
+
+    metrics.write(str(tmp_path / "metrics.prom"))
+    assert (tmp_path / "metrics.prom").read_text() == body
@@ -0,0 +1,80 @@
+import _template
+
+import pytest
+
+import pack
+from exercise import get_specs
+from judge import judge_program
+from command import get_command
+from pack import PackWriter
+
+SPECS = {
+    "exercise": "packed",
+    "judge": "default",
+    "time_limit": 6.0,
+    "memory_limit": 64,
+}
+
+TESTCASES = [
+    (["1", "2 3"], ["1", "2 3"]),
+    ([""], [""]),
+    ([str(i) for i in range(1000)], [str(i) for i in range(1000)]),
+]
+
+
+def _pack(tmp_path, compression=pack.GZIP):
+    (tmp_path / "packed.txt").write_text("packed")
+    with PackWriter(str(tmp_path / "packed.json"), SPECS, compression) as writer:
+        for testcase in TESTCASES:
+            writer.write(testcase)
+    return str(tmp_path)
+
+
+def test__pack_writer(tmp_path):
+    path = _pack(tmp_path)
+    specs = get_specs(path, "packed")
+
+    assert isinstance(specs["testcases"], pack.PackedTestcases)
+    assert len(specs["testcases"]) == len(TESTCASES)
+    assert list(specs["testcases"]) == TESTCASES
+    assert (tmp_path / "packed.pack").is_file()
+
+
+def test__pack_writer__zstd(tmp_path):
+    pytest.importorskip("zstandard")
+
+    path = _pack(tmp_path, pack.ZSTD)
+    assert list(get_specs(path, "packed")["testcases"]) == TESTCASES
+
+
+def test__packed_io__lazy(tmp_path):
+    path = _pack(tmp_path)
+    test_input, test_output = get_specs(path, "packed")["testcases"][0]
+
+    assert test_output._lines is None
+    assert test_input.open().read() == b"1\n2 3\n"
+    assert test_output[1] == "2 3"
+    assert test_output._lines is not None
+
+
+def test__packed_io__chunks(tmp_path, monkeypatch):
+    path = _pack(tmp_path)
+    test_input, _ = get_specs(path, "packed")["testcases"][2]
+
+    # the member is read a few bytes at a time, as it is decompressed.
+    monkeypatch.setattr(pack, "_READ_SIZE", 7)
+    with test_input.open() as fd:
+        assert fd.read(5) == b"0\n1\n2"
+        assert fd.read() == "".join(f"{i}\n" for i in range(1000)).encode("utf-8")[5:]
+
+
+def test__judge_program__packed(tmp_path):
+    path = _pack(tmp_path)
+    specs = get_specs(path, "packed")
+
+    r = judge_program(get_command("tests/solutions/echo_tester.py"), **specs)
+    assert r.passed == r.total == len(TESTCASES)
+
+    r = judge_program(get_command("tests/solutions/wa_tester.py"), **specs)
+    assert r.passed == 0
+    assert r[2].program_difference["expected"] == TESTCASES[2][1][0]
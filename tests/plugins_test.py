@@ -0,0 +1,65 @@
+import _template
+
+import pytest
+
+import sys
+
+import command
+import judge
+from plugins import Registry, load
+
+
+def test__load():
+    import json
+    assert load("json:dumps") is json.dumps
+    assert load("os.path:join.__name__") == "join"
+
+
+def test__registry__lazy():
+    sys.modules.pop("judges.identical_judge", None)
+
+    r = Registry("sjudge.test", {"identical": "judges.identical_judge:identical_judge"})
+    assert "identical" in r
+    assert "judges.identical_judge" not in sys.modules
+
+    assert r["identical"](["a"], ["a"])
+    assert "judges.identical_judge" in sys.modules
+
+    # The entry points are not looked up for built-in plugins.
+    assert r._entry_points is None
+
+
+def test__registry__register():
+    r = Registry("sjudge.test", {})
+    with pytest.raises(KeyError):
+        r["missing"]
+
+    r.register("always", lambda program_output, expected_output: True)
+    r.register("dumps", "json:dumps")
+    assert set(r) == {"always", "dumps"}
+    assert len(r) == 2
+    assert r["always"]([], ["a"])
+
+
+def test__judges():
+    tc = judge.judge_one(command.get_command("tests/solutions/echo_tester.py"), ["a"], ["a"],
+                         judge="identical")
+    assert tc.passed
+
+    with pytest.raises(AssertionError):
+        judge.judge_one(command.get_command("tests/solutions/echo_tester.py"), ["a"], ["a"],
+                        judge="missing")
+
+
+def test__language_plugins():
+    command.LANGUAGE_PLUGINS.register("pyz", ("python3 {}",))
+    assert command.get_command("main.pyz") == "python3 main.pyz"
+
+
+def test__language_plugins__native(monkeypatch):
+    monkeypatch.setattr(command, "LANGUAGE_PLUGINS", Registry("sjudge.languages", {}))
+    assert command.get_command("solutions/main") == "./solutions/main"
+    assert command.get_command("main.exe") == "./main.exe"
+
+    # The entry points are not looked up for programs which are run directly.
+    assert command.LANGUAGE_PLUGINS._entry_points is None
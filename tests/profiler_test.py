@@ -0,0 +1,80 @@
+import _template
+
+import os
+
+import judge
+import profiler
+from command import get_command
+from judge import judge_program
+
+MEBIBYTE = 1024 * 1024
+
+
+def test__profiled_command():
+    assert profiler.profiled_command("./a.out", "report.json", 1.0) is None
+    assert profiler.profiled_command("python3 -m module", "report.json", 1.0) is None
+
+    c = profiler.profiled_command("python3 -u solution.py 1", "report.json", 1.5)
+    assert c.split() == [
+        "python3", "-u", profiler.BOOTSTRAP, "report.json", "1.5",
+        str(profiler.SAMPLE_INTERVAL), "solution.py", "1"
+    ]
+
+
+def test__read_report__missing():
+    assert profiler.read_report(os.path.join("tests", "missing_report.json")) is None
+
+
+def test__judge_program__profile():
+    c = get_command("tests/solutions/slow_tester.py")
+    r = judge_program(c, [([""], [""])], time_limit=0.5, profile=True, reverify_band=0)
+    tc = r[0]
+
+    assert tc.verdict == judge.TIME_LIMIT_EXCEEDED
+    assert tc.program_profile["stopped"]
+    assert tc.program_profile["samples"] > 0
+
+    hottest = {tuple(f[:3]) for f in tc.program_profile["functions"][:2]}
+    assert hottest == {("<module>", "slow_tester.py", 1), ("count_pairs", "slow_tester.py", 1)}
+
+    filename, line, _, source = tc.program_profile["lines"][0]
+    assert (filename, line) in (("slow_tester.py", 4), ("slow_tester.py", 5))
+    assert source.startswith(("for j", "total"))
+
+
+def test__judge_program__no_profile():
+    c = get_command("tests/solutions/slow_tester.py")
+    r = judge_program(c, [([""], [""])], time_limit=0.5, reverify_band=0)
+    assert r[0].program_profile is None
+
+
+def test__traced_command():
+    assert profiler.traced_command("node solution.js", "report.json", 1024) is None
+
+    c = profiler.traced_command("python3 solution.py", "report.json", 1024)
+    assert c.split() == [
+        "python3", profiler.ALLOCATIONS_BOOTSTRAP, "report.json", "1024",
+        str(profiler.PROFILE_TOP), "solution.py"
+    ]
+
+
+def test__judge_program__allocations():
+    c = get_command("tests/solutions/growth_tester.py")
+    r = judge_program(c, [([""], [""])], memory_limit=32, profile=True)
+    tc = r[0]
+
+    assert tc.verdict == judge.MEM_LIMIT_EXCEEDED
+    assert tc.program_allocations["line"][:2] == ["growth_tester.py", 3]
+
+    filename, line, size, count, source = tc.program_allocations["sites"][0]
+    assert (filename, line, source) == ("growth_tester.py", 3, "values.append(str(i))")
+    assert size > 8 * MEBIBYTE
+    assert count > 1000
+
+
+def test__judge_program__allocations__single():
+    c = get_command("tests/solutions/mle_tester.py")
+    r = judge_program(c, [([""], [""])], memory_limit=32, profile=True)
+    assert r[0].program_allocations["line"] == [
+        "mle_tester.py", 2, 's = "_" * (1024 * MEBIBYTE)'
+    ]
@@ -0,0 +1,70 @@
+import _template
+
+import io
+
+import judge
+from progress import ProgressRenderer
+
+
+class _Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def _result(verdict=judge.ANSWER_CORRECT):
+    return judge.TestCaseResult([""], ["a"], ["b"], [], 0, verdict=verdict)
+
+
+def test__renderer__batched(capsys):
+    stream = io.StringIO()
+    renderer = ProgressRenderer(10000, stream=stream, interval=3600)
+
+    for _ in range(9999):
+        renderer(_result())
+    renderer(_result(judge.WRONG_ANSWER))
+    renderer.close()
+
+    # Only the failed test case is displayed in detail, to the stream.
+    assert capsys.readouterr().out == ""
+    output = stream.getvalue()
+    assert output.count("Wrong Answer") == 2
+    assert "Case #1 → Wrong Answer" in output
+    assert "Expected output:" in output
+
+    lines = output.splitlines()
+    assert lines[-1].startswith("Judged 10000/10000")
+    assert "Answer Correct: 9999" in lines[-1]
+    assert "Wrong Answer: 1" in lines[-1]
+
+
+def test__renderer__rate():
+    stream = io.StringIO()
+    renderer = ProgressRenderer(100, stream=stream, interval=1e-9)
+    for _ in range(100):
+        renderer(_result())
+    renderer.close()
+
+    assert len(stream.getvalue().splitlines()) == 100
+
+
+def test__renderer__terminal():
+    stream = _Terminal()
+    renderer = ProgressRenderer(100, stream=stream, interval=1e-9)
+    for _ in range(100):
+        renderer(_result())
+    renderer.close()
+
+    output = stream.getvalue()
+    assert output.count("\n") == 1
+    assert output.rstrip("\n").split("\r")[-1].startswith("Judged 100/100")
+
+
+def test__renderer__detailed(capsys):
+    stream = io.StringIO()
+    renderer = ProgressRenderer(3, stream=stream)
+    for _ in range(3):
+        renderer(_result())
+    renderer.close()
+
+    assert capsys.readouterr().out == ""
+    assert stream.getvalue().count("Answer Correct") == 3
@@ -0,0 +1,66 @@
+import _template
+
+import json
+import pytest
+
+import exercise
+import reference
+from command import get_command
+from exercise import get_specs
+from reference import fill_outputs
+
+SPECS = {
+    "exercise": "test0",
+    "judge": "default",
+    "time_limit": 1.0,
+    "memory_limit": 256,
+    "testcases": [[[str(i)], []] for i in range(3)]
+}
+
+
+def _exercise(tmp_path):
+    (tmp_path / "test0.txt").write_text("test0")
+    (tmp_path / "test0.json").write_text(json.dumps(SPECS))
+    return str(tmp_path)
+
+
+def test__fill_outputs(tmp_path):
+    path = _exercise(tmp_path)
+    fill_outputs(path, "test0", get_command("tests/solutions/wa_tester.py"), processes=2)
+
+    specs = get_specs(path, "test0")
+    assert specs["testcases"] == [[[str(i)], ["wa"]] for i in range(3)]
+    assert len(specs[reference.USAGE_SPEC]) == 3
+    assert all(t >= 0 and m > 0 for t, m in specs[reference.USAGE_SPEC])
+
+
+def test__fill_outputs__streamed(tmp_path, monkeypatch):
+    path = _exercise(tmp_path)
+
+    def no_get_specs(*args, **kwargs):
+        raise AssertionError("the test cases should not all be loaded")
+
+    monkeypatch.setattr(exercise, "get_specs", no_get_specs)
+    fill_outputs(path, "test0", get_command("tests/solutions/wa_tester.py"), processes=2)
+    monkeypatch.undo()
+
+    assert get_specs(path, "test0")["testcases"] == [[[str(i)], ["wa"]] for i in range(3)]
+
+
+def test__fill_outputs__bad_reference(tmp_path):
+    path = _exercise(tmp_path)
+
+    with pytest.raises(AssertionError):
+        fill_outputs(path, "test0", get_command("tests/solutions/rte_tester.py"), processes=2)
+
+    assert get_specs(path, "test0") == SPECS
+
+
+def test__fill_outputs__again(tmp_path):
+    path = _exercise(tmp_path)
+    fill_outputs(path, "test0", get_command("tests/solutions/wa_tester.py"), processes=2)
+    fill_outputs(path, "test0", get_command("tests/solutions/wa_tester.py"), processes=2)
+
+    with open(tmp_path / "test0.json") as fd:
+        keys = [key for key, _ in json.load(fd, object_pairs_hook=lambda pairs: pairs)]
+    assert keys.count(reference.USAGE_SPEC) == 1
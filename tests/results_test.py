@@ -0,0 +1,124 @@
+import _template
+
+import sqlite3
+
+import pytest
+
+import judge
+import results
+from command import get_command
+from results import ResultStore
+
+
+def _result(*times):
+    testcases = [
+        judge.TestCaseResult([""], [""], [""], [], 0, program_time=t, program_memory=1024)
+        for t in times
+    ]
+    for i, tc in enumerate(testcases):
+        tc.testcase_no = i
+    return judge.JudgeResult(testcases)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultStore(str(tmp_path / "results.db"), batch_size=3) as s:
+        yield s
+
+
+def test__submission_hash(tmp_path):
+    program = tmp_path / "program.py"
+    program.write_text("print(1)")
+
+    assert results.submission_hash(str(program)) == results.submission_hash(str(program))
+    assert results.submission_hash(str(program)) != results.submission_hash("python3 -c 1")
+
+
+def test__record__batched(store):
+    store.record(_result(10), "test0", "a", user="alice", timestamp=1.0)
+    store.record(_result(20), "test0", "a", user="alice", timestamp=2.0)
+
+    db = sqlite3.connect(store.path)
+    assert db.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 0
+
+    store.record(_result(30, 5), "test0", "b", user="alice", timestamp=3.0)
+    assert db.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 3
+    assert db.execute("SELECT COUNT(*) FROM testcases").fetchone()[0] == 4
+
+    store.record(_result(40), "test1", "c", user="bob", timestamp=4.0)
+    store.flush()
+    assert db.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 4
+
+
+def test__record__testcase_numbers(store):
+    # The test cases are judged out of order, and the judging stops at
+    # the first failure (the third test case).
+    result = judge.judge_program(
+        get_command("tests/solutions/echo_tester.py"),
+        [(["1"], ["1"]), (["2"], ["2"]), (["3"], ["4"]), (["5"], ["5"])],
+        order=[3, 2, 0, 1], fail_fast=True
+    )
+    store.record(result, "test0", "a", timestamp=1.0)
+    store.flush()
+
+    db = sqlite3.connect(store.path)
+    rows = db.execute("SELECT testcase_no, verdict FROM testcases ORDER BY testcase_no").fetchall()
+    assert rows == [(2, judge.WRONG_ANSWER), (3, judge.ANSWER_CORRECT)]
+
+
+def test__queries(store):
+    store.record(_result(10), "test0", "a", user="alice", host="h1", timestamp=100.0)
+    store.record(_result(30, 5), "test0", "b", user="alice", host="h1", timestamp=200.0)
+    store.record(_result(50), "test1", "c", user="bob", host="h2", timestamp=300.0)
+    store.record(_result(70), "test0", "c", user="bob", host="h1", timestamp=1000.0)
+    store.flush()
+
+    history = store.user_history("alice")
+    assert [(r["submission"], r["maximum_time"]) for r in history] == [("a", 10), ("b", 30)]
+    assert store.user_history("alice", "test1") == []
+    assert [r["host"] for r in store.submission_history("c")] == ["h2", "h1"]
+
+    slowest = store.slowest_exercises()
+    assert [(r["exercise"], r["results"], r["average_time"]) for r in slowest] == [
+        ("test1", 1, 50), ("test0", 3, 110 / 3)
+    ]
+    assert [r["exercise"] for r in store.slowest_exercises(since=250.0)] == ["test0", "test1"]
+
+    trend = store.host_trend("h1", "test0", period=500)
+    assert [(r["period"], r["results"], r["average_time"]) for r in trend] == [
+        (0, 2, 20), (1000, 1, 70)
+    ]
+    trend = store.host_trend("h1", period=500, since=150.0)
+    assert [(r["period"], r["results"], r["average_time"]) for r in trend] == [
+        (0, 1, 30), (1000, 1, 70)
+    ]
+
+
+def test__exercises__totals(store):
+    for i, t in enumerate((10, 40, 25)):
+        store.record(_result(t), "test0", str(i), timestamp=float(i))
+    store.flush()
+
+    db = sqlite3.connect(store.path)
+    assert db.execute("SELECT * FROM exercises").fetchall() == [("test0", 3, 75.0, 40.0)]
+
+
+def test__queries__indexed(store):
+    db = sqlite3.connect(store.path)
+    plans = [
+        ("SELECT * FROM results WHERE user = ? AND exercise = ? ORDER BY timestamp", 2),
+        ("SELECT * FROM results WHERE submission = ?", 1),
+        ("SELECT * FROM results WHERE host = ? AND exercise = ?", 2),
+        ("SELECT exercise, AVG(maximum_time) FROM results WHERE timestamp >= ? "
+         "GROUP BY exercise", 1),
+    ]
+    for query, parameters in plans:
+        plan = " ".join(row[-1] for row in db.execute(f"EXPLAIN QUERY PLAN {query}",
+                                                      ("x",) * parameters))
+        assert "INDEX" in plan, plan
+
+    # The trend of a host only reads the recent results of the host.
+    plan = " ".join(row[-1] for row in db.execute(
+        "EXPLAIN QUERY PLAN SELECT AVG(maximum_time) FROM results "
+        "WHERE host = ? AND timestamp >= ?", ("x", 0.0)))
+    assert "INDEX results_host_timestamp (host=? AND timestamp>?)" in plan, plan
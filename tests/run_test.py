@@ -2,6 +2,7 @@ import _template
 
 import pytest
 
+import io
 import shlex
 
 from run import run
@@ -79,3 +80,45 @@ def test__run__wa():
 def test__run__no_exist():
     with pytest.raises(AssertionError):
         run(["hopefullynothingiscalledthis"], "", memory_limit=ml, time_limit=tl)
+
+
+def test__run__stream():
+    a = shlex.split(get_command("tests/solutions/echo_tester.py"))
+    s = "".join(f"{i}\n" for i in range(100000))
+    c = run(a, io.BytesIO(s.encode("utf-8")), memory_limit=ml, time_limit=tl)
+    assert c.returncode == 0
+    assert c.stdout == s
+    assert not c.time_exceeded
+    assert not c.memory_exceeded
+
+
+def test__run__stream_unread():
+    a = shlex.split(get_command("tests/solutions/wa_tester.py"))
+    c = run(a, io.BytesIO(b"_" * (4 * MEBIBYTE)), memory_limit=ml, time_limit=tl)
+    assert c.returncode == 0
+    assert c.stdout == "wa\n"
+
+
+def test__run__stdin_file(tmp_path):
+    a = shlex.split(get_command("tests/solutions/echo_tester.py"))
+    (tmp_path / "input.txt").write_text("abc\ndef\n")
+
+    c = run(a, None, memory_limit=ml, time_limit=tl, stdin_file=str(tmp_path / "input.txt"))
+    assert c.stdout == "abc\ndef\n"
+
+    with open(tmp_path / "input.txt", "rb") as fd:
+        fd.seek(4)
+        c = run(a, None, memory_limit=ml, time_limit=tl, stdin_file=fd.fileno())
+        assert c.stdout == "def\n"
+
+
+def test__run__stderr_flood():
+    import run as sjrun
+
+    a = shlex.split(get_command("tests/solutions/stderr_tester.py"))
+    c = run(a, "", memory_limit=ml, time_limit=tl)
+    assert c.returncode != 0
+    assert len(c.stderr) <= sjrun.STDERR_HEAD_SIZE + sjrun.STDERR_TAIL_SIZE + 100
+    assert c.stderr.startswith("line 0 of")
+    assert "bytes omitted" in c.stderr
+    assert c.stderr.strip().endswith("ValueError: the final error")
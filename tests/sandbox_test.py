@@ -0,0 +1,66 @@
+import _template
+
+import pytest
+
+import shlex
+import time
+
+import sandbox
+from command import get_command
+from judge import judge_one, RUNTIME_ERROR, ANSWER_CORRECT
+from run import run
+
+MEBIBYTE = 1024 * 1024
+
+pytestmark = pytest.mark.skipif(not sandbox.available(), reason="requires user namespaces")
+
+
+@pytest.fixture(scope="module")
+def pool():
+    p = sandbox.SandboxPool(2)
+    yield p
+    p.close()
+
+
+def test__sandbox__no_network(pool):
+    a = shlex.split(get_command("tests/solutions/connections_tester.py"))
+    with pool.sandbox() as s:
+        c = run(a, "", memory_limit=64 * MEBIBYTE, time_limit=6, sandbox=s)
+    assert c.args == a
+    assert c.returncode != 0
+
+
+def test__sandbox__reset(pool):
+    a = shlex.split(get_command("tests/solutions/orphan_tester.py"))
+    with pool.sandbox() as s:
+        c = run(a, "", memory_limit=64 * MEBIBYTE, time_limit=6, sandbox=s)
+        assert c.returncode == 0
+
+        # The killed processes can take a moment to disappear.
+        deadline = time.monotonic() + 1.0
+        while s.processes() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert s.processes() == []
+
+
+def test__sandbox__judge_one(pool):
+    tc = judge_one(get_command("tests/solutions/echo_tester.py"), ["abc"], ["abc"],
+                   sandboxes=pool)
+    assert tc.verdict == ANSWER_CORRECT
+
+    tc = judge_one(get_command("tests/solutions/connections_tester.py"), [], [],
+                   sandboxes=pool)
+    assert tc.verdict == RUNTIME_ERROR
+
+
+def test__sandbox__replaced(pool):
+    with pool.sandbox() as s:
+        s.close()
+    with pool.sandbox() as s:
+        assert s.alive()
+    with pool.sandbox() as s:
+        assert s.alive()
+
+
+def test__measure_overhead(pool):
+    assert sandbox.measure_overhead(pool, runs=5) < 0.050
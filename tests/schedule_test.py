@@ -0,0 +1,75 @@
+import _template
+
+import concurrent.futures
+import threading
+
+import judge
+import schedule
+from command import get_command
+from judge import judge_program
+from schedule import TimingHistory
+
+ECHO = get_command("tests/solutions/echo_tester.py")
+
+
+def _result(*cases):
+    r = judge.JudgeResult()
+    for i, (time, passed) in enumerate(cases):
+        tc = judge.TestCaseResult(
+            [""], [""], [""], [], 0, program_time=time,
+            verdict=judge.ANSWER_CORRECT if passed else judge.WRONG_ANSWER
+        )
+        r += tc
+        tc.testcase_no = i
+    return r
+
+
+def test__history(tmp_path):
+    history = TimingHistory.for_exercise("test0", str(tmp_path))
+    assert schedule.longest_first(3, history) == [0, 1, 2]
+
+    history.update(_result((10, True), (100, False), (50, True)))
+    history.update(_result((20, True), (100, False), (50, False)))
+    assert history.times[0] == 10 * (1 - schedule.SMOOTHING) + 20 * schedule.SMOOTHING
+    assert history.runs == {0: 2, 1: 2, 2: 2}
+    assert history.failures == {0: 0, 1: 2, 2: 1}
+    history.save()
+
+    loaded = TimingHistory.for_exercise("test0", str(tmp_path))
+    assert (loaded.times, loaded.runs, loaded.failures) == (
+        history.times, history.runs, history.failures
+    )
+    assert schedule.longest_first(4, loaded) == [1, 3, 2, 0]
+    assert schedule.likely_failures_first(4, loaded) == [1, 2, 3, 0]
+    assert loaded.failure_rate(3) == 0.5
+
+
+def test__estimated_times(tmp_path):
+    history = TimingHistory(str(tmp_path / "missing.json"))
+    specs = {"reference_usage": [[0.1, 0], [0.3, 0], [0.2, 0]], "sizes": [3, 1, 2]}
+
+    assert schedule.longest_first(3, history, specs) == [1, 2, 0]
+    assert schedule.longest_first(3, history, {"sizes": [3, 1, 2]}) == [0, 2, 1]
+    assert schedule.estimated_times(4, history, {"sizes": [3, 1, 2]}) == [3, 1, 2, 2]
+
+
+def test__judge_program__dispatch():
+    testcases = [([str(i)], [str(i)]) for i in range(6)]
+    started = []
+    lock = threading.Lock()
+
+    class RecordingExecutor(concurrent.futures.ThreadPoolExecutor):
+        def submit(self, fn, test_number, *args):
+            with lock:
+                started.append(test_number)
+            return super().submit(fn, test_number, *args)
+
+    reported = []
+    with RecordingExecutor(2) as executor:
+        r = judge_program(ECHO, testcases, executor=executor, dispatch=[5, 3, 1, 0, 2, 4],
+                          progress_hook=lambda tc: reported.append(tc.testcase_no))
+
+    assert started == [5, 3, 1, 0, 2, 4]
+    assert reported == [0, 1, 2, 3, 4, 5]
+    assert [tc.exercise_input for tc in r] == [[str(i)] for i in range(6)]
+    assert r.passed == 6
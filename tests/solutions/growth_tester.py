@@ -0,0 +1,3 @@
+values = []
+for i in range(10 ** 8):
+    values.append(str(i))
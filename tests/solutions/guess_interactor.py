@@ -0,0 +1,21 @@
+import sys
+
+# Usage: guess_interactor.py <input file> <reference output file>
+with open(sys.argv[1]) as fd:
+    secret, queries = map(int, fd.read().split())
+
+for _ in range(queries):
+    line = sys.stdin.readline()
+    try:
+        guess = int(line)
+    except ValueError:
+        sys.stderr.write(f"expected a guess, got {line.strip()!r}\n")
+        sys.exit(2)
+
+    if guess == secret:
+        print("=", flush=True)
+        sys.exit(0)
+    print("<" if secret < guess else ">", flush=True)
+
+sys.stderr.write(f"no correct guess in {queries} queries\n")
+sys.exit(1)
@@ -0,0 +1,12 @@
+low, high = 1, 10 ** 9
+while True:
+    guess = (low + high) // 2
+    print(guess, flush=True)
+
+    answer = input()
+    if answer == "=":
+        break
+    elif answer == "<":
+        high = guess - 1
+    else:
+        low = guess + 1
@@ -0,0 +1,9 @@
+def count_pairs(n):
+    total = 0
+    for i in range(n):
+        for j in range(n):
+            total += i < j
+    return total
+
+
+print(count_pairs(10 ** 6))
@@ -0,0 +1,6 @@
+import sys
+
+for i in range(200000):
+    sys.stderr.write(f"line {i} of a very noisy error log\n")
+
+raise ValueError("the final error")
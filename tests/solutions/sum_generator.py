@@ -0,0 +1,8 @@
+import random
+import sys
+
+# Usage: sum_generator.py <seed>
+rng = random.Random(int(sys.argv[1]))
+n = rng.randint(1, 8)
+print(n)
+print(*(rng.randint(-10, 100) for _ in range(n)))
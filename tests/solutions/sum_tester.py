@@ -0,0 +1,2 @@
+n = int(input())
+print(sum(x for x in map(int, input().split()[:n]) if x > 0))
@@ -0,0 +1,44 @@
+import _template
+
+import judge
+import stress
+from command import get_command
+
+GENERATOR = get_command("tests/solutions/sum_generator.py")
+REFERENCE = get_command("tests/solutions/sum_reference.py")
+PROGRAM = get_command("tests/solutions/sum_tester.py")
+
+
+def test__stress():
+    failure = stress.stress(GENERATOR, REFERENCE, PROGRAM, 50, processes=2)
+
+    assert failure.seed == failure.iterations - 1
+    assert any(int(x) < 0 for x in failure.generated_input[1].split())
+
+    assert failure.result.verdict == judge.WRONG_ANSWER
+    assert failure.result.exercise_input == ["1", "-1"]
+    assert failure.result.program_difference["expected"] == "-1"
+    assert failure.result.program_difference["received"] == "0"
+
+
+def test__stress__agrees():
+    assert stress.stress(GENERATOR, REFERENCE, REFERENCE, 10, processes=1) is None
+
+
+def test__stress__first_seed():
+    first = stress.stress(GENERATOR, REFERENCE, PROGRAM, 50, processes=1, minimize=False)
+    later = stress.stress(GENERATOR, REFERENCE, PROGRAM, 50, first_seed=first.seed + 1,
+                          processes=1, minimize=False)
+
+    assert later.seed > first.seed
+    assert later.iterations == later.seed - first.seed
+    assert later.result.exercise_input == later.generated_input
+
+
+def test__minimize_input():
+    def fails(test_input):
+        return any("x" in line for line in test_input) and sum(
+            int(t) for line in test_input for t in line.split() if t.isdigit()) >= 10
+
+    minimized = stress.minimize_input(["a b", "1 2 x 3", "40 c", "d"], fails)
+    assert minimized == ["x", "10"]
@@ -0,0 +1,151 @@
+import _template
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import judge
+import submissions
+from submissions import SubmissionQueue
+
+AC = "tests/solutions/echo_tester.py"
+WA = "tests/solutions/wa_tester.py"
+
+
+@pytest.fixture
+def queue(tmp_path):
+    (tmp_path / "test0.txt").write_text("test0")
+    (tmp_path / "test0.json").write_text(
+        '{"exercise": "test0", "judge": "default", "time_limit": 6.0, "memory_limit": 64, '
+        '"testcases": [[["1"], ["1"]], [["2"], ["2"]]]}'
+    )
+    return SubmissionQueue(str(tmp_path / "queue.db"), str(tmp_path), str(tmp_path), 4)
+
+
+def test__submit(queue):
+    i = queue.submit("alice", "test0", AC)
+    status = queue.status(i)
+    assert status["state"] == submissions.QUEUED
+    assert status["attempt"] == 1
+
+    with pytest.raises(AssertionError):
+        queue.submit("alice", "test1", AC)
+    with pytest.raises(AssertionError):
+        queue.submit("alice", "test0", "tests/solutions/hopefullynothingiscalledthis.py")
+    with pytest.raises(AssertionError):
+        queue.status(1000)
+
+
+def test__submit__supersede(queue):
+    first = queue.submit("alice", "test0", AC)
+    second = queue.submit("alice", "test0", AC)
+
+    assert queue.status(first)["state"] == submissions.SUPERSEDED
+    assert queue.status(second)["attempt"] == 2
+    assert queue.metrics()["queue_depth"] == 1
+
+
+def test__claim__fair(queue):
+    spam = queue.submit("alice", "test0", AC)
+    queue.judge(queue.claim())
+
+    resubmission = queue.submit("alice", "test0", AC)
+    first = queue.submit("bob", "test0", AC)
+    other = queue.submit("carol", "test0", AC)
+
+    assert [queue.claim()["id"] for _ in range(3)] == [first, other, resubmission]
+    assert queue.status(spam)["state"] == submissions.DONE
+
+
+def test__claim__admission(queue):
+    queue.max_running = 1
+    queue.submit("alice", "test0", AC)
+    queue.submit("bob", "test0", AC)
+
+    assert queue.claim() is not None
+    assert queue.claim() is None
+    assert queue.metrics()["running"] == 1
+
+
+def test__judge__error(queue, monkeypatch):
+    queue.max_running = 1
+    i = queue.submit("alice", "test0", AC)
+
+    def broken(*args, **kwargs):
+        raise OSError("no space left on device")
+
+    monkeypatch.setattr(submissions.sjudge, "judge_program", broken)
+    queue.judge(queue.claim())
+
+    status = queue.status(i)
+    assert status["state"] == submissions.FAILED
+    assert "no space left on device" in status["message"]
+    assert queue.metrics()["running"] == 0
+
+
+def test__recovery(queue):
+    i = queue.submit("alice", "test0", AC)
+    queue.claim()
+    assert queue.status(i)["state"] == submissions.RUNNING
+
+    recovered = SubmissionQueue(queue.path, queue.exercises_location, queue.solutions_location)
+    assert recovered.status(i)["state"] == submissions.QUEUED
+
+
+def test__serve(queue):
+    ac = queue.submit("alice", "test0", AC)
+    wa = queue.submit("bob", "test0", WA)
+
+    stop = threading.Event()
+    thread = threading.Thread(target=queue.serve, args=(stop,))
+    thread.start()
+
+    deadline = time.time() + 60
+    while time.time() < deadline and queue.metrics()["queue_depth"] + queue.metrics()["running"]:
+        time.sleep(0.1)
+    stop.set()
+    thread.join()
+
+    assert queue.status(ac)["verdict"] == judge.ANSWER_CORRECT
+    assert queue.status(ac)["passed"] == 2
+    assert queue.status(wa)["verdict"] == judge.WRONG_ANSWER
+    assert queue.status(wa)["state"] == submissions.DONE
+    assert queue.metrics()["recent_average_wait"] >= 0
+
+
+def test__judge__results(tmp_path, queue):
+    queue = SubmissionQueue(queue.path, queue.exercises_location, queue.solutions_location,
+                            results_path=str(tmp_path / "results.db"))
+    queue.submit("alice", "test0", AC)
+    queue.judge(queue.claim())
+    queue.results.close()
+
+    history = queue.results.user_history("alice")
+    assert [(r["exercise"], r["verdict"], r["passed"]) for r in history] == [
+        ("test0", judge.ANSWER_CORRECT, 2)
+    ]
+
+
+def test__claim__unlocked(queue, monkeypatch):
+    i = queue.submit("alice", "test0", AC)
+    j = queue.submit("bob", "test0", AC)
+    get_specs = submissions.exercise.get_specs
+
+    def unlocked(*args, **kwargs):
+        # The database can be written to while the exercise is loaded.
+        db = sqlite3.connect(queue.path, timeout=0)
+        db.execute("BEGIN IMMEDIATE")
+        db.rollback()
+        return get_specs(*args, **kwargs)
+
+    monkeypatch.setattr(submissions.exercise, "get_specs", unlocked)
+    assert queue.claim()["id"] == i
+
+    # A submission which can not be run yet goes back to the queue.
+    monkeypatch.setattr(submissions, "_memory_available", lambda memory: False)
+    assert queue.claim() is None
+    assert queue.status(j)["state"] == submissions.QUEUED
+    assert queue.status(j)["started"] is None
+    assert queue.metrics()["running"] == 1
@@ -18,3 +18,13 @@ def test__one_truncate():
 def test__both_truncate():
     assert truncate(["abc", "def"], char_limit=6, nl_limit=1)[:-1] == ["abc"]
     assert truncate(["abc", "def"], char_limit=3, nl_limit=2)[:-1] == ["abc"]
+
+
+def test__head_tail():
+    from truncate import head_tail, TRUNCATED_STRING
+
+    s = [str(i) for i in range(10)]
+    assert head_tail(s, 5, 5) == s
+    assert head_tail(s, 2, 3) == ["0", "1", TRUNCATED_STRING, "7", "8", "9"]
+    assert head_tail(s, 2, 0) == ["0", "1", TRUNCATED_STRING]
+    assert head_tail(["abcdef"], 1, 1, char_limit=3) == ["abc" + TRUNCATED_STRING]
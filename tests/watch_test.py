@@ -0,0 +1,83 @@
+import _template
+
+import threading
+import time
+
+import judge
+import watch
+from command import get_command
+from judge import judge_program
+
+ECHO = get_command("tests/solutions/echo_tester.py")
+TESTCASES = [(["1"], ["1"]), (["2"], ["3"]), (["3"], ["3"]), (["4"], ["5"])]
+
+
+def test__failed_first():
+    assert watch.failed_first(4, None) == [0, 1, 2, 3]
+
+    previous = judge_program(ECHO, TESTCASES)
+    assert watch.failed_first(4, previous) == [1, 3, 0, 2]
+
+    stopped = judge_program(ECHO, TESTCASES, order=[2, 1, 0, 3], fail_fast=True)
+    assert watch.failed_first(4, stopped) == [1, 0, 3, 2]
+
+
+def test__judge_program__order():
+    reported = []
+    r = judge_program(ECHO, TESTCASES, order=[3, 1, 0, 2],
+                      progress_hook=lambda tc: reported.append(tc.testcase_no))
+
+    assert reported == [3, 1, 0, 2]
+    assert [tc.testcase_no for tc in r] == [0, 1, 2, 3]
+    assert [tc.exercise_input for tc in r] == [["1"], ["2"], ["3"], ["4"]]
+    assert r.passed == 2 and r.skipped == 0
+
+
+def test__judge_program__fail_fast():
+    r = judge_program(ECHO, TESTCASES, fail_fast=True)
+    assert [tc.testcase_no for tc in r] == [0, 1]
+    assert r.verdict == judge.WRONG_ANSWER
+    assert r.skipped == 2
+
+    r = judge_program(ECHO, TESTCASES, order=[1, 0, 2, 3], fail_fast=True)
+    assert [tc.testcase_no for tc in r] == [1]
+    assert r.skipped == 3
+
+    r = judge_program(ECHO, TESTCASES[::2], fail_fast=True)
+    assert r.passed == 2 and r.skipped == 0
+
+
+def test__wait_for_change(tmp_path):
+    path = tmp_path / "program.py"
+    path.write_text("print(1)")
+    previous = watch.stamp(str(path))
+
+    def save():
+        time.sleep(0.1)
+        path.write_text("print(22)")
+
+    saver = threading.Thread(target=save)
+    saver.start()
+    new = watch.wait_for_change(str(path), previous, interval=0.02)
+    saver.join()
+
+    assert new != previous
+    assert new == watch.stamp(str(path))
+    assert watch.stamp(str(tmp_path / "missing.py")) is None
+
+
+def test__watch(tmp_path):
+    path = tmp_path / "program.py"
+    path.write_text("print(1)")
+    orders = []
+
+    def judge_once(order):
+        orders.append(order)
+        if len(orders) == 1:
+            threading.Timer(0.1, lambda: path.write_text("print(22)")).start()
+        elif len(orders) == 2:
+            raise KeyboardInterrupt
+        return judge_program(ECHO, TESTCASES, order=order, fail_fast=True)
+
+    watch.watch(str(path), 4, judge_once)
+    assert orders == [[0, 1, 2, 3], [1, 2, 3, 0]]